@@ -0,0 +1,99 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark that compares the dispatch cost per command of the old DccServer._process_command (attribute lookups and
+signature inspection on each call) with the current one (dispatch table built once)
+DCC functions are replaced by empty functions wrapped the same way dcc.reroute does, so only dispatch is measured
+Usage: python benchmarks/benchmark_dispatch.py [--calls 100000]
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import types
+import timeit
+import argparse
+from functools import wraps
+
+from Qt.QtCore import QCoreApplication
+
+from tpDcc.core.server import DccServer
+
+if sys.version_info[0] == 2:
+    from inspect import getargspec
+else:
+    from inspect import getfullargspec as getargspec
+
+
+def build_dcc_module(functions_count=500):
+    """
+    Returns a module with given number of DCC functions wrapped like dcc.reroute wraps them
+    :param functions_count: int
+    :return: module
+    """
+
+    def reroute(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return wrapper
+
+    def all_scene_nodes(full_path=True, **kwargs):
+        return list()
+
+    dcc_module = types.ModuleType('benchmark_dcc')
+    for i in range(functions_count):
+        setattr(dcc_module, 'function_{}'.format(i), reroute(all_scene_nodes))
+    dcc_module.all_scene_nodes = reroute(all_scene_nodes)
+
+    return dcc_module
+
+
+def legacy_process_command(server, command_name, data_dict, reply_dict):
+    """
+    Dispatch used by DccServer before the dispatch table was introduced
+    """
+
+    if command_name in server._server_functions:
+        server._server_functions[command_name](data_dict, reply_dict)
+    elif server._dcc and hasattr(server._dcc, command_name):
+        reply_dict['success'] = True
+        dcc_fn = getattr(server._dcc, command_name)
+        arg_spec = getargspec(dcc_fn)
+        if not arg_spec[2]:
+            reply_dict['result'] = getattr(server._dcc, command_name)()
+        else:
+            data_dict.pop('cmd', None)
+            args = data_dict.pop('args', list())
+            reply_dict['result'] = getattr(server._dcc, command_name)(*args, **data_dict)
+    else:
+        reply_dict['msg'] = 'Invalid command ({})'.format(command_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DccServer command dispatch benchmark')
+    parser.add_argument('--calls', type=int, default=100000, help='number of commands dispatched')
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    server = DccServer(parent=app, client=True)
+    server._dcc = build_dcc_module()
+    server._build_dispatch_table()
+
+    def legacy():
+        legacy_process_command(
+            server, 'all_scene_nodes', {'cmd': 'all_scene_nodes', 'args': [], 'full_path': False}, {'success': False})
+
+    def dispatch_table():
+        server._process_command(
+            'all_scene_nodes', {'cmd': 'all_scene_nodes', 'args': [], 'full_path': False}, {'success': False})
+
+    legacy_time = min(timeit.repeat(legacy, number=args.calls, repeat=3)) / args.calls
+    dispatch_time = min(timeit.repeat(dispatch_table, number=args.calls, repeat=3)) / args.calls
+    print('legacy: {:8.3f} us/cmd | dispatch table: {:8.3f} us/cmd | speedup: {:5.2f}x'.format(
+        legacy_time * 1e6, dispatch_time * 1e6, legacy_time / dispatch_time))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
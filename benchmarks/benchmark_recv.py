@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark that compares the old DccClient receive path (chunks decoded and joined as strings) with the current one
+(payload received into a buffer preallocated from the frame header and decoded once) for 1 MB, 10 MB and 100 MB
+payloads
+Payloads are ASCII only, because old receive path fails when a multibyte character is split between chunks
+Use --no-json to exclude JSON parsing, which is the same in both paths, from the timings
+Usage: python benchmarks/benchmark_recv.py [--sizes 1 10 100] [--repeat 3]
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+
+from tpDcc.core import protocol
+from tpDcc.core.client import DccClient
+
+
+json_loads = json.loads
+
+
+def _decode_text(payload):
+    return payload if isinstance(payload, str) else payload.decode('utf-8')
+
+
+def build_reply(size_mb):
+    """
+    Returns an encoded reply of approximately given size in megabytes
+    :param size_mb: int
+    :return: bytes
+    """
+
+    node_name = u'|root|grp|geo|mesh_{}'
+    node_size = len(json.dumps(node_name).encode('utf-8')) + 8
+    nodes = [node_name.format(i) for i in range(size_mb * 1024 * 1024 // node_size)]
+
+    return json.dumps({'success': True, 'msg': '', 'result': nodes}).encode('utf-8')
+
+
+def legacy_recv(client_socket, timeout=60):
+    """
+    Receive path used by DccClient before the preallocated buffers were introduced
+    """
+
+    total_data = list()
+    reply_length = 0
+    bytes_remaining = protocol.LEGACY_HEADER_SIZE
+
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        data = client_socket.recv(bytes_remaining)
+        if data:
+            total_data.append(data)
+            bytes_remaining -= len(data)
+            if bytes_remaining <= 0:
+                for i in range(len(total_data)):
+                    total_data[i] = total_data[i].decode()
+                if reply_length == 0:
+                    reply_length = int(''.join(total_data))
+                    bytes_remaining = reply_length
+                    total_data = list()
+                else:
+                    return json_loads(''.join(total_data))
+
+    raise RuntimeError('Timeout waiting for response')
+
+
+def send_frames(server_socket, frame, repeat):
+    for _ in range(repeat):
+        server_socket.sendall(frame)
+
+
+def run(size_mb, repeat):
+    payload = build_reply(size_mb)
+
+    results = dict()
+    for mode in ('legacy', 'buffered'):
+        server_socket, client_socket = socket.socketpair()
+        if mode == 'legacy':
+            frame = protocol.pack_legacy_header(len(payload)) + payload
+        else:
+            frame = protocol.pack_header(protocol.Codecs.JSON, len(payload), request_id=1) + payload
+        sender = threading.Thread(target=send_frames, args=(server_socket, frame, repeat))
+        sender.start()
+
+        client = DccClient(timeout=60)
+        client._client_socket = client_socket
+        client._binary_protocol = True
+
+        timings = list()
+        for _ in range(repeat):
+            start_time = time.time()
+            if mode == 'legacy':
+                legacy_recv(client_socket)
+            else:
+                client.recv(1)
+            timings.append(time.time() - start_time)
+
+        sender.join()
+        server_socket.close()
+        client_socket.close()
+        results[mode] = min(timings)
+
+    print('{:>4} MB | legacy: {:8.3f} s | buffered: {:8.3f} s | speedup: {:5.2f}x'.format(
+        size_mb, results['legacy'], results['buffered'], results['legacy'] / results['buffered']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DccClient receive path benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100], help='payload sizes in megabytes')
+    parser.add_argument('--repeat', type=int, default=3, help='number of replies received per payload size')
+    parser.add_argument('--no-json', action='store_true', help='skip JSON parsing of received payloads')
+    args = parser.parse_args()
+
+    if args.no_json:
+        global json_loads
+        json_loads = _decode_text
+        protocol.JsonCodec.decode = lambda codec, payload, ordered=False: _decode_text(payload)
+
+    for size_mb in args.sizes:
+        run(size_mb, args.repeat)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark that compares round trip latency of small commands between DccClient and DccServer for each of the
+available transports (TCP loopback and local sockets)
+Usage: python benchmarks/benchmark_transport.py [--calls 5000] [--port 17600]
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import time
+import argparse
+import threading
+
+from Qt.QtCore import QCoreApplication, QTimer
+
+from tpDcc.core import transport
+from tpDcc.core.server import DccServer
+from tpDcc.core.client import DccClient
+
+
+class BenchmarkServer(DccServer):
+    def echo(self, data, reply):
+        reply['result'] = data.get('text', None)
+        reply['success'] = True
+
+
+def measure(port, transports, calls):
+    """
+    Returns the average and the best round trip time of an echo command sent using the first of given transports
+    :param port: int
+    :param transports: list(str)
+    :param calls: int
+    :return: tuple(str, float, float), used transport, average and best round trip time (in seconds)
+    """
+
+    client = DccClient(timeout=10)
+    client.TRANSPORTS = transports
+    client.connect(port=port)
+
+    timings = list()
+    for _ in range(calls):
+        start_time = time.time()
+        client.echo(text='node')
+        timings.append(time.time() - start_time)
+    used_transport = client.current_transport
+    client.disconnect()
+
+    return used_transport, sum(timings) / len(timings), min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DccClient/DccServer transport latency benchmark')
+    parser.add_argument('--calls', type=int, default=5000, help='number of commands sent per transport')
+    parser.add_argument('--port', type=int, default=17600, help='port the benchmark server listens in')
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    BenchmarkServer.PORT = args.port
+    server = BenchmarkServer()
+
+    def run():
+        for transports in ([transport.Transports.TCP], [transport.Transports.LOCAL, transport.Transports.TCP]):
+            used_transport, average_time, best_time = measure(server._port, transports, args.calls)
+            print('{:>6} | average: {:8.2f} us | best: {:8.2f} us'.format(
+                used_transport, average_time * 1e6, best_time * 1e6))
+
+    benchmark_thread = threading.Thread(target=run)
+    benchmark_thread.start()
+
+    # Server must process requests in main thread, so we wait for the benchmark processing Qt events
+    timer = QTimer()
+    timer.timeout.connect(lambda: benchmark_thread.is_alive() or app.quit())
+    timer.start(50)
+    app.exec_()
+    server.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains pytest fixtures shared by tpDcc tests
+"""
+
+import os
+import sys
+import time
+import types
+import socket
+import logging
+import itertools
+import threading
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+logging.getLogger('Qt.py').setLevel(logging.ERROR)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Platforms(object):
+    Windows = 'Windows'
+    Linux = 'Linux'
+    Mac = 'Mac'
+
+
+def _get_platform():
+    if sys.platform.startswith('win'):
+        return _Platforms.Windows
+    elif sys.platform == 'darwin':
+        return _Platforms.Mac
+
+    return _Platforms.Linux
+
+
+# Minimal stand-ins of the tpDcc packages DCC client and server import. They are only used when tpDcc-config and
+# tpDcc-libs-python are not installed, so client and server can be tested in a plain checkout
+STAND_IN_MODULES = {
+    'tpDcc.config': dict(),
+    'tpDcc.loader': dict(),
+    'tpDcc.managers.configs': {'get_tool_config': lambda library_id, package_name=None: None},
+    'tpDcc.libs.python': dict(),
+    'tpDcc.libs.python.python': {'is_python2': lambda: sys.version_info[0] == 2},
+    'tpDcc.libs.python.decorators': {
+        'abstractmethod': lambda fn: fn, 'repeater': lambda interval: lambda fn: fn},
+    'tpDcc.libs.python.osplatform': {'Platforms': _Platforms, 'get_platform': _get_platform},
+    'tpDcc.libs.python.process': {'check_if_process_is_running': lambda process_name: False},
+    'tpDcc.libs.python.path': {'clean_path': os.path.normpath},
+    'tpDcc.libs.python.contexts': dict(),
+    'tpDcc.libs.python.folder': dict(),
+    'tpDcc.libs.resources': dict(),
+    'tpDcc.libs.qt': dict(),
+    'tpDcc.libs.qt.loader': dict(),
+}
+
+
+def _install_stand_in_modules():
+    try:
+        import tpDcc.config
+        import tpDcc.libs.python     # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    for module_name, attributes in sorted(STAND_IN_MODULES.items()):
+        module = types.ModuleType(module_name)
+        module.__file__ = os.path.join(TESTS_DIR, *module_name.split('.') + ['__init__.py'])
+        module.__dict__.update(attributes)
+        sys.modules[module_name] = module
+        parent_name, _, child_name = module_name.rpartition('.')
+        if parent_name not in sys.modules:
+            __import__(parent_name)
+        setattr(sys.modules[parent_name], child_name, module)
+
+
+_install_stand_in_modules()
+
+from Qt.QtCore import QCoreApplication, QThread     # noqa: E402
+
+from tpDcc.core import dcc as core_dcc, server as core_server, client as core_client     # noqa: E402
+from tpDcc.managers import callbacks     # noqa: E402
+
+
+class DccTestNotifier(object):
+    """
+    DCC notifier whose callbacks are triggered manually by tests
+    """
+
+    def __init__(self):
+        super(DccTestNotifier, self).__init__()
+
+        self._listeners = dict()
+        self._tokens = itertools.count(1)
+
+    def register(self, fn):
+        token = next(self._tokens)
+        self._listeners[token] = fn
+        return token
+
+    def unregister(self, token):
+        self._listeners.pop(token, None)
+
+    def filter(self, *args):
+        return (True,) + args
+
+    def trigger(self, *args):
+        for fn in list(self._listeners.values()):
+            fn(*args)
+
+
+class DccTestServer(core_server.DccServer, object):
+    """
+    DCC server with commands used by tests
+    """
+
+    NOTIFIERS = None
+
+    def __init__(self, *args, **kwargs):
+        self.executed = list()
+        super(DccTestServer, self).__init__(*args, **kwargs)
+
+    def echo(self, data, reply):
+        self.executed.append(data.get('text'))
+        reply['result'] = data.get('text')
+        reply['success'] = True
+
+    def slow(self, data, reply):
+        time.sleep(data.get('t', 0.5))
+        self.executed.append('slow')
+        reply['result'] = True
+        reply['success'] = True
+
+    def nodes(self, data, reply):
+        self.executed.append('nodes')
+        reply['result'] = ['|root|node_{}'.format(i) for i in range(data.get('n', 10))]
+        reply['success'] = True
+
+    def get_fonts(self, data, reply):
+        self.executed.append('get_fonts')
+        reply['result'] = ['Arial', len(self.executed)]
+        reply['success'] = True
+
+    def trigger_callback(self, data, reply):
+        notifier = getattr(self.NOTIFIERS, '{}Callback'.format(data.get('callback')))
+        notifier.trigger(*data.get('args', list()))
+        reply['success'] = True
+
+    def create_handles(self, data, reply):
+        reply['result'] = [self._create_handle(node) for node in data.get('nodes', list())]
+        reply['success'] = True
+
+    def resolve_nodes(self, data, reply):
+        reply['result'] = data.get('nodes', list())
+        reply['success'] = True
+
+    def fail(self, data, reply):
+        raise ValueError('Command failed')
+
+    def long_command(self, data, reply):
+        token = self._get_cancellation_token()
+        for i in range(data.get('n', 500)):
+            token.check()
+            time.sleep(0.01)
+        reply['result'] = True
+        reply['success'] = True
+
+    @core_server.thread_safe
+    def thread_name(self, data, reply):
+        time.sleep(data.get('t', 0.5))
+        reply['result'] = threading.current_thread().name
+        reply['success'] = True
+
+
+class DccTestClient(core_client.DccClient, object):
+    """
+    DCC client used by tests. Heartbeat and reconnection timers are not used, because tests do not run an event loop
+    in the thread of the client
+    """
+
+    HEARTBEAT_INTERVAL = 0
+    RECONNECT = False
+    SHARE_CONNECTION = False
+
+
+class SharedDccTestClient(DccTestClient, object):
+    """
+    DCC test client that shares its connection with the rest of tool clients of the same thread
+    """
+
+    SHARE_CONNECTION = True
+
+
+class DccServerThread(QThread, object):
+    """
+    Thread that runs a DCC server in its own event loop, so clients can send blocking requests from test thread
+    """
+
+    def __init__(self, server_class):
+        super(DccServerThread, self).__init__()
+
+        self._server_class = server_class
+        self._ready = threading.Event()
+        self.server = None
+
+    def run(self):
+        self.server = self._server_class()
+        self._ready.set()
+        self.exec_()
+        self.server.close_connection()
+        for connection in self.server.connections:
+            connection.socket.close()
+        self.server = None
+
+    def wait_ready(self, timeout=5):
+        return self._ready.wait(timeout)
+
+
+def get_free_port():
+    free_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        free_socket.bind(('localhost', 0))
+        return free_socket.getsockname()[1]
+    finally:
+        free_socket.close()
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    return QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+@pytest.fixture
+def dcc_notifiers():
+    notifiers = types.ModuleType('dcc_test_notifiers')
+    for callback_name in core_dcc.callbacks():
+        setattr(notifiers, '{}Callback'.format(callback_name), DccTestNotifier())
+    callbacks.CallbacksManager.cleanup()
+    callbacks.CallbacksManager.initialize(notifiers)
+    yield notifiers
+    callbacks.CallbacksManager.cleanup()
+
+
+@pytest.fixture
+def start_dcc_server(qapp):
+    server_threads = list()
+
+    def _start(server_class, **attributes):
+        attributes.setdefault('PORT', get_free_port())
+        server_thread = DccServerThread(type(server_class.__name__, (server_class,), attributes))
+        server_thread.start()
+        assert server_thread.wait_ready()
+        server_threads.append(server_thread)
+        return server_thread.server
+
+    yield _start
+    for server_thread in reversed(server_threads):
+        server_thread.quit()
+        server_thread.wait()
+
+
+@pytest.fixture
+def dcc_server(start_dcc_server, dcc_notifiers):
+    return start_dcc_server(DccTestServer, NOTIFIERS=dcc_notifiers)
+
+
+@pytest.fixture
+def connect_dcc_client(request):
+    dcc_clients = list()
+
+    def _connect(client_class=DccTestClient, port=None, **kwargs):
+        new_client = client_class(timeout=kwargs.pop('timeout', 5), **kwargs)
+        assert new_client.connect(port=port or request.getfixturevalue('dcc_server')._port)
+        dcc_clients.append(new_client)
+        return new_client
+
+    yield _connect
+    for dcc_client in reversed(dcc_clients):
+        dcc_client.disconnect()
+
+
+@pytest.fixture
+def dcc_client(connect_dcc_client):
+    return connect_dcc_client()
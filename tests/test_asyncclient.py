@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC asynchronous client
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from tpDcc.core import protocol, asyncclient
+
+
+def _run(dcc_server, coroutine_fn):
+
+    async def _run_client():
+        async_client = asyncclient.AsyncDccClient(timeout=5)
+        assert await async_client.connect(port=dcc_server._port)
+        try:
+            return await coroutine_fn(async_client)
+        finally:
+            await async_client.disconnect()
+
+    return asyncio.run(_run_client())
+
+
+def test_concurrent_commands(dcc_server):
+
+    async def _gather(async_client):
+        return await asyncio.gather(
+            async_client.thread_name(t=0.3), async_client.thread_name(t=0.3), async_client.echo(text='hello'),
+            async_client.create_handles(nodes=['pCube1']))
+
+    start_time = time.time()
+    thread_name_a, thread_name_b, text, handles = _run(dcc_server, _gather)
+    assert time.time() - start_time < 0.55
+    assert thread_name_a != thread_name_b
+    assert text == 'hello'
+    assert isinstance(handles[0], protocol.Handle)
+
+
+def test_chunked_reply(dcc_server):
+
+    async def _gather(async_client):
+        cursor_reply, ping = await asyncio.gather(
+            async_client.send({'cmd': 'open_cursor', 'command': 'nodes', 'n': 30000, 'page_size': 30000}),
+            async_client.ping())
+        return cursor_reply, ping
+
+    cursor_reply, ping = _run(dcc_server, _gather)
+    assert ping
+    assert cursor_reply['success']
+    assert len(cursor_reply['result']) == 30000
+    assert cursor_reply['result'][-1] == '|root|node_29999'
+
+
+def test_invalid_reply():
+
+    async def _serve(reader, writer):
+        header = await reader.readexactly(protocol.LEGACY_HEADER_SIZE)
+        await reader.readexactly(protocol.unpack_legacy_header(header))
+        _, reply_data = protocol.encode_payload({'success': True, 'codecs': [protocol.Codecs.JSON]})
+        writer.write(protocol.pack_legacy_header(len(reply_data)) + reply_data)
+        await reader.readexactly(protocol.HEADER_SIZE)
+        writer.write(b'invalid frame header')
+
+    async def _run_client():
+        server = await asyncio.start_server(_serve, 'localhost', 0)
+        async_client = asyncclient.AsyncDccClient(timeout=5)
+        try:
+            assert await async_client.connect(port=server.sockets[0].getsockname()[1])
+            with pytest.raises(ConnectionError):
+                await async_client.send({'cmd': 'ping'})
+            assert not async_client.connected
+        finally:
+            await async_client.disconnect()
+            server.close()
+
+    asyncio.run(_run_client())
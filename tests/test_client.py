@@ -0,0 +1,279 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client
+"""
+
+import time
+import types
+import threading
+
+import pytest
+
+from tpDcc import dcc
+from tpDcc.core import dcc as core_dcc, protocol, recorder, exceptions, client
+
+from .conftest import SharedDccTestClient
+
+
+def test_result_cache():
+    cache = client.DccResultCache(ttl=300, max_size=2)
+    cache.set(('get_fonts', '1'), {'result': 1})
+    cache.set(('get_fonts', '2'), {'result': 2})
+    assert cache.get(('get_fonts', '1')) == {'result': 1}
+
+    # Least recently used reply is removed when cache is full
+    cache.set(('list_node_types', '3'), {'result': 3})
+    assert len(cache) == 2
+    assert cache.get(('get_fonts', '2')) is None
+    assert cache.get(('get_fonts', '1')) == {'result': 1}
+
+    cache.invalidate(['get_fonts'])
+    assert cache.get(('get_fonts', '1')) is None
+    assert cache.get(('list_node_types', '3')) == {'result': 3}
+    cache.invalidate()
+    assert not len(cache)
+
+    # Expired replies are not returned
+    cache.set(('get_fonts', '4'), {'result': 4}, ttl=-1)
+    assert cache.get(('get_fonts', '4')) is None
+
+
+def test_cache_keys_and_invalidation_events():
+    dcc_client = client.DccClient()
+    assert dcc_client._get_cache_key({'cmd': 'get_fonts'}) is None
+
+    dcc_client.enable_cache()
+    dcc_client._binary_protocol = True
+    assert dcc_client._get_cache_key({'cmd': 'get_fonts', 'a': 1, 'b': 2}) == dcc_client._get_cache_key(
+        {'b': 2, 'a': 1, 'cmd': 'get_fonts'})
+    assert dcc_client._get_cache_key({'cmd': 'get_fonts', 'a': 1}) != dcc_client._get_cache_key(
+        {'cmd': 'get_fonts', 'a': 2})
+    assert dcc_client._get_cache_key({'cmd': 'create_node'}) is None
+
+    dcc_client.cache.set(dcc_client._get_cache_key({'cmd': 'get_fonts'}), {'result': ['Arial']})
+    dcc_client._handle_event({'event': protocol.Events.INVALIDATE_CACHE, 'commands': ['get_renderers']})
+    assert len(dcc_client.cache) == 1
+    dcc_client._handle_event({'event': protocol.Events.INVALIDATE_CACHE, 'commands': None})
+    assert not len(dcc_client.cache)
+
+
+def test_broadcast():
+
+    class TestClient(object):
+        def __init__(self, name, shared_connection=None):
+            self.name = name
+            self.shared_connection = shared_connection
+
+        def get_name(self, suffix=''):
+            if self.name == 'houdini':
+                raise RuntimeError('Command failed')
+            return self.name + suffix
+
+    connection = object()
+    maya_client = TestClient('maya', connection)
+    maya_tool_client = TestClient('maya_tool', connection)
+    max_client = TestClient('max')
+    houdini_client = TestClient('houdini')
+
+    # Clients sharing a connection belong to the same session, so command is executed once per session
+    clients = [maya_client, maya_tool_client, max_client, houdini_client, None]
+    results = client.broadcast(clients, 'get_name', suffix='!')
+    assert list(results.items()) == [(maya_client, 'maya!'), (max_client, 'max!'), (houdini_client, False)]
+
+
+def test_running_dccs(monkeypatch):
+    dcc_client = client.DccClient()
+    monkeypatch.setattr(client.osplatform, 'get_platform', lambda: client.osplatform.Platforms.Windows)
+
+    # Executables are matched without extension, ignoring case and by substring
+    process_names = ['Maya.EXE', 'python.exe', '3dsmax_2022.exe', None]
+    running_processes = [types.SimpleNamespace(info={'name': process_name}) for process_name in process_names]
+    monkeypatch.setattr(client, 'psutil', types.SimpleNamespace(process_iter=lambda attrs: running_processes))
+    assert dcc_client._get_running_dccs() == [core_dcc.Dccs.Maya, core_dcc.Dccs.Max]
+    assert dcc_client._get_running_dccs({core_dcc.Dccs.Max: dict()}) == [core_dcc.Dccs.Max]
+
+    # Without psutil, each DCC executable is checked by its name stem
+    monkeypatch.setattr(client, 'psutil', None)
+    monkeypatch.setattr(
+        client.process, 'check_if_process_is_running', lambda process_name: process_name == 'unreal')
+    assert dcc_client._get_running_dccs() == [core_dcc.Dccs.Unreal]
+
+
+def test_scene_change_invalidates_cache(dcc_client, dcc_server):
+    dcc_client.enable_cache()
+    fonts = dcc_client.get_fonts()
+    assert dcc_client.get_fonts() == fonts
+    assert dcc_server.executed == ['get_fonts']
+
+    # Server registers scene callbacks, so clients are notified when a new scene is opened
+    dcc_client.trigger_callback(callback='SceneOpenFinished')
+    assert not len(dcc_client.cache)
+    assert dcc_client.get_fonts() != fonts
+    assert dcc_server.executed == ['get_fonts', 'get_fonts']
+
+
+def test_dcc_broadcast(dcc_client, connect_dcc_client):
+    tool_client = connect_dcc_client()
+    client.DccClient._register_client('tool-a', dcc_client)
+    client.DccClient._register_client('tool-b', tool_client)
+    try:
+        assert dcc.clients() == [dcc_client, tool_client]
+
+        # Command is sent to all sessions before waiting for their replies
+        start_time = time.time()
+        results = dcc.broadcast('thread_name', t=0.4)
+        assert time.time() - start_time < 0.75
+        assert list(results.keys()) == [dcc_client, tool_client]
+        assert all(results.values())
+    finally:
+        dcc._CLIENTS.pop('tool-a', None)
+        dcc._CLIENTS.pop('tool-b', None)
+
+
+def test_heartbeat(dcc_server, connect_dcc_client, monkeypatch):
+    idle_client = connect_dcc_client()
+    busy_client = connect_dcc_client()
+    for dcc_client in (idle_client, busy_client):
+        monkeypatch.setattr(dcc_client, 'HEARTBEAT_TIMEOUT', 0.2)
+        monkeypatch.setattr(dcc_client, 'HEARTBEAT_BUSY_TIMEOUT', 0.6)
+        dcc_client._on_heartbeat()
+    time.sleep(0.3)
+    idle_client._on_heartbeat()
+    assert idle_client.connected
+
+    # Server stops replying. Busy client abandoned a request whose reply never arrives, so it waits longer
+    monkeypatch.setattr(dcc_server, '_write', lambda *args, **kwargs: None)
+    busy_client._abandon_request(busy_client.send_request({'cmd': 'echo', 'text': 'lost'}))
+    idle_client._on_heartbeat()
+    busy_client._on_heartbeat()
+    time.sleep(0.3)
+    idle_client._on_heartbeat()
+    busy_client._on_heartbeat()
+    assert not idle_client.connected
+    assert busy_client.connected
+    time.sleep(0.4)
+    busy_client._on_heartbeat()
+    assert not busy_client.connected
+
+
+def test_shared_connection(dcc_server, connect_dcc_client):
+    received = list()
+    client_a = connect_dcc_client(client_class=SharedDccTestClient, tool_id='tool-a')
+    client_b = connect_dcc_client(client_class=SharedDccTestClient, tool_id='tool-b')
+    connection = client_a.shared_connection
+    assert type(connection) is SharedDccTestClient
+    assert client_b.shared_connection is connection
+
+    # Each tool has its own subscriptions
+    client_a.signals.dccEvent.connect(lambda event_name, event_args: received.append(event_args))
+    try:
+        assert client_a.subscribe('NodeAdded')
+        assert client_b.subscribe('NodeAdded')
+        assert client_a.unsubscribe()
+        client_a.trigger_callback(callback='NodeAdded', args=['pCube1'])
+        assert received == [['pCube1']]
+        assert client_b.unsubscribe()
+        client_a.trigger_callback(callback='NodeAdded', args=['pCube2'])
+        assert received == [['pCube1']]
+    finally:
+        client_a.signals.dccEvent.disconnect()
+
+    # Each tool has its own handles, so releasing the handles of a tool does not invalidate the handles of others
+    handle_a, sphere_handle = client_a.send({'cmd': 'create_handles', 'nodes': ['pCube1', 'pSphere1']})['result']
+    handle_b = client_b.send({'cmd': 'create_handles', 'nodes': ['pCube1']})['result'][0]
+    assert isinstance(handle_a, protocol.Handle) and handle_a != handle_b
+    assert client_a.release_handles(handle_a)
+    assert client_a.send({'cmd': 'resolve_nodes', 'nodes': [sphere_handle]})['result'] == ['pSphere1']
+    assert not client_a.send({'cmd': 'resolve_nodes', 'nodes': [handle_a]})['success']
+    assert not client_a.send({'cmd': 'resolve_nodes', 'nodes': [handle_b]})['success']
+    assert client_b.send({'cmd': 'resolve_nodes', 'nodes': [handle_b]})['result'] == ['pCube1']
+
+    # Server state of a tool is removed when it stops using the connection
+    assert client_b.subscribe('NodeAdded')
+    server_connection = [server_connection for server_connection in dcc_server.connections if
+                         server_connection.subscriptions][0]
+    scope_id = client_b._scope_id
+    assert scope_id in [scope.id for scope in server_connection.scopes]
+    client_b.disconnect()
+    assert client_a.ping()
+    assert scope_id not in [scope.id for scope in server_connection.scopes]
+    assert not server_connection.subscriptions
+
+
+def test_shared_connection_threads(dcc_server, connect_dcc_client):
+    connections = list()
+
+    def _connect():
+        dcc_client = connect_dcc_client(client_class=SharedDccTestClient, tool_id='tool-a')
+        connections.append(dcc_client.shared_connection)
+
+    # Connections of finished threads are never shared with new threads, even if they get the same thread ID
+    for _ in range(2):
+        connect_thread = threading.Thread(target=_connect)
+        connect_thread.start()
+        connect_thread.join()
+    assert len(connections) == 2
+    assert connections[0] is not connections[1]
+
+
+def test_pipelining(dcc_client, dcc_server):
+    request_ids = [dcc_client.send_request({'cmd': 'echo', 'text': str(i)}) for i in range(5)]
+    assert len(set(request_ids)) == 5
+
+    # Replies received while waiting for another one are kept, so they can be retrieved in any order
+    assert [dcc_client.recv(request_id)['result'] for request_id in reversed(request_ids)] == ['4', '3', '2', '1', '0']
+    assert dcc_server.executed == ['0', '1', '2', '3', '4']
+
+    replies = dcc_client.send_many([{'cmd': 'echo', 'text': 'a'}, {'cmd': 'fail'}, {'cmd': 'echo', 'text': 'b'}])
+    assert [reply['success'] for reply in replies] == [True, False, True]
+    assert replies[2]['result'] == 'b'
+
+
+def test_batch(dcc_client, dcc_server, tmpdir):
+    file_path = str(tmpdir.join('batch.tprec'))
+    dcc_client.start_recording(file_path)
+    with dcc_client.batch() as batch:
+        text = dcc_client.echo(text='hello')
+        failed = dcc_client.fail()
+        nodes = dcc_client.nodes(n=2)
+    dcc_client.stop_recording()
+
+    # Commands are executed in a single request and an error in one of them does not stop the others
+    assert len(batch) == 3
+    assert [request.cmd for request in recorder.read_recording(file_path)] == ['batch']
+    assert text.result == 'hello'
+    assert not failed.success and 'Command failed' in failed.reply['msg']
+    assert nodes.result == ['|root|node_0', '|root|node_1']
+    assert dcc_server.executed == ['hello', 'nodes']
+
+
+def test_iter(dcc_client, dcc_server):
+    pages = list(dcc_client.iter('nodes', n=25, page_size=10))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, list()) == ['|root|node_{}'.format(i) for i in range(25)]
+    assert [len(page) for page in dcc_client.iter('nodes', n=20, page_size=10)] == [10, 10]
+
+    # Cursor is closed in the server when iteration is stopped before all pages are received
+    pages = dcc_client.iter('nodes', n=25, page_size=10)
+    assert len(next(pages)) == 10
+    assert any(scope.cursors for connection in dcc_server.connections for scope in connection.scopes)
+    pages.close()
+    assert dcc_client.ping()
+    assert not any(scope.cursors for connection in dcc_server.connections for scope in connection.scopes)
+
+    assert list(dcc_client.iter('fail')) == list()
+
+
+def test_recv_deadline(dcc_client):
+    request_id = dcc_client.send_request({'cmd': 'slow', 't': 0.5})
+    start_time = time.time()
+    with pytest.raises(exceptions.RequestTimeoutError) as exc_info:
+        dcc_client.recv(request_id, timeout=0.1)
+    assert 0.1 <= time.time() - start_time < 0.3
+    assert exc_info.value.request_id == request_id
+
+    # Late reply of the abandoned request is discarded, so next replies are still received in sync
+    assert dcc_client.echo(text='hello') == 'hello'
+    assert dcc_client.echo(text='world') == 'world'
@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client/server protocol
+"""
+
+import array
+
+import pytest
+
+from tpDcc.core import protocol, exceptions
+
+
+def test_header_roundtrip():
+    header = protocol.pack_header(protocol.Codecs.JSON, 1024, request_id=7)
+    assert len(header) == protocol.HEADER_SIZE
+    assert protocol.is_binary_header(header)
+    assert protocol.unpack_header(header) == (protocol.Codecs.JSON, 0, 7, 1024)
+
+
+def test_legacy_header_roundtrip():
+    header = protocol.pack_legacy_header(1024)
+    assert len(header) == protocol.LEGACY_HEADER_SIZE
+    assert not protocol.is_binary_header(header)
+    assert protocol.unpack_legacy_header(header) == 1024
+    with pytest.raises(exceptions.ProtocolError):
+        protocol.unpack_legacy_header(b'not_header')
+
+
+def test_typed_array_codec():
+    data = {'success': True, 'result': [float(i) for i in range(1000)], 'names': ['a', 'b']}
+    codec_id, payload = protocol.encode_payload(data, protocol.available_codecs())
+    assert codec_id == protocol.Codecs.TYPED_ARRAY
+    assert protocol.decode_payload(payload, codec_id) == data
+
+
+def test_fallback_to_json():
+    data = {'success': True, 'result': ['node1', 'node2']}
+    codec_id, payload = protocol.encode_payload(data, [protocol.Codecs.TYPED_ARRAY, protocol.Codecs.JSON])
+    assert codec_id == protocol.Codecs.JSON
+    assert protocol.decode_payload(payload, codec_id) == data
+    assert protocol.Codecs.JSON in protocol.negotiate_codecs(list())
+
+
+def test_has_arrays():
+    assert not protocol.has_arrays({'result': ['|root|grp|mesh_{}'.format(i) for i in range(1000)]})
+    assert not protocol.has_arrays({'result': [1.0, 2.0, 3.0]})
+    assert protocol.has_arrays({'result': [{'name': 'mesh', 'points': [[0.0, 1.0, 2.0]] * 100}]})
+    assert protocol.has_arrays([array.array('f', [0.5])])
+
+
+def test_compression():
+    data = {'success': True, 'result': ['|root|grp|mesh_{}'.format(i) for i in range(10000)]}
+    codec_id, payload = protocol.encode_payload(data)
+    compressed_payload, flags = protocol.compress_payload(payload)
+    assert flags == protocol.Flags.COMPRESSED
+    assert len(compressed_payload) < len(payload)
+    assert protocol.decode_payload(compressed_payload, codec_id, flags=flags) == data
+    assert protocol.compress_payload(b'{}') == (b'{}', 0)
+
+
+def test_typed_array_codec_shapes():
+    matrices = [[[float(i * 16 + j) for j in range(4)] for _ in range(4)] for i in range(8)]
+    weights = array.array('f', [0.5] * 100)
+    data = {'success': True, 'result': {'matrices': matrices, 'weights': weights, 'ragged': [[1.0, 2.0], [3.0]]}}
+    codec_id, payload = protocol.encode_payload(data, protocol.available_codecs())
+    assert codec_id == protocol.Codecs.TYPED_ARRAY
+    decoded_data = protocol.decode_payload(payload, codec_id)
+    assert decoded_data['result']['matrices'] == matrices
+    assert decoded_data['result']['weights'] == weights
+    assert decoded_data['result']['ragged'] == [[1.0, 2.0], [3.0]]
+
+
+def test_handles():
+    data = {'success': True, 'result': [protocol.Handle(1), protocol.Handle(2)]}
+    codec_id, payload = protocol.encode_payload(data)
+    reply = protocol.import_handles(protocol.decode_payload(payload, codec_id))
+    assert reply['result'] == data['result']
+    assert isinstance(reply['result'][0], protocol.Handle)
+    assert len(set(reply['result'])) == 2
+
+
+def test_priority_flags():
+    flags = protocol.Flags.COMPRESSED | protocol.priority_flags(protocol.Priorities.BULK)
+    header = protocol.pack_header(protocol.Codecs.JSON, 16, request_id=3, flags=flags)
+    _, header_flags, _, _ = protocol.unpack_header(header)
+    assert protocol.get_priority(header_flags) == protocol.Priorities.BULK
+    assert header_flags & protocol.Flags.COMPRESSED
+    assert protocol.get_priority(protocol.Flags.CANCEL | protocol.Flags.CHUNK) == protocol.Priorities.NORMAL
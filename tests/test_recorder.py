@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client requests recorder
+"""
+
+import pytest
+
+from tpDcc.core import protocol, recorder, exceptions
+
+
+def test_recording_roundtrip(tmpdir):
+    file_path = str(tmpdir.join('session.tprec'))
+    codec_id, payload = protocol.encode_payload({'cmd': 'echo', 'text': 'hello'})
+    dcc_recorder = recorder.DccRecorder(file_path)
+    dcc_recorder.start_request(1, 'echo', codec_id, payload)
+    dcc_recorder.start_request(2, 'slow', codec_id, payload)
+    dcc_recorder.finish_request(1, success=True)
+    dcc_recorder.close()
+    assert dcc_recorder.closed
+    assert len(dcc_recorder) == 2
+
+    requests = recorder.read_recording(file_path)
+    assert [request.cmd for request in requests] == ['echo', 'slow']
+    assert requests[0].latency >= 0 and requests[0].success
+    assert requests[1].latency < 0 and not requests[1].success
+    assert protocol.decode_payload(requests[0].payload, requests[0].codec_id)['text'] == 'hello'
+
+
+def test_invalid_recording(tmpdir):
+    file_path = str(tmpdir.join('invalid.tprec'))
+    with open(file_path, 'wb') as invalid_file:
+        invalid_file.write(b'invalid recording')
+
+    with pytest.raises(exceptions.ProtocolError):
+        recorder.read_recording(file_path)
@@ -0,0 +1,29 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client requests replay
+"""
+
+from tpDcc.core import recorder, replay
+
+
+def test_replay_standalone_handshake(tmpdir, start_dcc_server, connect_dcc_client):
+    server = start_dcc_server(replay.StandInServer)
+    file_path = str(tmpdir.join('session.tprec'))
+
+    # Standalone tools initialize the DCC session of the server before sending commands
+    dcc_client = connect_dcc_client(port=server._port)
+    dcc_client.start_recording(file_path)
+    assert dcc_client.update_paths()[0]
+    assert dcc_client.send({'cmd': 'update_dcc_paths', 'paths': {'tpDcc.dccs.maya': 'dccs'}})['success']
+    assert dcc_client.init_dcc()
+    assert dcc_client.send({'cmd': 'get_selection'})['success']
+    dcc_client.stop_recording()
+
+    requests = recorder.read_recording(file_path)
+    assert [request.cmd for request in requests] == ['update_paths', 'update_dcc_paths', 'init_dcc', 'get_selection']
+
+    results = replay.replay(requests, server._port, speed=0, clients=2, timeout=2)
+    assert results == [('get_selection', results[0][1], True), ('get_selection', results[1][1], True)]
+    assert all(latency >= 0 for _, latency, _ in results)
@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC server
+"""
+
+import time
+import threading
+
+
+def test_dcc_events(dcc_client, dcc_notifiers):
+    received = list()
+    dcc_client.signals.dccEvent.connect(lambda event_name, event_args: received.append((event_name, event_args)))
+    try:
+        assert not dcc_client.subscribe('InvalidEvent')
+        assert dcc_client.subscribe('NodeAdded', 'SceneSaveFinished')
+
+        # Events are pushed before the reply of the command that triggers them
+        dcc_client.trigger_callback(callback='NodeAdded', args=['pCube1'])
+        dcc_client.trigger_callback(callback='NodeDeleted', args=['pCube2'])
+        assert received == [('NodeAdded', ['pCube1'])]
+
+        assert dcc_client.unsubscribe()
+        dcc_client.trigger_callback(callback='NodeAdded', args=['pCube3'])
+        assert received == [('NodeAdded', ['pCube1'])]
+    finally:
+        dcc_client.signals.dccEvent.disconnect()
+
+
+def test_dcc_events_registration_error(dcc_client, dcc_notifiers, monkeypatch):
+
+    def _register(fn):
+        raise RuntimeError('DCC API error')
+
+    monkeypatch.setattr(dcc_notifiers.NodeDeletedCallback, 'register', _register)
+
+    # Client is not subscribed to any event if the callback of one of them cannot be registered
+    reply = dcc_client.send({'cmd': 'subscribe_events', 'events': ['NodeAdded', 'NodeDeleted']})
+    assert not reply['success']
+    assert 'NodeDeleted (DCC API error)' in reply['msg']
+    reply = dcc_client.send({'cmd': 'unsubscribe_events', 'events': []})
+    assert reply['result'] == []
+
+
+def test_multiple_clients(dcc_server, connect_dcc_client):
+    client_a = connect_dcc_client()
+    client_b = connect_dcc_client()
+
+    # Each connection has its own parser state, so requests of different clients can be interleaved
+    request_a = client_a.send_request({'cmd': 'echo', 'text': 'a'})
+    request_b = client_b.send_request({'cmd': 'echo', 'text': 'b'})
+    assert client_b.recv(request_b)['result'] == 'b'
+    assert client_a.recv(request_a)['result'] == 'a'
+
+    # Each connection has its own handles
+    handles_a = client_a.send({'cmd': 'create_handles', 'nodes': ['pCube1', 'pCube2']})['result']
+    handles_b = client_b.send({'cmd': 'create_handles', 'nodes': ['pSphere1']})['result']
+    assert client_a.send({'cmd': 'resolve_nodes', 'nodes': handles_a})['result'] == ['pCube1', 'pCube2']
+    assert client_b.send({'cmd': 'resolve_nodes', 'nodes': handles_b})['result'] == ['pSphere1']
+    assert not client_b.send({'cmd': 'resolve_nodes', 'nodes': handles_a})['success']
+
+    # Invalid data sent by a client does not affect the rest of clients
+    client_a._send_all(b'invalid frame header')
+    assert client_b.echo(text='b') == 'b'
+    client_a.disconnect()
+    assert client_b.echo(text='c') == 'c'
+
+
+def test_thread_safe_commands(dcc_client):
+    start_time = time.time()
+    request_ids = [dcc_client.send_request({'cmd': 'thread_name', 't': 0.3}) for _ in range(3)]
+
+    # Thread safe commands run in the worker pool, so the server keeps replying other commands meanwhile
+    assert dcc_client.echo(text='hello') == 'hello'
+    assert time.time() - start_time < 0.25
+    thread_names = [dcc_client.recv(request_id)['result'] for request_id in request_ids]
+    assert time.time() - start_time < 0.75
+    assert len(set(thread_names)) == 3
+    assert threading.current_thread().name not in thread_names
+
+
+def test_cancel_command(dcc_client, dcc_server):
+    start_time = time.time()
+    request_id = dcc_client.send_request({'cmd': 'long_command', 'n': 500})
+    time.sleep(0.1)
+    assert dcc_client.cancel(request_id)
+    reply = dcc_client.recv(request_id)
+    assert reply['cancelled'] and not reply['success']
+    assert time.time() - start_time < 1.0
+
+    # Requests cancelled before they start are never executed
+    slow_request_id = dcc_client.send_request({'cmd': 'slow', 't': 0.2})
+    request_id = dcc_client.send_request({'cmd': 'echo', 'text': 'cancelled'})
+    assert dcc_client.cancel(request_id)
+    assert dcc_client.recv(slow_request_id)['success']
+    assert dcc_client.recv(request_id)['cancelled']
+    assert 'cancelled' not in dcc_server.executed
+
+
+def test_cancel_command_with_buffered_requests(dcc_client):
+    request_id = dcc_client.send_request({'cmd': 'long_command', 'n': 500})
+    time.sleep(0.1)
+
+    # Server reads this request while it polls for cancel requests, so it must be processed once command is cancelled
+    echo_request_id = dcc_client.send_request({'cmd': 'echo', 'text': 'hello'})
+    time.sleep(0.1)
+    assert dcc_client.cancel(request_id)
+    assert dcc_client.recv(request_id)['cancelled']
+    assert dcc_client.recv(echo_request_id, timeout=2)['result'] == 'hello'
+
+
+def test_bulk_requests(dcc_client, dcc_server):
+    slow_request_id = dcc_client.send_request({'cmd': 'slow', 't': 0.2})
+    bulk_request_id = dcc_client.send_request(
+        {'cmd': 'open_cursor', 'command': 'nodes', 'n': 30000, 'page_size': 30000})
+    request_id = dcc_client.send_request({'cmd': 'echo', 'text': 'hello'})
+
+    # Bulk requests are executed after queued ones and their replies are sent in chunks
+    assert dcc_client.recv(request_id)['result'] == 'hello'
+    reply = dcc_client.recv(bulk_request_id)
+    assert dcc_client.recv(slow_request_id)['success']
+    assert dcc_server.executed == ['slow', 'hello', 'nodes']
+    assert len(reply['result']) == 30000
+    assert reply['result'][-1] == '|root|node_29999'
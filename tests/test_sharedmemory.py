@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client/server shared memory side channel
+"""
+
+import os
+
+import pytest
+
+from tpDcc.core import protocol, sharedmemory
+
+
+def test_shared_array_roundtrip():
+    positions = [[float(i), 0.0, 1.0] for i in range(1000)]
+    data = {'success': True, 'result': [float(i) for i in range(1000)], 'positions': positions, 'names': ['a', 'b']}
+    exporter = sharedmemory.SegmentExporter(threshold=1024)
+    codec_id, payload = protocol.encode_payload(data, protocol.available_codecs(), array_exporter=exporter)
+    assert codec_id == protocol.Codecs.TYPED_ARRAY
+    assert len(exporter.segment_names) == 2
+
+    released_segments = list()
+    imported_data = sharedmemory.import_arrays(
+        protocol.decode_payload(payload, codec_id), release_callback=released_segments.append)
+    assert imported_data['names'] == ['a', 'b']
+    assert imported_data['positions'].shape == [1000, 3]
+    assert imported_data['positions'].tolist() == positions
+    with imported_data['result'] as shared_array:
+        assert len(shared_array) == 1000
+        assert shared_array.tolist() == data['result']
+    assert shared_array.released
+    assert released_segments == [shared_array.name]
+    assert not os.path.exists(shared_array.name)
+
+    # Segments of arrays that are not released are removed when arrays are garbage collected
+    segment_name = imported_data['positions'].name
+    del imported_data
+    assert not os.path.exists(segment_name)
+
+
+def test_shared_numpy_array_roundtrip():
+    numpy = pytest.importorskip('numpy')
+
+    positions = numpy.arange(3000, dtype=numpy.float64).reshape(1000, 3)
+    indices = numpy.arange(10, dtype=numpy.int32)
+    data = {'success': True, 'positions': positions, 'indices': indices}
+    exporter = sharedmemory.SegmentExporter(threshold=1024)
+    codec_id, payload = protocol.encode_payload(data, protocol.available_codecs(), array_exporter=exporter)
+    assert codec_id == protocol.Codecs.TYPED_ARRAY
+    assert len(exporter.segment_names) == 1
+
+    imported_data = sharedmemory.import_arrays(protocol.decode_payload(payload, codec_id))
+    with imported_data['positions'] as shared_array:
+        assert shared_array.shape == [1000, 3]
+        assert (shared_array.to_numpy() == positions).all()
+    assert imported_data['indices'].dtype == numpy.int32
+    assert (imported_data['indices'] == indices).all()
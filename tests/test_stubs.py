@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains tests for tpDcc DCC client stubs generator
+"""
+
+import types
+
+import pytest
+
+from tpDcc.core import stubs
+
+
+def test_stub_methods():
+    dcc_module = types.ModuleType('test_dcc')
+
+    def set_attribute_value(node, attribute_name, value=0.0, *args, **kwargs):
+        """
+        Sets the value of the given attribute
+        """
+
+    set_attribute_value.__module__ = dcc_module.__name__
+    dcc_module.set_attribute_value = set_attribute_value
+
+    class TestClient(stubs.load_stub(dcc_module)):
+        def _send_command(self, cmd, args, kwargs):
+            return cmd, args, kwargs
+
+    client = TestClient()
+    assert client.set_attribute_value('pCube1', 'tx', undoable=False) == (
+        'set_attribute_value', ['pCube1', 'tx', 0.0], {'undoable': False})
+    assert client.set_attribute_value.__doc__.strip() == 'Sets the value of the given attribute'
+    with pytest.raises(TypeError):
+        client.set_attribute_value('pCube1')
+
+
+def test_excluded_functions():
+    dcc_module = types.ModuleType('test_dcc')
+
+    def client(key=None):
+        pass
+
+    def get_name():
+        pass
+
+    for fn in (client, get_name):
+        fn.__module__ = dcc_module.__name__
+        setattr(dcc_module, fn.__name__, fn)
+
+    stub_class = stubs.load_stub(dcc_module, exclude=['client'])
+    assert hasattr(stub_class, 'get_name')
+    assert not hasattr(stub_class, 'client')
@@ -371,11 +371,11 @@ class SimpleCallback(AbstractCallback):
         :param owner: class
         """
 
-        entry = next((e for e in self._registry if e.owner == owner), None)
+        entries = [e for e in self._registry if e.owner == owner]
         LOGGER.debug(
-            'Started: ({}) {} Unregister - owner:"{}", entry:"{}"'.format(
-                str(self._notifier), self.__class__.__name__, str(owner), str(entry)))
-        if entry:
+            'Started: ({}) {} Unregister - owner:"{}", entries:"{}"'.format(
+                str(self._notifier), self.__class__.__name__, str(owner), str(entries)))
+        for entry in entries:
             self._disconnect(entry.token)
             self._registry.remove(entry)
         LOGGER.debug('Completed: ({}) {} Unregister'.format(str(self._notifier), self.__class__.__name__))
@@ -523,11 +523,11 @@ class FilterCallback(AbstractCallback, object):
         :param owner: class
         """
 
-        entry = next((e for e in self._registry if e.owner == owner), None)
+        entries = [e for e in self._registry if e.owner == owner]
         LOGGER.debug(
-            'Started: ({}) {} Unregister - owner:"{}", entry:"{}"'.format(
-                str(self._notifier), self.__class__.__name__, str(owner), str(entry)))
-        if entry:
+            'Started: ({}) {} Unregister - owner:"{}", entries:"{}"'.format(
+                str(self._notifier), self.__class__.__name__, str(owner), str(entries)))
+        for entry in entries:
             self._registry.remove(entry)
         # else:
         #     dcclib.logger.warning('({}) {} Unregister - fn:"{}" not in list - perhaps already removed?'.format(
@@ -0,0 +1,389 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains DCC core asynchronous client implementation
+NOTE: This module is only available in Python 3
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import asyncio
+import logging
+import functools
+from collections import OrderedDict, deque
+
+from tpDcc import dcc
+from tpDcc.core import dcc as core_dcc, protocol
+from tpDcc.core.client import BaseDccClient, get_command_priority
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+
+class AsyncDccClient(BaseDccClient):
+    """
+    DCC client built on top of asyncio streams. A single event loop can talk with multiple DCC sessions at once
+    Commands can be called through proxy attributes, the same way DccClient works:
+        client = AsyncDccClient()
+        await client.connect()
+        nodes = await client.selected_nodes()
+    """
+
+    CONNECT_TIMEOUT = 1.0
+    COMPRESSION = False     # Whether large frames should be compressed. Useful for remote desktop or VPN setups
+
+    def __init__(self, timeout=20, tool_id=None):
+        super(AsyncDccClient, self).__init__(timeout=timeout, tool_id=tool_id)
+
+        self._host = 'localhost'
+        self._port = None
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._connected = False
+        self._binary_protocol = False
+        self._codecs = [protocol.Codecs.JSON]
+        self._compression = False
+        self._last_request_id = 0
+        self._futures = dict()
+        self._legacy_requests = deque()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return functools.partial(self.call, name)
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def connected(self):
+        return self._connected
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    async def connect(self, port=-1):
+        """
+        Connects client to the server listening in given port. If no port is given, all DCC ports are checked
+        :param port: int
+        :return: bool
+        """
+
+        ports = [port] if port > 0 else [self.PORT] + [
+            core_dcc.dcc_port(self.PORT, dcc_name=dcc_name) for dcc_name in core_dcc.Dccs.ALL]
+        for port_to_check in ports:
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, port_to_check), self.CONNECT_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                continue
+            self._port = port_to_check
+            break
+        else:
+            self._status = {'msg': 'Client connection was refused.', 'level': self.Status.ERROR}
+            self._connected = False
+            return False
+
+        await self._negotiate_protocol()
+        self._read_task = asyncio.ensure_future(self._read_frames())
+        self._connected = True
+        self._status = {'msg': 'Client connected successfully!', 'level': self.Status.SUCCESS}
+
+        return True
+
+    async def disconnect(self):
+        """
+        Closes the connection with the server
+        :return: bool
+        """
+
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception as exc:
+                LOGGER.debug(exc)
+        self._reader = None
+        self._writer = None
+        self._connected = False
+        self._cancel_pending_requests(ConnectionError('Client disconnected'))
+
+        return True
+
+    async def update_client(self, **kwargs):
+        """
+        Executes the handshake with the DCC server and checks the DCC is supported
+        :return: bool
+        """
+
+        tool_id = kwargs.get('tool_id', None)
+        supported_dccs = self._get_supported_dccs(**kwargs)
+
+        if not self.connected:
+            self.set_status('Not connected to any DCC', self.Status.WARNING)
+            return False
+
+        if dcc.is_standalone():
+            success, dcc_exe = await self.update_paths()
+            if not success:
+                return False
+
+            success = await self.update_dcc_paths(dcc_exe)
+            if not success:
+                return False
+
+            success = await self.init_dcc()
+            if not success:
+                return False
+
+        dcc_name, dcc_version, dcc_pid = await self.get_dcc_info()
+        if not self._check_dcc_support(dcc_name, dcc_version, dcc_pid, supported_dccs):
+            return False
+
+        if tool_id:
+            AsyncDccClient._register_client(tool_id, self)
+
+        return True
+
+    async def send(self, cmd_dict):
+        """
+        Sends given command to the server and waits for its reply. Multiple commands can be awaited concurrently
+        :param cmd_dict: dict
+        :return: dict
+        """
+
+        if not self._connected:
+            return None
+
+        self._last_request_id = self._last_request_id % protocol.MAX_REQUEST_ID + 1
+        request_id = self._last_request_id
+        future = asyncio.get_event_loop().create_future()
+        self._futures[request_id] = future
+
+        if self._binary_protocol:
+            codec_id, cmd_data = protocol.encode_payload(cmd_dict, self._codecs)
+            flags = protocol.priority_flags(get_command_priority(cmd_dict.get('cmd', None)))
+            if self._compression:
+                cmd_data, compression_flags = protocol.compress_payload(cmd_data)
+                flags |= compression_flags
+            header = protocol.pack_header(codec_id, len(cmd_data), request_id=request_id, flags=flags)
+        else:
+            codec_id, cmd_data = protocol.encode_payload(cmd_dict)
+            header = protocol.pack_legacy_header(len(cmd_data))
+            self._legacy_requests.append(request_id)
+
+        try:
+            self._writer.write(header + cmd_data)
+            await self._writer.drain()
+            reply = await asyncio.wait_for(future, self._timeout)
+        except asyncio.TimeoutError:
+            self._cancel_request(request_id)
+            raise RuntimeError('Timeout waiting for response ({})'.format(cmd_dict.get('cmd', 'unknown')))
+        except asyncio.CancelledError:
+            # Task awaiting the command was cancelled, so the DCC does not need to keep working on it
+            self._cancel_request(request_id)
+            raise
+        finally:
+            # Replies of requests that are not waited anymore will be discarded
+            self._futures.pop(request_id, None)
+
+        self._status = reply.pop('status', dict())
+
+        return reply
+
+    async def call(self, name, *args, **kwargs):
+        """
+        Calls the command with given name in the server
+        :param name: str, name of the command
+        :return: object, command result or False if the command failed
+        """
+
+        cmd = {
+            'cmd': name,
+            'args': args
+        }
+        cmd.update(kwargs)
+        reply_dict = await self.send(cmd)
+        if not self.is_valid_reply(reply_dict):
+            return False
+
+        return reply_dict['result']
+
+    async def ping(self):
+        reply = await self.send({'cmd': 'ping'})
+
+        return self.is_valid_reply(reply)
+
+    async def update_paths(self):
+        cmd = {
+            'cmd': 'update_paths',
+            # NOTE: The order is SUPER important, we must load the modules in the client in the same order
+            'paths': OrderedDict(self._get_paths_to_update())
+        }
+
+        reply_dict = await self.send(cmd)
+
+        if not self.is_valid_reply(reply_dict):
+            self._status = {'msg': 'Error while connecting to Dcc: update paths ...', 'level': self.Status.ERROR}
+            return False, None
+
+        return reply_dict['success'], reply_dict.get('exe', None)
+
+    async def update_dcc_paths(self, dcc_executable):
+        dcc_paths = self._get_dcc_paths_to_update(dcc_executable)
+        if not dcc_paths:
+            return False
+
+        reply_dict = await self.send({'cmd': 'update_dcc_paths', 'paths': dcc_paths})
+
+        if not self.is_valid_reply(reply_dict):
+            self._status = {
+                'msg': 'Error while connecting to Dcc: update dcc paths ...', 'level': self.Status.ERROR}
+            return False
+
+        return reply_dict['success']
+
+    async def init_dcc(self):
+        reply_dict = await self.send({'cmd': 'init_dcc'})
+
+        if not self.is_valid_reply(reply_dict):
+            self._status = {'msg': 'Error while connecting to Dcc: init dcc ...', 'level': self.Status.ERROR}
+            return False
+
+        return reply_dict['success']
+
+    async def get_dcc_info(self):
+        cmd = {'cmd': 'get_dcc_info'}
+        if self.COMPRESSION and self._binary_protocol:
+            cmd['compression'] = [protocol.COMPRESSION_ZLIB]
+
+        reply_dict = await self.send(cmd)
+
+        if not self.is_valid_reply(reply_dict):
+            self._status = {'msg': 'Error while connecting to Dcc: get dcc info ...', 'level': self.Status.ERROR}
+            return None, None, None
+
+        self._compression = reply_dict.get('compression', None) == protocol.COMPRESSION_ZLIB
+
+        return reply_dict['name'], reply_dict['version'], reply_dict['pid']
+
+    # =================================================================================================================
+    # INTERNAL
+    # =================================================================================================================
+
+    async def _negotiate_protocol(self):
+        """
+        Internal function that negotiates with the server the framing and codecs to use
+        Negotiation is done before reading task starts, so its reply is read directly from the stream
+        """
+
+        self._binary_protocol = False
+        self._codecs = [protocol.Codecs.JSON]
+        self._compression = False
+        self._legacy_requests.clear()
+
+        cmd = {
+            'cmd': 'negotiate_protocol',
+            'version': protocol.PROTOCOL_VERSION,
+            'codecs': protocol.available_codecs()
+        }
+        _, cmd_data = protocol.encode_payload(cmd)
+        try:
+            self._writer.write(protocol.pack_legacy_header(len(cmd_data)) + cmd_data)
+            await self._writer.drain()
+            header = await asyncio.wait_for(
+                self._reader.readexactly(protocol.LEGACY_HEADER_SIZE), self._timeout)
+            reply_data = await asyncio.wait_for(
+                self._reader.readexactly(protocol.unpack_legacy_header(header)), self._timeout)
+            reply_dict = protocol.decode_payload(reply_data)
+        except Exception as exc:
+            LOGGER.debug('Error while negotiating protocol, using legacy protocol: {}'.format(exc))
+            return False
+        if not reply_dict or not reply_dict.get('success', False):
+            LOGGER.debug('Server does not support binary protocol, using legacy protocol')
+            return False
+
+        self._codecs = protocol.negotiate_codecs(reply_dict.get('codecs', list()))
+        self._binary_protocol = True
+
+        return True
+
+    async def _read_frames(self):
+        """
+        Internal function that reads frames from the server and resolves the requests waiting for them
+        """
+
+        # Replies of bulk requests can be received in chunks interleaved with other replies
+        chunks = dict()
+        try:
+            while True:
+                if self._binary_protocol:
+                    header = await self._reader.readexactly(protocol.HEADER_SIZE)
+                    codec_id, flags, request_id, reply_length = protocol.unpack_header(header)
+                else:
+                    header = await self._reader.readexactly(protocol.LEGACY_HEADER_SIZE)
+                    reply_length = protocol.unpack_legacy_header(header)
+                    codec_id, flags = protocol.Codecs.JSON, 0
+                    request_id = self._legacy_requests.popleft() if self._legacy_requests else 0
+                reply_data = await self._reader.readexactly(reply_length)
+                if flags & protocol.Flags.CHUNK:
+                    chunks.setdefault(request_id, list()).append(reply_data)
+                    continue
+                if request_id in chunks:
+                    reply_data = b''.join(chunks.pop(request_id) + [reply_data])
+                future = self._futures.pop(request_id, None)
+                if not future or future.done():
+                    continue
+                try:
+                    reply = protocol.decode_payload(reply_data, codec_id, flags=flags)
+                    if flags & protocol.Flags.HANDLES:
+                        reply = protocol.import_handles(reply)
+                    future.set_result(reply)
+                except Exception as exc:
+                    future.set_exception(exc)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            LOGGER.debug('Connection with DCC server lost: {}'.format(exc))
+            self._connected = False
+            self._cancel_pending_requests(ConnectionError('Connection with DCC server lost'))
+        except Exception as exc:
+            # Stream cannot be synchronized with the server anymore, so no more replies can be received
+            LOGGER.error('Invalid data received from DCC server: {}'.format(exc))
+            self._connected = False
+            self._cancel_pending_requests(ConnectionError('Invalid data received from DCC server: {}'.format(exc)))
+
+    def _cancel_request(self, request_id):
+        """
+        Internal function that asks the server to cancel the request with given ID. Only binary protocol supports it
+        :param request_id: int
+        """
+
+        if not self._binary_protocol or not self._writer or self._writer.is_closing():
+            return
+
+        self._writer.write(protocol.pack_header(
+            protocol.Codecs.JSON, 0, request_id=request_id, flags=protocol.Flags.CANCEL))
+
+    def _cancel_pending_requests(self, exc):
+        """
+        Internal function that makes all pending requests fail with the given exception
+        :param exc: Exception
+        """
+
+        futures = list(self._futures.values())
+        self._futures.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(exc)
@@ -9,93 +9,376 @@ from __future__ import print_function, division, absolute_import
 
 import os
 import sys
-import time
+import copy
 import json
+import time
+import errno
 import socket
+import select
 import inspect
 import pkgutil
 import logging
 import weakref
+import itertools
+import threading
 import importlib
 import traceback
-from collections import OrderedDict
+import contextlib
+from collections import OrderedDict, deque
 
-from Qt.QtCore import Signal, QObject
+from Qt.QtCore import Signal, QObject, QThread, QTimer, QSocketNotifier
 
 import tpDcc.loader
 import tpDcc.config
 from tpDcc import dcc
-from tpDcc.core import dcc as core_dcc
+from tpDcc.core import dcc as core_dcc, protocol, transport, sharedmemory, exceptions, stubs, recorder
 from tpDcc.managers import configs
 import tpDcc.libs.python
 import tpDcc.libs.resources
 import tpDcc.libs.qt.loader
 from tpDcc.libs.python import python, osplatform, process, path as path_utils
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
+
 if sys.version_info[0] == 2:
     from socket import error as ConnectionRefusedError
+    monotonic = time.time
+else:
+    monotonic = time.monotonic
 
 LOGGER = logging.getLogger('tpDcc-core')
 
+# Socket errors raised when the connection with the server is lost
+_CONNECTION_ERRORS = (errno.ECONNRESET, errno.EPIPE, errno.EBADF, errno.ENOTCONN)
+
+# Socket errors raised by non blocking sockets when an operation cannot be completed without blocking
+_WOULD_BLOCK_ERRORS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
 
 class DccClientSignals(QObject, object):
     dccDisconnected = Signal()
+    dccReconnected = Signal()
+    dccEvent = Signal(str, object)      # event name, event arguments
+
+
+# Commands whose results only change when a new scene is opened or created, so they can be cached by clients
+# Each command is mapped with the time (in seconds) its result is valid. None means cache default time is used
+_CACHEABLE_COMMANDS = {
+    'get_name': None,
+    'get_version': None,
+    'get_version_name': None,
+    'get_extensions': None,
+    'get_fonts': None,
+    'get_control_colors': None,
+    'get_renderers': None,
+    'get_playblast_formats': None,
+    'list_node_types': None
+}
+
+
+# Priority (protocol.Priorities) of the commands whose requests are not sent with normal priority
+# Bulk requests are executed after queued ones and their replies are sent in chunks. Interactive and normal requests
+# are executed in the order they are sent
+_COMMAND_PRIORITIES = {
+    'ping': protocol.Priorities.INTERACTIVE,
+    'select_node': protocol.Priorities.INTERACTIVE,
+    'selected_nodes': protocol.Priorities.INTERACTIVE,
+    'clear_selection': protocol.Priorities.INTERACTIVE,
+    'fit_view': protocol.Priorities.INTERACTIVE,
+    'focus': protocol.Priorities.INTERACTIVE,
+    'refresh_viewport': protocol.Priorities.INTERACTIVE,
+    'open_cursor': protocol.Priorities.BULK,
+    'fetch_cursor': protocol.Priorities.BULK
+}
+
+
+def register_cacheable_command(cmd, ttl=None):
+    """
+    Registers given command as cacheable, so its results are cached by clients with cache enabled
+    Only commands without side effects whose results do not depend on scene state should be registered
+    :param cmd: str
+    :param ttl: float or None, time (in seconds) results are valid. If None, cache default time is used
+    """
+
+    _CACHEABLE_COMMANDS[cmd] = ttl
+
+
+def unregister_cacheable_command(cmd):
+    """
+    Unregisters given command as cacheable
+    :param cmd: str
+    """
+
+    _CACHEABLE_COMMANDS.pop(cmd, None)
+
+
+def is_cacheable_command(cmd):
+    """
+    Returns whether given command is cacheable or not
+    :param cmd: str
+    :return: bool
+    """
+
+    return cmd in _CACHEABLE_COMMANDS
+
+
+def register_command_priority(cmd, priority):
+    """
+    Registers the priority requests of given command are sent with. Long transfers, such as exports, should be
+    registered as bulk, so they do not delay interactive requests
+        register_command_priority('export_shot_animation_curves', protocol.Priorities.BULK)
+    :param cmd: str
+    :param priority: int, protocol.Priorities value
+    """
+
+    _COMMAND_PRIORITIES[cmd] = priority
+
+
+def get_command_priority(cmd):
+    """
+    Returns the priority requests of given command are sent with
+    :param cmd: str
+    :return: int, protocol.Priorities value
+    """
+
+    return _COMMAND_PRIORITIES.get(cmd, protocol.Priorities.NORMAL)
+
+
+def broadcast(clients, cmd, *args, **kwargs):
+    """
+    Executes given command in the DCC sessions of all given clients at the same time and returns their results
+    Command is sent to all the sessions before waiting for any reply, so the call takes as long as the slowest
+    session instead of the sum of all of them. Each session waits for its reply up to the timeout of its client
+    Clients sharing a connection belong to the same session, so the command is executed once per session
+    :param clients: list(DccClient)
+    :param cmd: str, name of the command to execute
+    :param args: list, command arguments
+    :param kwargs: dict, command keyword arguments
+    :return: OrderedDict(DccClient, object), result of the command in each session. False if it failed or timed out
+    """
+
+    sessions = OrderedDict()
+    for found_client in clients:
+        if found_client is not None:
+            sessions.setdefault(getattr(found_client, 'shared_connection', None) or found_client, found_client)
+
+    cmd_dict = {
+        'cmd': cmd,
+        'args': list(args)
+    }
+    cmd_dict.update(kwargs)
+
+    results = OrderedDict()
+    requests = OrderedDict()
+    start_time = monotonic()
+    for found_client in sessions.values():
+        results[found_client] = False
+
+        # Clients that do not communicate through a socket execute the command directly
+        if not isinstance(found_client, DccClient) or found_client.server or not found_client.connected:
+            try:
+                results[found_client] = getattr(found_client, cmd)(*args, **kwargs)
+            except Exception:
+                LOGGER.exception('Error while executing command "{}": {}'.format(cmd, traceback.format_exc()))
+            continue
 
+        try:
+            requests[found_client] = found_client.send_request(cmd_dict)
+        except Exception as exc:
+            LOGGER.warning('Impossible to send command "{}" to {}: {}'.format(cmd, found_client, exc))
 
-class DccClient(object):
+    # Replies are waited sorted by timeout, so each session times out in time
+    for found_client, request_id in sorted(requests.items(), key=lambda request: request[0].timeout):
+        remaining_time = max(0, start_time + found_client.timeout - monotonic())
+        try:
+            reply = found_client.recv(request_id, timeout=remaining_time)
+        except Exception as exc:
+            LOGGER.warning('Command "{}" failed in {}: {}'.format(cmd, found_client, exc))
+            continue
+        if found_client.is_valid_reply(reply):
+            results[found_client] = reply.get('result', None)
 
-    PORT = 17344
-    HEADER_SIZE = 10
+    return results
 
-    signals = DccClientSignals()
 
-    class Status(object):
-        ERROR = 'error'
-        WARNING = 'warning'
-        SUCCESS = 'success'
-        UNKNOWN = 'unknown'
+class DccResultCache(object):
+    """
+    Class that stores replies of cacheable commands. Entries expire after their TTL and least recently used ones are
+    removed when cache is full
+    """
 
-    def __init__(self, timeout=20, tool_id=None):
-        self._tool_id = tool_id or None
-        self._timeout = timeout
-        self._ports = core_dcc.dcc_ports(self.__class__.PORT)
-        self._port = None
-        self._discard_count = 0
-        self._server = None
-        self._connected = False
-        self._status = dict()
-        self._client_sockets = dict()
-        self._running_dccs = list()
+    def __init__(self, ttl=300, max_size=256):
+        super(DccResultCache, self).__init__()
 
-    def __getattribute__(self, name):
-        try:
-            attr = super(DccClient, self).__getattribute__(name)
-        except AttributeError:
-            def new_fn(*args, **kwargs):
-                cmd = {
-                    'cmd': name,
-                    'args': args
-                }
-                cmd.update(kwargs)
-                reply_dict = self.send(cmd)
-                if not self.is_valid_reply(reply_dict):
-                    return False
-                return reply_dict['result']
-            return new_fn
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries = OrderedDict()
 
-        return attr
+    def __len__(self):
+        return len(self._entries)
 
     # =================================================================================================================
     # PROPERTIES
     # =================================================================================================================
 
     @property
-    def server(self):
-        return self._server
+    def ttl(self):
+        return self._ttl
 
     @property
-    def connected(self):
-        return self._connected
+    def max_size(self):
+        return self._max_size
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def get(self, key):
+        """
+        Returns cached reply with given key
+        :param key: tuple(str, str), command name and its serialized arguments
+        :return: dict or None
+        """
+
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return None
+        expire_time, reply = entry
+        if expire_time < monotonic():
+            return None
+
+        # Entry is inserted again, so it becomes the most recently used one
+        self._entries[key] = entry
+
+        return reply
+
+    def set(self, key, reply, ttl=None):
+        """
+        Stores given reply in the cache
+        :param key: tuple(str, str), command name and its serialized arguments
+        :param reply: dict
+        :param ttl: float or None, time (in seconds) reply is valid. If None, cache default time is used
+        """
+
+        self._entries.pop(key, None)
+        self._entries[key] = (monotonic() + (self._ttl if ttl is None else ttl), reply)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, commands=None):
+        """
+        Removes cached replies of given commands
+        :param commands: list(str) or None, if not given, all cached replies are removed
+        """
+
+        if commands is None:
+            self._entries.clear()
+            return
+
+        for key in [key for key in self._entries if key[0] in commands]:
+            self._entries.pop(key)
+
+
+class DccBatch(object):
+    """
+    Class that stores the commands collected by DccClient.batch context manager and their results
+    """
+
+    class Result(object):
+        """
+        Placeholder returned by proxied calls done within a batch. Its value is available once the batch is sent
+        """
+
+        def __init__(self, cmd):
+            self._cmd = cmd
+            self._reply = None
+
+        @property
+        def cmd(self):
+            return self._cmd
+
+        @property
+        def reply(self):
+            return self._reply
+
+        @property
+        def success(self):
+            return bool(self._reply and self._reply.get('success', False))
+
+        @property
+        def result(self):
+            if not self.success:
+                return False
+            return self._reply.get('result', None)
+
+    def __init__(self):
+        self._commands = list()
+        self._results = list()
+
+    def __len__(self):
+        return len(self._commands)
+
+    @property
+    def commands(self):
+        return self._commands
+
+    @property
+    def results(self):
+        return self._results
+
+    def add(self, cmd, args=None, kwargs=None):
+        """
+        Adds a new command into the batch
+        :param cmd: str, name of the command
+        :param args: list
+        :param kwargs: dict
+        :return: DccBatch.Result
+        """
+
+        self._commands.append({'cmd': cmd, 'args': list(args or list()), 'kwargs': kwargs or dict()})
+        result = self.Result(cmd)
+        self._results.append(result)
+
+        return result
+
+    def set_replies(self, replies):
+        """
+        Stores the replies of the batch commands
+        :param replies: list(dict)
+        """
+
+        for result, reply in zip(self._results, replies):
+            result._reply = reply
+
+
+class BaseDccClient(object):
+    """
+    Base class for DCC clients. Contains the functionality that does not depend on how commands are sent to the server
+    """
+
+    PORT = 17344
+
+    # Last port each tool connected to, so clients can reconnect without looking for running DCCs again
+    _ports_cache = dict()
+
+    class Status(object):
+        ERROR = 'error'
+        WARNING = 'warning'
+        SUCCESS = 'success'
+        UNKNOWN = 'unknown'
+
+    def __init__(self, timeout=20, tool_id=None):
+        self._tool_id = tool_id or None
+        self._timeout = timeout
+        self._status = dict()
 
     # =================================================================================================================
     # BASE
@@ -119,80 +402,88 @@ class DccClient(object):
             return
         dcc._CLIENTS[tool_id] = weakref.ref(client)
 
-    @classmethod
-    def create(cls, tool_id, *args, **kwargs):
+    def is_valid_reply(self, reply_dict):
+        if not reply_dict:
+            LOGGER.debug('Invalid reply')
+            return False
 
-        # If a client with given ID is already registered, we return it
-        client = dcc.client(tool_id, only_clients=True)
-        if client:
-            return client
+        if not reply_dict['success']:
+            LOGGER.error('{} failed: {}'.format(reply_dict['cmd'], reply_dict['msg']))
+            return False
 
-        client = cls(tool_id=tool_id)
+        self._status = reply_dict.pop(
+            'status', None) or {'msg': self.get_status_message(), 'level': self.get_status_level()}
 
-        return client
+        return True
 
-    @classmethod
-    def create_and_connect_to_server(cls, tool_id, *args, **kwargs):
+    def get_status_message(self):
+        return self._status.get('msg', '')
 
-        # def _connect_client():
-        #     valid_connect = client.connect()
-        #     if not valid_connect:
-        #         cls._register_client(tool_id, client)
-        #         return False
+    def get_status_level(self):
+        return self._status.get('level', self.Status.UNKNOWN)
 
-        client = cls.create(tool_id, *args, **kwargs)
+    def set_status(self, status_message, status_level):
+        self._status = {
+            'msg': str(status_message), 'level': status_level
+        }
 
-        parent = kwargs.get('parent', None)
-        server_class_name = kwargs.get('server_name', cls.__name__.replace(
-            'Client', 'Server').replace('client', 'server'))
-        server_module_name = kwargs.get('server_module_name', 'server')
+    # =================================================================================================================
+    # INTERNAL
+    # =================================================================================================================
 
-        if not dcc.is_standalone():
-            dcc_mod_name = '{}.dccs.{}.{}'.format(tool_id.replace('-', '.'), dcc.get_name(), server_module_name)
-            try:
-                mod = importlib.import_module(dcc_mod_name)
-                if hasattr(mod, server_class_name):
-                    server = getattr(mod, server_class_name)(parent, client=client, update_paths=False)
-                    client.set_server(server)
-                    client.update_client(tool_id=tool_id, **kwargs)
-            except Exception as exc:
-                LOGGER.warning(
-                    'Impossible to launch tool server! Error while importing: {} >> {}'.format(dcc_mod_name, exc))
-                try:
-                    server.close_connection()
-                except Exception:
-                    pass
-                return None
-        else:
-            client.connect()
-            client.update_client(tool_id=tool_id, **kwargs)
+    def _get_running_dccs(self, supported_dccs=None):
+        """
+        Internal function that returns the DCCs that are running in the user machine
+        If psutil is available, process table is scanned only once for all DCCs
+        :param supported_dccs: dict or None, if given, only the DCCs in it are checked
+        :return: list(str)
+        """
 
-        return client
+        # Executables are matched without extension and by substring, so variants such as maya.bin, Maya.exe or
+        # houdinifx are found too
+        dcc_processes = OrderedDict()
+        platform = osplatform.get_platform()
+        for dcc_name in core_dcc.Dccs.ALL:
+            if supported_dccs and dcc_name not in supported_dccs:
+                continue
+            process_name = core_dcc.Dccs.executables.get(dcc_name, dict()).get(platform, None)
+            if process_name:
+                dcc_processes[dcc_name] = os.path.splitext(process_name)[0].lower()
+        if not dcc_processes:
+            return list()
 
-    def update_client(self, **kwargs):
-        tool_id = kwargs.get('tool_id', None)
-        config_dict = configs.get_tool_config(tool_id) or dict() if tool_id else dict()
-        supported_dccs = config_dict.get(
-            'supported_dccs', dict()) if config_dict else kwargs.get('supported_dccs', dict())
+        if not psutil:
+            return [dcc_name for dcc_name, process_name in dcc_processes.items() if
+                    process.check_if_process_is_running(process_name)]
 
-        if not self.connected:
-            self.set_status('Not connected to any DCC', self.Status.WARNING)
-            return False
+        running_processes = set()
+        for running_process in psutil.process_iter(['name']):
+            running_processes.add((running_process.info.get('name', None) or '').lower())
 
-        if dcc.is_standalone():
-            success, dcc_exe = self.update_paths()
-            if not success:
-                return False
+        return [dcc_name for dcc_name, process_name in dcc_processes.items() if
+                any(process_name in running_process for running_process in running_processes)]
 
-            success = self.update_dcc_paths(dcc_exe)
-            if not success:
-                return False
+    def _get_supported_dccs(self, **kwargs):
+        """
+        Internal function that returns the DCCs, and their versions, supported by the tool the client belongs to
+        :return: dict
+        """
 
-            success = self.init_dcc()
-            if not success:
-                return False
+        tool_id = kwargs.get('tool_id', None)
+        config_dict = configs.get_tool_config(tool_id) or dict() if tool_id else dict()
+
+        return config_dict.get('supported_dccs', dict()) if config_dict else kwargs.get('supported_dccs', dict())
+
+    def _check_dcc_support(self, dcc_name, dcc_version, dcc_pid, supported_dccs):
+        """
+        Internal function that checks whether the DCC the client is connected to is supported or not
+        :param dcc_name: str
+        :param dcc_version: str
+        :param dcc_pid: int
+        :param supported_dccs: dict
+        :return: bool
+        """
 
-        dcc_name, dcc_version, dcc_pid = self.get_dcc_info()
         if not dcc_name or not dcc_version:
             return False
 
@@ -212,84 +503,367 @@ class DccClient(object):
         self.set_status(msg, self.Status.SUCCESS)
         LOGGER.info(msg)
 
-        if tool_id:
-            DccClient._register_client(tool_id, self)
+        return True
 
-    def set_server(self, server):
-        self._server = server
+    def _get_dcc_paths_to_update(self, dcc_executable):
+        """
+        Internal function that returns DCC specific paths that DCC server should include to properly work with the
+        client
+        :param dcc_executable: str, path of the executable of the DCC the client is connected to
+        :return: OrderedDict or None
+        """
 
-    def connect(self, port=-1):
+        if not dcc_executable:
+            return None
+
+        dcc_name = None
+        if 'maya' in dcc_executable:
+            dcc_name = core_dcc.Dccs.Maya
+        elif '3dsmax' in dcc_executable:
+            dcc_name = core_dcc.Dccs.Max
+        elif 'houdini' in dcc_executable:
+            dcc_name = core_dcc.Dccs.Houdini
+        elif 'nuke' in dcc_executable:
+            dcc_name = core_dcc.Dccs.Nuke
+        elif 'unreal' in dcc_executable or os.path.basename(dcc_executable).startswith('UE'):
+            dcc_name = core_dcc.Dccs.Unreal
+        if not dcc_name:
+            msg = 'Executable DCC {} is not supported!'.format(dcc_executable)
+            LOGGER.warning(msg)
+            self._status = {'msg': msg, 'level': self.Status.WARNING}
+            return None
 
-        def _connect(_port):
+        module_name = 'tpDcc.dccs.{}.loader'.format(dcc_name)
+        try:
+            mod = pkgutil.get_loader(module_name)
+        except Exception:
             try:
-                self._client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self._client_socket.connect(('localhost', _port))
-                # self._client_socket.setblocking(False)
-            except ConnectionRefusedError as exc:
-                # LOGGER.warning(exc)
-                self._status = {'msg': 'Client connection was refused.', 'level': self.Status.ERROR}
-                self._connected = False
-                return False
+                self._status = {
+                    'msg': 'Error while connecting to Dcc: update dcc paths ...', 'severity': self.Status.ERROR}
+                LOGGER.error('FAILED IMPORT: {} -> {}'.format(str(module_name), str(traceback.format_exc())))
+                return None
             except Exception:
-                LOGGER.exception(traceback.format_exc())
-                self._status = {'msg': 'Error while connecting client', 'level': self.Status.ERROR}
-                self._connected = False
-                return False
+                self._status = {
+                    'msg': 'Error while connecting to Dcc: update dcc paths ...', 'severity': self.Status.ERROR}
+                LOGGER.error('FAILED IMPORT: {}'.format(module_name))
+                return None
+        if not mod:
+            msg = 'Impossible to import DCC specific module: {} ({})'.format(module_name, dcc_name)
+            LOGGER.warning(msg)
+            self._status = {'msg': msg, 'severity': self.Status.WARNING}
+            return None
 
-            return True
+        return OrderedDict({
+            'tpDcc.dccs.{}'.format(dcc_name): path_utils.clean_path(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(mod.get_filename())))))
+        })
 
-        if self._server:
-            self._status = {'msg': 'Client connected successfully!', 'level': self.Status.SUCCESS}
-            self._connected = True
-            return True
+    def _get_paths_to_update(self):
+        """
+        Internal function that returns all the paths that DCC server should include to properly work with the client
+        """
 
-        # If we pass a port, we just connect to it
-        if port > 0:
-            self._port = port
-            self._connected = _connect(port)
-            return self._connected
+        return {
+            'tpDcc.loader': path_utils.clean_path(os.path.dirname(os.path.dirname(tpDcc.loader.__file__))),
+            'tpDcc.config': path_utils.clean_path(
+                os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.config.__file__)))),
+            'tpDcc.libs.python': path_utils.clean_path(
+                os.path.dirname(
+                    os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.python.__file__))))),
+            'tpDcc.libs.resources': path_utils.clean_path(
+                os.path.dirname(
+                    os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.resources.__file__))))),
+            'tpDcc.libs.qt.loader': path_utils.clean_path(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.qt.loader.__file__)))))
+        }
 
-        self._port = self.PORT
-        _connect(self._port)
 
-        supported_dccs = None
-        tool_id = self._tool_id
-        if tool_id:
-            config_dict = configs.get_tool_config(tool_id) or dict() if tool_id else dict()
-            supported_dccs = config_dict.get(
-                'supported_dccs', dict()) if config_dict else kwargs.get('supported_dccs', dict())
+# Functions of tpDcc.dcc that are executed by the client itself, so they are never sent to the server
+CLIENT_FUNCTIONS = ('client', 'clients', 'broadcast')
 
-        # If no port if given, we check which DCCs are running the user machine and we try to connect
-        # to those ports
+# Stub with one method per tpDcc.dcc function, so DCC commands are regular methods with the signature of the function
+DccClientStub = stubs.load_stub(dcc, exclude=CLIENT_FUNCTIONS)
+_STUB_COMMANDS = frozenset(name for name in vars(DccClientStub) if not name.startswith('_'))
+
+
+class DccClient(BaseDccClient, DccClientStub):
+
+    HEADER_SIZE = protocol.LEGACY_HEADER_SIZE
+    CONNECT_TIMEOUT = 0.5   # Maximum time (in seconds) to wait for servers to accept connection while looking for them
+    TRANSPORTS = [transport.Transports.LOCAL, transport.Transports.TCP]     # Transports sorted by preference
+    SHARED_MEMORY = False   # Whether large numeric arrays are received through shared memory (as SharedArray)
+    CACHE_TTL = 300         # Default time (in seconds) cached command results are valid
+    CACHE_SIZE = 256        # Maximum number of cached command results
+    COMPRESSION = False     # Whether large frames should be compressed. Useful for remote desktop or VPN setups
+    PAGE_SIZE = 1000        # Default number of items requested per page when iterating command results
+    HEARTBEAT_INTERVAL = 0.25   # Time (in seconds) between heartbeat pings. 0 disables heartbeat
+    HEARTBEAT_TIMEOUT = 1.0     # Maximum time (in seconds) an idle DCC can take to reply a heartbeat ping
+    HEARTBEAT_BUSY_TIMEOUT = 30.0   # Maximum time (in seconds) without data from a DCC that is executing commands
+    RECONNECT = True            # Whether client reconnects automatically when the connection with the DCC is lost
+    RECONNECT_DELAY = 0.5       # Time (in seconds) to wait before first reconnection attempt. It doubles each attempt
+    RECONNECT_MAX_DELAY = 30.0  # Maximum time (in seconds) to wait between reconnection attempts
+    SHARE_CONNECTION = True     # Whether tool clients of the same thread share the connection with a DCC server
+    CONNECTION_CLASS = None     # Class of the shared connections created by the client. If None, client class is used
+
+    # Options of the connection copied from the first tool client that creates a shared connection
+    _CONNECTION_OPTIONS = (
+        'PORT', 'CONNECT_TIMEOUT', 'TRANSPORTS', 'SHARED_MEMORY', 'COMPRESSION', 'HEARTBEAT_INTERVAL',
+        'HEARTBEAT_TIMEOUT', 'HEARTBEAT_BUSY_TIMEOUT', 'RECONNECT', 'RECONNECT_DELAY', 'RECONNECT_MAX_DELAY')
+
+    # Connections shared by tool clients of each thread, mapped by server port. Thread local storage is used, so a new
+    # thread never gets the connections of a finished thread that had the same thread ID
+    _thread_data = threading.local()
+
+    # IDs of the scopes that keep server state (event subscriptions, cursors and handles) of each tool client apart
+    _scope_ids = itertools.count(1)
+
+    signals = DccClientSignals()
+
+    def __init__(self, timeout=20, tool_id=None):
+        super(DccClient, self).__init__(timeout=timeout, tool_id=tool_id)
+
+        self._ports = core_dcc.dcc_ports(self.__class__.PORT)
+        self._port = None
+        self._server = None
+        self._connected = False
+        self._client_sockets = dict()
+        self._client_socket = None
+        self._selector = None
         self._running_dccs = list()
-        for dcc_name in core_dcc.Dccs.ALL:
+        self._transport = transport.Transports.TCP
+        self._binary_protocol = False
+        self._codecs = [protocol.Codecs.JSON]
+        self._compression = False
+        self._shared_memory = False
+        self._last_request_id = 0
+        self._recv_header = bytearray(max(protocol.HEADER_SIZE, protocol.LEGACY_HEADER_SIZE))
+        self._recv_payload = None
+        self._recv_frame = None
+        self._recv_offset = 0
+        self._recv_chunks = dict()
+        self._pending_replies = dict()
+        self._abandoned_requests = dict()
+        self._request_commands = dict()
+        self._legacy_requests = deque()
+        self._batch = None
+        self._cache = None
+        self._events_notifier = None
+        self._subscriptions = set()
+        self._client_kwargs = None
+        self._heartbeat_timer = None
+        self._heartbeat_request = None
+        self._last_receive_time = 0.0
+        self._reconnect_timer = None
+        self._reconnect_attempts = 0
+        self._dcc_info = None
+        self._connection = None
+        self._shared_clients = None
+        self._shared_connections = None
+        self._scope_id = None
+        self._recorder = None
+        self._dcc_functions = None
+
+        self._update_stub_commands()
+
+    def __getattr__(self, name):
+        # Only called for commands that are not DCC functions, such as server functions. DCC functions are
+        # implemented by DccClientStub
+        if name.startswith('_') or name in CLIENT_FUNCTIONS:
+            raise AttributeError(
+                '\'{}\' object has no attribute \'{}\''.format(self.__class__.__name__, name))
+
+        return self._create_command(name)
 
-            if supported_dccs and dcc_name not in supported_dccs:
-                continue
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
 
-            process_name = core_dcc.Dccs.executables.get(dcc_name, dict()).get(osplatform.get_platform(), None)
-            if not process_name:
-                continue
-            process_running = process.check_if_process_is_running(process_name)
-            if not process_running:
-                continue
-            self._running_dccs.append(dcc_name)
-        if not self._running_dccs:
-            self._port = self.PORT
-            self._connected = _connect(self._port)
+    @property
+    def server(self):
+        return self._server
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def connected(self):
+        return self._get_connection()._connected
+
+    @property
+    def current_transport(self):
+        return self._get_connection()._transport
+
+    @property
+    def shared_connection(self):
+        return self._connection
+
+    @property
+    def recorder(self):
+        return self._get_connection()._recorder
+
+    @property
+    def cache(self):
+        return self._cache
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    @classmethod
+    def create(cls, tool_id, *args, **kwargs):
+
+        # If a client with given ID is already registered, we return it
+        client = dcc.client(tool_id, only_clients=True)
+        if client:
+            return client
+
+        client = cls(tool_id=tool_id)
+
+        return client
+
+    @classmethod
+    def create_and_connect_to_server(cls, tool_id, *args, **kwargs):
+
+        # def _connect_client():
+        #     valid_connect = client.connect()
+        #     if not valid_connect:
+        #         cls._register_client(tool_id, client)
+        #         return False
+
+        client = cls.create(tool_id, *args, **kwargs)
+
+        parent = kwargs.get('parent', None)
+        server_class_name = kwargs.get('server_name', cls.__name__.replace(
+            'Client', 'Server').replace('client', 'server'))
+        server_module_name = kwargs.get('server_module_name', 'server')
+
+        if not dcc.is_standalone():
+            dcc_mod_name = '{}.dccs.{}.{}'.format(tool_id.replace('-', '.'), dcc.get_name(), server_module_name)
+            try:
+                mod = importlib.import_module(dcc_mod_name)
+                if hasattr(mod, server_class_name):
+                    server = getattr(mod, server_class_name)(parent, client=client, update_paths=False)
+                    client.set_server(server)
+                    client.update_client(tool_id=tool_id, **kwargs)
+            except Exception as exc:
+                LOGGER.warning(
+                    'Impossible to launch tool server! Error while importing: {} >> {}'.format(dcc_mod_name, exc))
+                try:
+                    server.close_connection()
+                except Exception:
+                    pass
+                return None
         else:
-            for dcc_name in self._running_dccs:
-                self._port = core_dcc.dcc_port(self.PORT, dcc_name=dcc_name)
-                valid_connect = _connect(self._port)
-                if valid_connect:
-                    self._connected = True
-                    return True
+            client.connect()
+            client.update_client(tool_id=tool_id, **kwargs)
+
+        return client
+
+    def update_client(self, **kwargs):
+        # Handshake is replayed when the client reconnects automatically
+        self._client_kwargs = kwargs
+        tool_id = kwargs.get('tool_id', None)
+        supported_dccs = self._get_supported_dccs(**kwargs)
+
+        if not self.connected:
+            self.set_status('Not connected to any DCC', self.Status.WARNING)
+            return False
+
+        # Clients sharing a connection only initialize the DCC session once
+        connection = self._get_connection()
+        dcc_name, dcc_version, dcc_pid = connection._init_session()
+        if not dcc_name:
+            if connection is not self:
+                self._status = dict(connection._status)
+            return False
+        if not self._check_dcc_support(dcc_name, dcc_version, dcc_pid, supported_dccs):
+            return False
+
+        if tool_id:
+            DccClient._register_client(tool_id, self)
+
+    def set_server(self, server):
+        self._server = server
+        self._update_stub_commands()
+
+    def connect(self, port=-1):
+
+        def _connect(_port, _client_socket=None):
+            try:
+                if not _client_socket:
+                    _client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    _client_socket.connect(('localhost', _port))
+                self._set_client_socket(_client_socket, transport.Transports.TCP)
+                self._negotiate_protocol()
+            except ConnectionRefusedError as exc:
+                # LOGGER.warning(exc)
+                self._status = {'msg': 'Client connection was refused.', 'level': self.Status.ERROR}
+                self._connected = False
+                return False
+            except Exception:
+                LOGGER.exception(traceback.format_exc())
+                self._status = {'msg': 'Error while connecting client', 'level': self.Status.ERROR}
+                self._connected = False
+                return False
+
+            return True
+
+        if self._server:
+            self._status = {'msg': 'Client connected successfully!', 'level': self.Status.SUCCESS}
+            self._connected = True
+            return True
+
+        if self.SHARE_CONNECTION and self._tool_id and self._shared_clients is None:
+            return self._connect_shared(port)
+
+        # If we pass a port, we just connect to it
+        if port > 0:
+            self._port = port
+            self._connected = _connect(port)
+            if self._connected and self.HEARTBEAT_INTERVAL > 0:
+                self.start_heartbeat()
+            return self._connected
+
+        # If the tool was connected before, we try to reconnect to the same port before looking for running DCCs
+        tool_id = self._tool_id
+        cached_port = BaseDccClient._ports_cache.get(tool_id, None) if tool_id else None
+        found_port, client_socket = self._probe_ports([cached_port]) if cached_port else (None, None)
+
+        # If no port if given, we check which DCCs are running the user machine and we try to connect
+        # to those ports and to the base one at the same time
+        if not client_socket:
+            self._running_dccs = self._get_running_dccs(self._get_supported_dccs(tool_id=tool_id))
+            ports = [core_dcc.dcc_port(self.PORT, dcc_name=dcc_name) for dcc_name in self._running_dccs]
+            found_port, client_socket = self._probe_ports(ports + [self.PORT])
+
+        if not client_socket:
+            self._port = self.PORT
+            self._status = {'msg': 'Client connection was refused.', 'level': self.Status.ERROR}
+            self._connected = False
+            return False
+
+        self._port = found_port
+        self._connected = _connect(self._port, client_socket)
+        if self._connected and tool_id:
+            BaseDccClient._ports_cache[tool_id] = self._port
+        if self._connected and self.HEARTBEAT_INTERVAL > 0:
+            self.start_heartbeat()
 
         return self._connected
 
     def disconnect(self):
+        if self._connection:
+            self._release_connection()
+            return True
+
+        self.stop_heartbeat()
+        self.stop_recording()
+        self._stop_reconnect()
+        self._stop_events_notifier()
+        self._connected = False
         try:
-            self._client_socket.close()
+            self._close_client_socket()
             self.signals.dccDisconnected.emit()
         except Exception:
             traceback.print_exc()
@@ -299,18 +873,17 @@ class DccClient(object):
         return True
 
     def send(self, cmd_dict):
-        json_cmd = json.dumps(cmd_dict)
 
         # If we use execute the tool inside DCC we execute client/server in same process. We can just launch the
         # function in the server
         if self._server:
-            reply_json = self._server._process_data(cmd_dict)
-            if not reply_json:
+            reply_data = self._server._process_data(cmd_dict)
+            if not reply_data:
                 self._status = None
                 return {'success': False}
-            return json.loads(reply_json)
+            return protocol.decode_payload(reply_data)
         else:
-            if not self._connected:
+            if not self.connected:
                 cmd = cmd_dict.pop('cmd', None)
                 if cmd and hasattr(dcc, cmd):
                     try:
@@ -341,13 +914,17 @@ class DccClient(object):
                         return {'success': True, 'result': res}
                 return None
 
-            message = list()
-            message.append('{0:10d}'.format(len(json_cmd.encode())))    # header (10 bytes)
-            message.append(json_cmd)
+            cache_key = self._get_cache_key(cmd_dict)
+            if cache_key is not None:
+                # Invalidation events pushed by the server are processed before the cache is used
+                self._process_events()
+                cached_reply = self._cache.get(cache_key)
+                if cached_reply is not None:
+                    self._status = dict()
+                    return copy.deepcopy(cached_reply)
 
             try:
-                msg_str = ''.join(message)
-                self._client_socket.sendall(msg_str.encode())
+                request_id = self.send_request(cmd_dict)
             except OSError as exc:
                 LOGGER.debug(exc)
                 return None
@@ -355,163 +932,469 @@ class DccClient(object):
                 LOGGER.exception(traceback.format_exc())
                 return None
 
-            res = self.recv()
+            try:
+                res = self.recv(request_id)
+            except socket.error as exc:
+                LOGGER.debug(exc)
+                return None
             self._status = res.pop('status', dict())
+            if cache_key is not None and res.get('success', False):
+                self._cache.set(cache_key, copy.deepcopy(res), ttl=_CACHEABLE_COMMANDS.get(cache_key[0], None))
 
             return res
 
-    def recv(self):
-        total_data = list()
-        reply_length = 0
-        bytes_remaining = DccClient.HEADER_SIZE
+    def send_request(self, cmd_dict, priority=None):
+        """
+        Sends given command to the server without waiting for its reply
+        Multiple requests can be in flight at the same time. Use recv function with the returned ID to get the reply
+        :param cmd_dict: dict
+        :param priority: int or None, protocol.Priorities value. If not given, priority of the command is used
+        :return: int, ID of the request
+        """
+
+        if self._connection:
+            # Server keeps the state created by the requests of each tool client sharing the connection apart
+            if self._connection._binary_protocol:
+                cmd_dict = dict(cmd_dict)
+                cmd_dict[protocol.SCOPE_KEY] = self._scope_id
+            return self._connection.send_request(cmd_dict, priority=priority)
 
-        start_time = time.time()
-        while time.time() - start_time < self._timeout:
-            try:
-                data = self._client_socket.recv(bytes_remaining)
-            except Exception as exc:
-                time.sleep(0.01)
-                print(exc)
-                continue
+        if priority is None:
+            priority = get_command_priority(cmd_dict.get('cmd', None))
+        self._last_request_id = self._last_request_id % protocol.MAX_REQUEST_ID + 1
+        self._send_frame(cmd_dict, self._last_request_id, priority=priority)
+        self._request_commands[self._last_request_id] = cmd_dict.get('cmd', None)
 
-            if data:
-                total_data.append(data)
-                bytes_remaining -= len(data)
-                if bytes_remaining <= 0:
-                    for i in range(len(total_data)):
-                        total_data[i] = total_data[i].decode()
-
-                    if reply_length == 0:
-                        header = ''.join(total_data)
-                        reply_length = int(header)
-                        bytes_remaining = reply_length
-                        total_data = list()
-                    else:
-                        if self._discard_count > 0:
-                            self._discard_count -= 1
-                            return self.recv()
-
-                        reply_json = ''.join(total_data)
-                        return json.loads(reply_json)
-
-        self._discard_count += 1
-
-        # If timeout is checked, before raising timeout we make sure that all remaining data is processed
+        return self._last_request_id
+
+    def send_many(self, cmd_dicts):
+        """
+        Sends all given commands through the client socket without waiting between them and returns their replies
+        This way, the round trip latency is paid once instead of once per command
+        All commands are sent with the same priority, so server executes them in the given order
+        :param cmd_dicts: list(dict)
+        :return: list(dict)
+        """
+
+        if self._server or not self.connected:
+            return [self.send(cmd_dict) for cmd_dict in cmd_dicts]
+
+        priorities = set(get_command_priority(cmd_dict.get('cmd', None)) for cmd_dict in cmd_dicts)
+        priority = protocol.Priorities.BULK if protocol.Priorities.BULK in priorities else protocol.Priorities.NORMAL
+        request_ids = list()
         try:
-            data = self._client_socket.recv(bytes_remaining)
-        except Exception as exc:
-            time.sleep(0.01)
-            print(exc)
-        if data:
-            total_data.append(data)
-            bytes_remaining -= len(data)
-            if bytes_remaining <= 0:
-                for i in range(len(total_data)):
-                    total_data[i] = total_data[i].decode()
-
-                if reply_length == 0:
-                    header = ''.join(total_data)
-                    reply_length = int(header)
-                else:
-                    self._discard_count -= 1
-                    reply_json = ''.join(total_data)
-                    return json.loads(reply_json)
+            for cmd_dict in cmd_dicts:
+                request_ids.append(self.send_request(cmd_dict, priority=priority))
+        except Exception:
+            LOGGER.exception(traceback.format_exc())
+            for request_id in request_ids:
+                self._get_connection()._abandon_request(request_id)
+            return [None] * len(cmd_dicts)
+
+        replies = list()
+        for request_id in request_ids:
+            res = self.recv(request_id)
+            self._status = res.pop('status', dict())
+            replies.append(res)
 
-        raise RuntimeError('Timeout waiting for response')
+        return replies
 
-    def is_valid_reply(self, reply_dict):
-        if not reply_dict:
-            LOGGER.debug('Invalid reply')
-            return False
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that collects all the proxied calls done within it and sends them to the server in a single
+        request when the context is exited. Proxied calls return a DccBatch.Result whose value is available after
+        the context is exited
+            with client.batch() as batch:
+                results = [client.get_attribute_value(node, 'translateX') for node in nodes]
+            values = [result.result for result in results]
+        :return: DccBatch
+        """
 
-        if not reply_dict['success']:
-            LOGGER.error('{} failed: {}'.format(reply_dict['cmd'], reply_dict['msg']))
+        # Nested batches are collected into the outer one
+        if self._batch is not None:
+            yield self._batch
+            return
+
+        self._batch = DccBatch()
+        try:
+            yield self._batch
+        finally:
+            batch = self._batch
+            self._batch = None
+        self._send_batch(batch)
+
+    def recv(self, request_id=None, timeout=None):
+        """
+        Waits for the reply of the request with given ID. Replies of other requests received in the meantime are
+        stored, so they can be retrieved later
+        Client socket is only read when it has data available, and client waits at most timeout seconds since the
+        call, no matter how many chunks or frames are received in the meantime
+        :param request_id: int or None, ID of the request we want to retrieve reply of. If not given, next received
+            reply is returned
+        :param timeout: float or None, maximum time (in seconds) to wait. If not given, client timeout is used
+        :return: dict
+        :raises exceptions.RequestTimeoutError: if the reply is not received in time
+        """
+
+        timeout = self._timeout if timeout is None else timeout
+        if self._connection:
+            return self._connection.recv(request_id, timeout=timeout)
+
+        if request_id in self._pending_replies:
+            return self._pending_replies.pop(request_id)
+
+        deadline = monotonic() + timeout
+        while True:
+            frame = self._read_frame()
+            if frame:
+                frame_request_id = frame[0]
+                self._dispatch_frame(frame)
+                if frame_request_id in self._pending_replies and request_id in (None, frame_request_id):
+                    return self._pending_replies.pop(frame_request_id)
+                continue
+            remaining_time = deadline - monotonic()
+            if remaining_time <= 0 or not self._wait_socket(remaining_time):
+                break
+
+        # Frames are always read completely and in order, so once the reply of this request is received, it is
+        # discarded and the stream stays in sync with the server. Command is cancelled, so the DCC stops working on it
+        cmd = None
+        if request_id is not None:
+            cmd = self._request_commands.pop(request_id, None)
+            self._abandon_request(request_id)
+            try:
+                self.cancel(request_id)
+            except socket.error as exc:
+                LOGGER.debug('Impossible to cancel request {}: {}'.format(request_id, exc))
+
+        raise exceptions.RequestTimeoutError(
+            'Timeout waiting for reply of command "{}" after {} seconds'.format(cmd, timeout),
+            command=cmd, request_id=request_id)
+
+    def cancel(self, request_id):
+        """
+        Asks the server to cancel the request with given ID. Server functions that poll their cancellation token stop
+        as soon as possible and the request is replied with a cancelled reply ('cancelled' key is True)
+            request_id = client.send_request({'cmd': 'export_shot_animation_curves'})
+            client.cancel(request_id)
+            reply = client.recv(request_id)
+        :param request_id: int
+        :return: bool, whether cancel request was sent or not. Only clients using binary protocol can cancel requests
+        """
+
+        if self._connection:
+            return self._connection.cancel(request_id)
+
+        if self._server or not self._connected or not self._binary_protocol:
             return False
 
-        self._status = reply_dict.pop(
-            'status', None) or {'msg': self.get_status_message(), 'level': self.get_status_level()}
+        self._send_all(protocol.pack_header(
+            protocol.Codecs.JSON, 0, request_id=request_id, flags=protocol.Flags.CANCEL))
 
         return True
 
-    def ping(self):
+    def iter(self, cmd, *args, **kwargs):
+        """
+        Generator that executes given command in the server and yields its result in pages, so huge results do not
+        need to be serialized at once and tools can start processing them before the whole result is received
+        Next page is requested before yielding current one, so the server prepares it while current one is processed
+            for nodes in client.iter('all_scene_nodes', page_size=5000, full_path=False):
+                model.add_nodes(nodes)
+        :param cmd: str, name of the command to execute. Its result must be a list
+        :param args: list, command arguments
+        :param kwargs: dict, command keyword arguments. page_size keyword defines the number of items per page
+        :return: generator(list)
+        """
+
+        page_size = kwargs.pop('page_size', None) or self.PAGE_SIZE
+        connection = self._get_connection()
+
+        # Cursors are only available for clients connected using binary protocol
+        if self._server or not self.connected or not connection._binary_protocol:
+            result = getattr(self, cmd)(*args, **kwargs)
+            if not result:
+                return
+            for i in range(0, len(result), page_size):
+                yield result[i:i + page_size]
+            return
+
+        cmd_dict = {
+            'cmd': 'open_cursor',
+            'command': cmd,
+            'page_size': page_size,
+            'args': args
+        }
+        cmd_dict.update(kwargs)
+
+        reply = self.send(cmd_dict)
+        if not self.is_valid_reply(reply):
+            return
+
+        cursor_id = reply.get('cursor', None)
+        request_id = None
+        try:
+            while True:
+                page = reply['result']
+                request_id = None
+                if cursor_id is not None:
+                    request_id = self.send_request({'cmd': 'fetch_cursor', 'cursor': cursor_id})
+                if page:
+                    yield page
+                if request_id is None:
+                    break
+                reply = self.recv(request_id)
+                request_id = None
+                self._status = reply.pop('status', dict())
+                if not self.is_valid_reply(reply):
+                    cursor_id = None
+                    break
+                cursor_id = reply.get('cursor', None)
+        finally:
+            # Iteration was stopped before all the pages were received, so server can forget the cursor
+            if request_id is not None:
+                connection._abandon_request(request_id)
+            if cursor_id is not None and self.connected:
+                try:
+                    connection._abandon_request(self.send_request({'cmd': 'close_cursor', 'cursor': cursor_id}))
+                except Exception:
+                    LOGGER.debug('Impossible to close cursor {}: {}'.format(cursor_id, traceback.format_exc()))
+
+    def subscribe(self, *event_names):
+        """
+        Subscribes client to given DCC events (tpDcc.core.dcc.DccCallbacks). Every time one of them is triggered in
+        the DCC, DccClientSignals.dccEvent signal is emitted with the name of the event and its arguments
+        Events are received as soon as they arrive if there is a running Qt event loop in the client thread;
+        otherwise they are received the next time the client communicates with the server
+        :param event_names: list(str)
+        :return: bool
+        """
+
+        # Each client sharing a connection has its own subscriptions, so unsubscribing one does not affect the others
+        connection = self._get_connection()
+        if not connection._connected or not connection._binary_protocol:
+            LOGGER.warning('DCC events are only available for clients connected using binary protocol')
+            return False
+
         cmd = {
-            'cmd': 'ping'
+            'cmd': 'subscribe_events',
+            'events': self._get_event_names(event_names)
         }
 
         reply = self.send(cmd)
-
         if not self.is_valid_reply(reply):
             return False
 
+        self._subscriptions.update(cmd['events'])
+        connection._start_events_notifier()
+
         return True
 
-    def update_paths(self):
+    def unsubscribe(self, *event_names):
+        """
+        Unsubscribes client from given DCC events
+        :param event_names: list(str), if not given, client is unsubscribed from all events
+        :return: bool
+        """
 
-        paths_to_update = self._get_paths_to_update()
+        connection = self._get_connection()
+        if not connection._connected or not connection._binary_protocol:
+            return False
 
         cmd = {
-            'cmd': 'update_paths',
-            # NOTE: The order is SUPER important, we must load the modules in the client in the same order
-            'paths': OrderedDict(paths_to_update)
+            'cmd': 'unsubscribe_events',
+            'events': self._get_event_names(event_names) or None
         }
+        if cmd['events'] is None:
+            self._subscriptions.clear()
+        else:
+            self._subscriptions.difference_update(cmd['events'])
 
-        reply_dict = self.send(cmd)
+        reply = self.send(cmd)
 
-        if not self.is_valid_reply(reply_dict):
-            self._status = {'msg': 'Error while connecting to Dcc: update paths ...', 'level': self.Status.ERROR}
-            return False, None
+        return self.is_valid_reply(reply)
 
-        exe = reply_dict.get('exe', None)
+    def start_heartbeat(self, interval=None):
+        """
+        Starts sending periodic pings to the server, so the client notices when the DCC is closed, crashes or stops
+        replying, and reconnects to it. Only works if the client thread has a running Qt event loop
+        Closed connections are noticed immediately, and DCCs that stop replying are noticed after HEARTBEAT_TIMEOUT
+        seconds (or HEARTBEAT_BUSY_TIMEOUT seconds if they are executing commands sent by the client)
+        :param interval: float or None, time (in seconds) between pings. If not given, HEARTBEAT_INTERVAL is used
+        :return: bool
+        """
 
-        return reply_dict['success'], exe
+        if self._connection:
+            return self._connection.start_heartbeat(interval=interval)
 
-    def update_dcc_paths(self, dcc_executable):
-        if not dcc_executable:
+        if self._server or not self._connected or not self._binary_protocol:
+            return False
+        if not QThread.currentThread().eventDispatcher():
+            LOGGER.debug('Heartbeat is only available in threads with a Qt event loop')
             return False
 
-        dcc_name = None
-        if 'maya' in dcc_executable:
-            dcc_name = core_dcc.Dccs.Maya
-        elif '3dsmax' in dcc_executable:
-            dcc_name = core_dcc.Dccs.Max
-        elif 'houdini' in dcc_executable:
-            dcc_name = core_dcc.Dccs.Houdini
-        elif 'nuke' in dcc_executable:
-            dcc_name = core_dcc.Dccs.Nuke
-        elif 'unreal' in dcc_executable or os.path.basename(dcc_executable).startswith('UE'):
-            dcc_name = core_dcc.Dccs.Unreal
-        if not dcc_name:
-            msg = 'Executable DCC {} is not supported!'.format(dcc_executable)
-            LOGGER.warning(msg)
-            self._status = {'msg': msg, 'level': self.Status.WARNING}
+        if not self._heartbeat_timer:
+            self._heartbeat_timer = QTimer()
+            self._heartbeat_timer.timeout.connect(self._on_heartbeat)
+        self._heartbeat_timer.start(int((interval or self.HEARTBEAT_INTERVAL) * 1000))
+
+        # Connection loss is noticed as soon as server socket is closed
+        self._start_events_notifier()
+
+        return True
+
+    def stop_heartbeat(self):
+        """
+        Stops sending periodic pings to the server
+        """
+
+        if self._connection:
+            return self._connection.stop_heartbeat()
+
+        if self._heartbeat_timer:
+            self._heartbeat_timer.stop()
+        if self._heartbeat_request is not None:
+            request_id = self._heartbeat_request[0]
+            if self._pending_replies.pop(request_id, None) is None:
+                self._abandon_request(request_id)
+            self._heartbeat_request = None
+
+    def enable_cache(self, ttl=None, max_size=None):
+        """
+        Enables the cache of cacheable commands results. Cached results are invalidated by the server when a new
+        scene is opened or created
+        :param ttl: float or None, default time (in seconds) cached results are valid
+        :param max_size: int or None, maximum number of cached results
+        """
+
+        self._cache = DccResultCache(
+            ttl=self.CACHE_TTL if ttl is None else ttl, max_size=self.CACHE_SIZE if max_size is None else max_size)
+
+    def disable_cache(self):
+        """
+        Disables the cache of cacheable commands results
+        """
+
+        self._cache = None
+
+    def clear_cache(self, commands=None):
+        """
+        Removes cached results of given commands
+        :param commands: list(str) or None, if not given, all cached results are removed
+        """
+
+        if self._cache:
+            self._cache.invalidate(commands)
+
+    def start_recording(self, file_path):
+        """
+        Starts recording all the requests sent to the server, with their timing, into given file. Recordings can be
+        replayed against a server with tpDcc.core.replay. Recording belongs to the connection, so clients sharing it
+        are recorded too
+        :param file_path: str
+        :return: recorder.DccRecorder
+        """
+
+        if self._connection:
+            return self._connection.start_recording(file_path)
+
+        self.stop_recording()
+        self._recorder = recorder.DccRecorder(file_path)
+
+        return self._recorder
+
+    def stop_recording(self):
+        """
+        Stops recording the requests sent to the server and closes the recording file
+        """
+
+        if self._connection:
+            return self._connection.stop_recording()
+
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def release_shared_memory(self, *shared_arrays):
+        """
+        Releases given arrays received through shared memory, so their segments are removed. Arrays can also be
+        released one by one (SharedArray.release), but this way the server is notified once for all of them
+        :param shared_arrays: list(sharedmemory.SharedArray)
+        :return: bool
+        """
+
+        for shared_array in shared_arrays:
+            shared_array.release(notify=False)
+
+        cmd = {
+            'cmd': 'release_shared_memory',
+            'names': [shared_array.name for shared_array in shared_arrays]
+        }
+
+        reply = self.send(cmd)
+
+        return self.is_valid_reply(reply)
+
+    def release_handles(self, *handles):
+        """
+        Releases given DCC object handles, so the server does not keep referencing their objects
+        :param handles: list(protocol.Handle)
+        :return: bool
+        """
+
+        handle_ids = [handle.id for handle in handles if isinstance(handle, protocol.Handle)]
+        if not handle_ids:
+            return True
+
+        cmd = {
+            'cmd': 'release_handles',
+            'ids': handle_ids
+        }
+
+        reply = self.send(cmd)
+
+        return self.is_valid_reply(reply)
+
+    def ping(self):
+        cmd = {
+            'cmd': 'ping'
+        }
+
+        reply = self.send(cmd)
+
+        if not self.is_valid_reply(reply):
             return False
 
-        module_name = 'tpDcc.dccs.{}.loader'.format(dcc_name)
-        try:
-            mod = pkgutil.get_loader(module_name)
-        except Exception:
-            try:
-                self._status = {
-                    'msg': 'Error while connecting to Dcc: update dcc paths ...', 'severity': self.Status.ERROR}
-                LOGGER.error('FAILED IMPORT: {} -> {}'.format(str(module_name), str(traceback.format_exc())))
-                return False
-            except Exception:
-                self._status = {
-                    'msg': 'Error while connecting to Dcc: update dcc paths ...', 'severity': self.Status.ERROR}
-                LOGGER.error('FAILED IMPORT: {}'.format(module_name))
-                return False
-        if not mod:
-            msg = 'Impossible to import DCC specific module: {} ({})'.format(module_name, dcc_name)
-            LOGGER.warning(msg)
-            self._status = {'msg': msg, 'severity': self.Status.WARNING}
+        return True
+
+    def update_paths(self):
+
+        paths_to_update = self._get_paths_to_update()
+
+        cmd = {
+            'cmd': 'update_paths',
+            # NOTE: The order is SUPER important, we must load the modules in the client in the same order
+            'paths': OrderedDict(paths_to_update)
+        }
+
+        reply_dict = self.send(cmd)
+
+        if not self.is_valid_reply(reply_dict):
+            self._status = {'msg': 'Error while connecting to Dcc: update paths ...', 'level': self.Status.ERROR}
+            return False, None
+
+        exe = reply_dict.get('exe', None)
+
+        return reply_dict['success'], exe
+
+    def update_dcc_paths(self, dcc_executable):
+        dcc_paths = self._get_dcc_paths_to_update(dcc_executable)
+        if not dcc_paths:
             return False
 
         cmd = {
             'cmd': 'update_dcc_paths',
-            'paths': OrderedDict({
-                'tpDcc.dccs.{}'.format(dcc_name): path_utils.clean_path(
-                    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(mod.get_filename())))))
-            })
+            'paths': dcc_paths
         }
 
         reply_dict = self.send(cmd)
@@ -540,6 +1423,8 @@ class DccClient(object):
         cmd = {
             'cmd': 'get_dcc_info'
         }
+        if self.COMPRESSION and self._binary_protocol:
+            cmd['compression'] = [protocol.COMPRESSION_ZLIB]
 
         reply_dict = self.send(cmd)
 
@@ -547,6 +1432,8 @@ class DccClient(object):
             self._status = {'msg': 'Error while connecting to Dcc: get dcc info ...', 'level': self.Status.ERROR}
             return None, None, None
 
+        self._compression = reply_dict.get('compression', None) == protocol.COMPRESSION_ZLIB
+
         return reply_dict['name'], reply_dict['version'], reply_dict['pid']
 
     def select_node(self, node, **kwargs):
@@ -563,10 +1450,19 @@ class DccClient(object):
 
         return reply_dict['success']
 
-    def selected_nodes(self, full_path=True):
+    def selected_nodes(self, full_path=True, as_handles=False):
+        """
+        Returns selected nodes in current DCC scene
+        :param full_path: bool
+        :param as_handles: bool, whether to return handles of the nodes (protocol.Handle) instead of their names.
+            Handles can be sent back to the server instead of long node names
+        :return: list
+        """
+
         cmd = {
             'cmd': 'selected_nodes',
-            'full_path': full_path
+            'full_path': full_path,
+            'as_handles': as_handles
         }
 
         reply_dict = self.send(cmd)
@@ -636,35 +1532,835 @@ class DccClient(object):
 
         return reply_dict['success']
 
-    def get_status_message(self):
-        return self._status.get('msg', '')
+    def _send_command(self, cmd, args, kwargs):
+        """
+        Internal function that sends given command to the server and returns its result. Used by stub methods
+        :param cmd: str
+        :param args: list
+        :param kwargs: dict
+        :return: object, command result; False if command failed
+        """
 
-    def get_status_level(self):
-        return self._status.get('level', self.Status.UNKNOWN)
+        if self._batch is not None:
+            return self._batch.add(cmd, args, kwargs)
 
-    def set_status(self, status_message, status_level):
-        self._status = {
-            'msg': str(status_message), 'level': status_level
+        cmd_dict = {
+            'cmd': cmd,
+            'args': args
         }
+        cmd_dict.update(kwargs)
+        reply_dict = self.send(cmd_dict)
+        if not self.is_valid_reply(reply_dict):
+            return False
 
-    def _get_paths_to_update(self):
+        return reply_dict['result']
+
+    def _create_command(self, cmd):
         """
-        Internal function that returns all the paths that DCC server should include to properly work with the client
+        Internal function that returns a function that sends given command with the arguments it is called with
+        :param cmd: str
+        :return: fn
         """
 
-        return {
-            'tpDcc.loader': path_utils.clean_path(os.path.dirname(os.path.dirname(tpDcc.loader.__file__))),
-            'tpDcc.config': path_utils.clean_path(
-                os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.config.__file__)))),
-            'tpDcc.libs.python': path_utils.clean_path(
-                os.path.dirname(
-                    os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.python.__file__))))),
-            'tpDcc.libs.resources': path_utils.clean_path(
-                os.path.dirname(
-                    os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.resources.__file__))))),
-            'tpDcc.libs.qt.loader': path_utils.clean_path(
-                os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(tpDcc.libs.qt.loader.__file__)))))
+        # Commands can be stored in the client, so we do not keep a reference to it
+        client_ref = weakref.ref(self)
+
+        def _command(*args, **kwargs):
+            return client_ref()._send_command(cmd, list(args), kwargs)
+
+        _command.__name__ = str(cmd)
+
+        return _command
+
+    def _update_stub_commands(self):
+        """
+        Internal function that makes the stub methods of the commands the server does not execute with a DCC function
+        send their arguments unchanged. Stub methods send arguments as the local DCC function defines them, which is
+        only valid if the server executes a DCC function with the same name. Until the server tells which commands are
+        DCC functions, all of them send their arguments unchanged
+        """
+
+        if self._server:
+            dcc_functions = self._server._get_dcc_functions()
+        else:
+            dcc_functions = self._get_connection()._dcc_functions or frozenset()
+
+        for cmd in _STUB_COMMANDS:
+            # Commands implemented by client classes are not stub methods, so they are kept
+            class_attr = next(klass.__dict__[cmd] for klass in type(self).__mro__ if cmd in klass.__dict__)
+            if cmd in dcc_functions or class_attr is not DccClientStub.__dict__[cmd]:
+                self.__dict__.pop(cmd, None)
+            elif cmd not in self.__dict__:
+                self.__dict__[cmd] = self._create_command(cmd)
+
+    def _get_connection(self):
+        """
+        Internal function that returns the client that owns the socket used to communicate with the server
+        :return: DccClient, shared connection if the client uses one; the client itself otherwise
+        """
+
+        return self._connection or self
+
+    def _init_session(self):
+        """
+        Internal function that initializes the DCC session of the connection and returns the info of the DCC
+        Paths are updated and DCC is initialized only once per connection, so clients sharing it skip the handshake
+        :return: tuple(str, str, int) or tuple(None, None, None), DCC name, version and process ID
+        """
+
+        if self._dcc_info is not None:
+            return self._dcc_info
+
+        if dcc.is_standalone():
+            success, dcc_exe = self.update_paths()
+            if not success:
+                return None, None, None
+
+            success = self.update_dcc_paths(dcc_exe)
+            if not success:
+                return None, None, None
+
+            success = self.init_dcc()
+            if not success:
+                return None, None, None
+
+        dcc_info = self.get_dcc_info()
+        if dcc_info[0]:
+            self._dcc_info = dcc_info
+
+        return dcc_info
+
+    def _connect_shared(self, port=-1):
+        """
+        Internal function that connects the client through the connection shared by all the tool clients of the
+        current thread connected to the same server. If there is no shared connection yet, a new one is created
+        :param port: int, port to connect to. If not given, DCCs running in the user machine are checked
+        :return: bool
+        """
+
+        if self._connection:
+            if self._connection.connected:
+                return True
+            self._release_connection()
+
+        connection = self._find_shared_connection(port)
+        if connection:
+            # Shared connections only reconnect by themselves in threads with a Qt event loop
+            if not connection.connected and connection._reconnect():
+                connection._stop_reconnect()
+        else:
+            connection = (self.CONNECTION_CLASS or type(self))(timeout=self._timeout, tool_id=self._tool_id)
+            for option_name in self._CONNECTION_OPTIONS:
+                setattr(connection, option_name, getattr(self, option_name))
+            connection._shared_clients = weakref.WeakSet()
+            if not connection.connect(port=port):
+                self._port = connection._port
+                self._status = dict(connection._status)
+                return False
+            connection._shared_connections = self._get_shared_connections()
+            connection._shared_connections[connection._port] = connection
+
+        connection._shared_clients.add(self)
+        self._connection = connection
+        self._scope_id = next(DccClient._scope_ids)
+        self._port = connection._port
+        self._status = dict(connection._status)
+        BaseDccClient._ports_cache[self._tool_id] = self._port
+        self._update_stub_commands()
+
+        return connection.connected
+
+    def _find_shared_connection(self, port=-1):
+        """
+        Internal function that returns the shared connection of the current thread the client should use
+        :param port: int, port to connect to. If not given, the port the tool was connected to before and the ports
+            of the DCCs running in the user machine are checked
+        :return: DccClient or None
+        """
+
+        shared_connections = self._get_shared_connections()
+        if not shared_connections:
+            return None
+
+        if port > 0:
+            ports = [port]
+        else:
+            cached_port = BaseDccClient._ports_cache.get(self._tool_id, None)
+            ports = [cached_port] if cached_port in shared_connections else list()
+            if not ports:
+                running_dccs = self._get_running_dccs(self._get_supported_dccs(tool_id=self._tool_id))
+                ports = [core_dcc.dcc_port(self.PORT, dcc_name=dcc_name) for dcc_name in running_dccs] + [self.PORT]
+
+        for found_port in ports:
+            connection = shared_connections.get(found_port, None)
+            if connection:
+                return connection
+
+        return None
+
+    def _get_shared_connections(self):
+        """
+        Internal function that returns the shared connections of the current thread
+        :return: dict(int, DccClient), shared connections mapped by server port
+        """
+
+        shared_connections = getattr(DccClient._thread_data, 'connections', None)
+        if shared_connections is None:
+            shared_connections = DccClient._thread_data.connections = dict()
+
+        return shared_connections
+
+    def _release_connection(self):
+        """
+        Internal function that detaches the client from the shared connection it uses. Shared connection is closed
+        once no client uses it
+        """
+
+        connection = self._connection
+        scope_id = self._scope_id
+        self._connection = None
+        self._scope_id = None
+        connection._shared_clients.discard(self)
+        if len(connection._shared_clients):
+            # Other clients keep using the connection, so we only remove the server state created by this one
+            if connection.connected and connection._binary_protocol:
+                try:
+                    connection._abandon_request(
+                        connection.send_request({'cmd': 'release_scope', protocol.SCOPE_KEY: scope_id}))
+                except Exception:
+                    LOGGER.debug('Impossible to release client scope {}: {}'.format(scope_id, traceback.format_exc()))
+            return
+
+        shared_connections = connection._shared_connections or dict()
+        if shared_connections.get(connection._port, None) is connection:
+            shared_connections.pop(connection._port)
+        connection.disconnect()
+
+    def _negotiate_protocol(self, switch_transport=True):
+        """
+        Internal function that negotiates with the server the framing, codecs and transport to use
+        Negotiation request is sent using legacy framing, so servers that do not support binary framing will reply
+        with an error and the client will keep using legacy framing with JSON codec
+        :param switch_transport: bool, whether client can switch to a faster transport offered by the server
+        :return: bool
+        """
+
+        # Negotiation is the first exchange of a new connection, so we make sure no state from a previous one is kept
+        self._binary_protocol = False
+        self._codecs = [protocol.Codecs.JSON]
+        self._compression = False
+        self._shared_memory = False
+        self._dcc_info = None
+        self._dcc_functions = None
+        self._recv_payload = None
+        self._recv_frame = None
+        self._recv_offset = 0
+        self._recv_chunks.clear()
+        self._pending_replies.clear()
+        self._abandoned_requests.clear()
+        self._request_commands.clear()
+        self._legacy_requests.clear()
+
+        cmd = {
+            'cmd': 'negotiate_protocol',
+            'version': protocol.PROTOCOL_VERSION,
+            'codecs': protocol.available_codecs(),
+            'shared_memory': bool(self.SHARED_MEMORY and sharedmemory.is_available())
         }
+        transports = transport.available_transports(self.TRANSPORTS)
+        if switch_transport and self._transport != transport.Transports.LOCAL and \
+                transport.Transports.LOCAL in transports:
+            cmd['transports'] = transports
+
+        try:
+            reply_dict = self.recv(self.send_request(cmd))
+        except Exception as exc:
+            LOGGER.debug('Error while negotiating protocol, using legacy protocol: {}'.format(exc))
+            return False
+        if not reply_dict or not reply_dict.get('success', False):
+            LOGGER.debug('Server does not support binary protocol, using legacy protocol')
+            return False
+
+        self._codecs = protocol.negotiate_codecs(reply_dict.get('codecs', list()))
+        self._shared_memory = bool(reply_dict.get('shared_memory', False))
+        self._dcc_functions = frozenset(reply_dict.get('dcc_functions', None) or list())
+        self._binary_protocol = True
+        for client in [self] + list(self._shared_clients or list()):
+            client._update_stub_commands()
+
+        local_address = (reply_dict.get('transports', None) or dict()).get(transport.Transports.LOCAL, None)
+        if switch_transport and local_address:
+            return self._switch_to_local_transport(local_address)
+
+        return True
+
+    def _switch_to_local_transport(self, address):
+        """
+        Internal function that moves the connection with the server to the local server with given address
+        If the local connection cannot be established, client keeps using current TCP connection
+        :param address: str
+        :return: bool, whether protocol negotiation was successful or not
+        """
+
+        try:
+            local_socket = transport.connect_local_socket(address, timeout=self.CONNECT_TIMEOUT)
+        except Exception as exc:
+            LOGGER.debug('Impossible to connect to local server "{}", using TCP transport: {}'.format(address, exc))
+            return True
+
+        tcp_socket = self._client_socket
+        self._set_client_socket(local_socket, transport.Transports.LOCAL)
+        if self._negotiate_protocol(switch_transport=False):
+            tcp_socket.close()
+            return True
+
+        LOGGER.debug('Error while negotiating protocol through local server "{}", using TCP transport'.format(address))
+        local_socket.close()
+        self._set_client_socket(tcp_socket, transport.Transports.TCP)
+
+        return self._negotiate_protocol(switch_transport=False)
+
+    def _get_cache_key(self, cmd_dict):
+        """
+        Internal function that returns the key used to cache the reply of the given command
+        :param cmd_dict: dict
+        :return: tuple(str, str) or None, None if the reply of the command cannot be cached
+        """
+
+        cmd = cmd_dict.get('cmd', None)
+        if self._cache is None or not self._get_connection()._binary_protocol or not is_cacheable_command(cmd):
+            return None
+
+        try:
+            return cmd, json.dumps(cmd_dict, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+    def _abandon_request(self, request_id):
+        """
+        Internal function that marks given request as abandoned, so its reply is discarded when it is received
+        :param request_id: int
+        """
+
+        self._abandoned_requests[request_id] = monotonic()
+
+    def _is_busy(self, ignore_request_id=None):
+        """
+        Internal function that returns whether the DCC is executing requests sent by the client
+        Abandoned requests whose reply is not received in HEARTBEAT_BUSY_TIMEOUT are not expected anymore (for example,
+        requests whose reply was lost when the stream was synchronized again), so they are not taken into account
+        :param ignore_request_id: int or None, ID of a request that should not be taken into account
+        :return: bool
+        """
+
+        if any(request_id != ignore_request_id for request_id in self._request_commands):
+            return True
+
+        expire_time = monotonic() - self.HEARTBEAT_BUSY_TIMEOUT
+
+        return any(abandon_time > expire_time for abandon_time in self._abandoned_requests.values())
+
+    def _process_events(self):
+        """
+        Internal function that processes the frames already received by the client socket without blocking
+        Events are handled and replies are stored, so they can be retrieved later
+        """
+
+        if self._connection:
+            return self._connection._process_events()
+
+        if not self._connected or not self._binary_protocol:
+            return
+
+        while self._wait_socket(0):
+            try:
+                connection_closed = not self._client_socket.recv(1, socket.MSG_PEEK)
+            except (OSError, ValueError):
+                connection_closed = True
+            if connection_closed:
+                self._on_connection_lost()
+                break
+            frame = self._read_frame()
+            if not frame:
+                # Frame is not complete yet, it will be read by the next recv call
+                break
+            self._dispatch_frame(frame)
+
+    def _dispatch_frame(self, frame):
+        """
+        Internal function that handles given received frame. Events are handled, replies of abandoned requests are
+        discarded and the rest of replies are stored until they are retrieved
+        :param frame: tuple(int, dict), request ID and decoded reply
+        """
+
+        frame_request_id, reply = frame
+        if frame_request_id == protocol.EVENT_REQUEST_ID:
+            self._handle_event(reply)
+            return
+
+        self._request_commands.pop(frame_request_id, None)
+        if self._recorder is not None:
+            self._recorder.finish_request(frame_request_id, reply.get('success', False))
+        if frame_request_id in self._abandoned_requests:
+            self._abandoned_requests.pop(frame_request_id)
+        else:
+            self._pending_replies[frame_request_id] = reply
+
+    def _set_client_socket(self, client_socket, transport_name):
+        """
+        Internal function that sets the socket used to communicate with the server. Socket is used in non blocking
+        mode and it is waited through a selector, so client never blocks more time than needed
+        :param client_socket: socket.socket
+        :param transport_name: str, transport used by the socket
+        """
+
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+
+        client_socket.setblocking(False)
+        self._client_socket = client_socket
+        self._transport = transport_name
+        if selectors:
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(client_socket, selectors.EVENT_READ)
+
+    def _close_client_socket(self):
+        """
+        Internal function that closes the socket used to communicate with the server
+        """
+
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+        if self._client_socket:
+            self._client_socket.close()
+
+    def _wait_socket(self, timeout, write=False):
+        """
+        Internal function that waits until client socket can be read or written
+        :param timeout: float, maximum time (in seconds) to wait. 0 returns immediately
+        :param write: bool, whether to wait until the socket can be written or read
+        :return: bool, True if the socket is ready; False if timeout was reached
+        """
+
+        if not self._selector:
+            readable, writable, _ = select.select(
+                [] if write else [self._client_socket], [self._client_socket] if write else [], [], timeout)
+            return bool(writable if write else readable)
+
+        if not write:
+            return bool(self._selector.select(timeout))
+
+        # Sending only waits when the socket buffer is full, which only happens with huge commands
+        self._selector.modify(self._client_socket, selectors.EVENT_WRITE)
+        try:
+            return bool(self._selector.select(timeout))
+        finally:
+            self._selector.modify(self._client_socket, selectors.EVENT_READ)
+
+    def _handle_event(self, event):
+        """
+        Internal function that handles given event pushed by the server
+        :param event: dict
+        """
+
+        event_name = event.get('event', None)
+        if event_name == protocol.Events.INVALIDATE_CACHE:
+            for client in [self] + list(self._shared_clients or list()):
+                client.clear_cache(event.get('commands', None))
+        elif event_name == protocol.Events.DCC_EVENT:
+            self.signals.dccEvent.emit(event.get('name', ''), event.get('args', None) or list())
+
+    def _reconnect(self):
+        """
+        Internal function that tries to connect again to the server the client was connected to, replaying the
+        handshake and the event subscriptions of the lost connection
+        :return: bool
+        """
+
+        if not self.connect(port=self._port):
+            return False
+        shared_clients = [client for client in self._shared_clients or list() if client._client_kwargs is not None]
+        if (self._client_kwargs is not None and self.update_client(**self._client_kwargs) is False) or (
+                shared_clients and not self._init_session()[0]):
+            self._connected = False
+            self.stop_heartbeat()
+            self._stop_events_notifier()
+            self._close_client_socket()
+            return False
+        for shared_client in shared_clients:
+            shared_client.update_client(**shared_client._client_kwargs)
+        for client in [self] + list(self._shared_clients or list()):
+            if client._subscriptions:
+                client.subscribe(*client._subscriptions)
+
+        return True
+
+    def _schedule_reconnect(self):
+        """
+        Internal function that schedules next reconnection attempt. Time between attempts grows exponentially
+        Only works if the client thread has a running Qt event loop
+        """
+
+        if not QThread.currentThread().eventDispatcher():
+            LOGGER.debug('Automatic reconnection is only available in threads with a Qt event loop')
+            return
+
+        if not self._reconnect_timer:
+            self._reconnect_timer = QTimer()
+            self._reconnect_timer.setSingleShot(True)
+            self._reconnect_timer.timeout.connect(self._on_reconnect_timeout)
+        delay = min(self.RECONNECT_DELAY * 2 ** self._reconnect_attempts, self.RECONNECT_MAX_DELAY)
+        self._reconnect_timer.start(int(delay * 1000))
+
+    def _stop_reconnect(self):
+        """
+        Internal function that cancels pending reconnection attempts
+        """
+
+        if self._reconnect_timer:
+            self._reconnect_timer.stop()
+        self._reconnect_attempts = 0
+
+    def _get_event_names(self, event_names):
+        """
+        Internal function that returns the names of given events
+        :param event_names: list(str or tuple), event names or DccCallbacks values
+        :return: list(str)
+        """
+
+        return [event_name[0] if isinstance(event_name, (list, tuple)) else event_name for event_name in event_names]
+
+    def _start_events_notifier(self):
+        """
+        Internal function that starts listening to client socket, so events pushed by the server are received as
+        soon as they arrive. Only works if the client thread has a running Qt event loop
+        """
+
+        # Socket notifiers only work in threads with a Qt event loop
+        if self._events_notifier or not QThread.currentThread().eventDispatcher():
+            return
+
+        self._events_notifier = QSocketNotifier(self._client_socket.fileno(), QSocketNotifier.Read)
+        self._events_notifier.activated.connect(self._on_events_received)
+
+    def _stop_events_notifier(self):
+        """
+        Internal function that stops listening to client socket
+        """
+
+        if not self._events_notifier:
+            return
+
+        self._events_notifier.setEnabled(False)
+        self._events_notifier.activated.disconnect()
+        self._events_notifier.deleteLater()
+        self._events_notifier = None
+
+    def _probe_ports(self, ports):
+        """
+        Internal function that tries to connect to all given ports at the same time using non blocking sockets
+        :param ports: list(int), ports sorted by preference
+        :return: tuple(int, socket.socket) or tuple(None, None), most preferred port with a listening server and
+            the socket connected to it
+        """
+
+        probes = OrderedDict()
+        for port in ports:
+            if port in probes:
+                continue
+            probe_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            probe_socket.setblocking(False)
+            error = probe_socket.connect_ex(('localhost', port))
+            if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                probe_socket.close()
+                continue
+            probes[port] = probe_socket
+
+        connected_ports = list()
+        pending_sockets = dict((probe_socket, port) for port, probe_socket in probes.items())
+        deadline = monotonic() + self.CONNECT_TIMEOUT
+        while pending_sockets:
+            remaining_time = deadline - monotonic()
+            if remaining_time <= 0:
+                break
+            _, writable, failed = select.select(
+                [], list(pending_sockets), list(pending_sockets), remaining_time)
+            for probe_socket in set(writable + failed):
+                port = pending_sockets.pop(probe_socket)
+                if probe_socket not in failed and not probe_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                    connected_ports.append(port)
+
+            # We stop waiting as soon as the most preferred port that can still answer is connected
+            pending_ports = set(pending_sockets.values())
+            best_port = next((port for port in probes if port in connected_ports or port in pending_ports), None)
+            if best_port in connected_ports:
+                break
+
+        found_port = next((port for port in probes if port in connected_ports), None)
+        for port, probe_socket in probes.items():
+            if port != found_port:
+                probe_socket.close()
+        if found_port is None:
+            return None, None
+
+        return found_port, probes[found_port]
+
+    def _send_frame(self, cmd_dict, request_id, priority=protocol.Priorities.NORMAL):
+        """
+        Internal function that encodes given command and sends it through the client socket
+        :param cmd_dict: dict
+        :param request_id: int
+        :param priority: int, protocol.Priorities value. Only used by binary frames
+        """
+
+        codec_id, cmd_data = protocol.encode_payload(cmd_dict, self._codecs if self._binary_protocol else None)
+        if self._recorder is not None:
+            self._recorder.start_request(request_id, cmd_dict.get('cmd', None), codec_id, cmd_data)
+
+        if self._binary_protocol:
+            flags = protocol.priority_flags(priority)
+            if self._compression:
+                cmd_data, compression_flags = protocol.compress_payload(cmd_data)
+                flags |= compression_flags
+            header = protocol.pack_header(codec_id, len(cmd_data), request_id=request_id, flags=flags)
+        else:
+            # Legacy frames do not store request ID, but server replies them in order
+            header = protocol.pack_legacy_header(len(cmd_data))
+            self._legacy_requests.append(request_id)
+
+        self._send_all(header + cmd_data)
+
+    def _send_all(self, data):
+        """
+        Internal function that sends all given data through the non blocking client socket
+        If the data cannot be sent in time, the stream is broken, so the connection is considered lost
+        :param data: bytes
+        """
+
+        data_view = memoryview(data)
+        deadline = monotonic() + self._timeout
+        while data_view:
+            try:
+                data_view = data_view[self._client_socket.send(data_view):]
+            except socket.error as exc:
+                error = getattr(exc, 'errno', None)
+                if error not in _WOULD_BLOCK_ERRORS:
+                    self._on_connection_lost()
+                    raise
+                remaining_time = deadline - monotonic()
+                if remaining_time <= 0 or not self._wait_socket(remaining_time, write=True):
+                    self._on_connection_lost()
+                    raise socket.error(errno.ETIMEDOUT, 'Timeout sending data to DCC server')
+
+    def _read_frame(self):
+        """
+        Internal function that reads available data from the client socket and returns next complete frame, if any
+        Payload is received directly into a buffer preallocated from the frame header, so it is copied and decoded
+        only once, no matter how many chunks it arrives in. Replies sent in chunk frames are joined before decoding
+        :return: tuple(int, dict) or None, request ID and decoded reply
+        """
+
+        while True:
+            if self._recv_payload is None:
+                header_size = protocol.HEADER_SIZE if self._binary_protocol else protocol.LEGACY_HEADER_SIZE
+                if not self._recv_into(memoryview(self._recv_header)[:header_size]):
+                    return None
+                header = self._recv_header[:header_size]
+                if self._binary_protocol:
+                    codec_id, flags, request_id, reply_length = protocol.unpack_header(header)
+                else:
+                    codec_id, flags, request_id = protocol.Codecs.JSON, 0, None
+                    reply_length = protocol.unpack_legacy_header(header)
+                self._recv_frame = (codec_id, flags, request_id)
+                self._recv_payload = bytearray(reply_length)
+
+            if not self._recv_into(memoryview(self._recv_payload)):
+                return None
+
+            payload = self._recv_payload
+            codec_id, flags, request_id = self._recv_frame
+            self._recv_payload = None
+            self._recv_frame = None
+            if flags & protocol.Flags.CHUNK:
+                self._recv_chunks.setdefault(request_id, list()).append(payload)
+                continue
+            break
+
+        if request_id is None:
+            request_id = self._legacy_requests.popleft() if self._legacy_requests else 0
+        chunks = self._recv_chunks.pop(request_id, None)
+        if chunks:
+            chunks.append(payload)
+            payload = bytearray().join(chunks)
+
+        reply = protocol.decode_payload(payload, codec_id, flags=flags)
+        if flags & protocol.Flags.SHARED_MEMORY:
+            reply = sharedmemory.import_arrays(reply, release_callback=self._on_shared_array_released)
+        if flags & protocol.Flags.HANDLES:
+            reply = protocol.import_handles(reply)
+
+        return request_id, reply
+
+    def _recv_into(self, buffer_view):
+        """
+        Internal function that receives data from the client socket into the given buffer until it is full
+        Received data is kept between calls, so a buffer can be filled across multiple calls
+        :param buffer_view: memoryview
+        :return: bool, True if the buffer is full; False otherwise
+        """
+
+        buffer_size = len(buffer_view)
+        if self._recv_offset < buffer_size:
+            try:
+                received = self._client_socket.recv_into(buffer_view[self._recv_offset:])
+            except socket.error as exc:
+                # No data available yet, caller waits for the socket to be readable
+                if getattr(exc, 'errno', None) in _WOULD_BLOCK_ERRORS:
+                    return False
+                self._on_connection_lost()
+                raise
+            # Sockets only receive nothing when server closes the connection
+            if not received:
+                self._on_connection_lost()
+                raise socket.error(errno.ECONNRESET, 'Connection with DCC server lost')
+            self._recv_offset += received
+            self._last_receive_time = monotonic()
+            if self._recv_offset < buffer_size:
+                return False
+
+        self._recv_offset = 0
+
+        return True
+
+    def _send_batch(self, batch):
+        """
+        Internal function that sends all the commands of the given batch and stores their replies
+        :param batch: DccBatch
+        """
+
+        if not len(batch):
+            return
+
+        if not self._server and not self.connected:
+            replies = list()
+            for command in batch.commands:
+                cmd_dict = dict(command['kwargs'])
+                cmd_dict['cmd'] = command['cmd']
+                cmd_dict['args'] = command['args']
+                replies.append(self.send(cmd_dict))
+        else:
+            reply_dict = self.send({'cmd': 'batch', 'commands': batch.commands})
+            if not self.is_valid_reply(reply_dict):
+                replies = [reply_dict] * len(batch)
+            else:
+                replies = reply_dict.get('result', None) or list()
+        batch.set_replies(replies)
+
+    # =================================================================================================================
+    # CALLBACKS
+    # =================================================================================================================
+
+    def _on_events_received(self, *args):
+        """
+        Internal callback function that is called when client socket receives data outside of a request
+        """
+
+        self._process_events()
+
+    def _on_shared_array_released(self, segment_name):
+        """
+        Internal callback function that is called when an array received through shared memory is released
+        Server is notified without waiting for its reply, so it stops tracking the segment
+        :param segment_name: str
+        """
+
+        if not self._connected:
+            return
+
+        try:
+            request_id = self.send_request({'cmd': 'release_shared_memory', 'names': [segment_name]})
+        except (OSError, socket.error) as exc:
+            LOGGER.debug('Impossible to notify release of shared memory segment "{}": {}'.format(segment_name, exc))
+            return
+        self._abandon_request(request_id)
+
+    def _on_heartbeat(self):
+        """
+        Internal callback function that is called periodically to check whether server is still alive
+        """
+
+        self._process_events()
+        if not self._connected:
+            return
+
+        # Only one ping is sent at a time. Server replies pings in the DCC main thread, so it cannot reply them while
+        # it executes long commands (such as opening a scene). While requests are in flight, the DCC is considered
+        # busy and it can take up to HEARTBEAT_BUSY_TIMEOUT to reply. Timeout restarts whenever data is received
+        if self._heartbeat_request is not None:
+            request_id, request_time = self._heartbeat_request
+            if self._pending_replies.pop(request_id, None) is None:
+                busy = self._is_busy(ignore_request_id=request_id)
+                heartbeat_timeout = self.HEARTBEAT_BUSY_TIMEOUT if busy else self.HEARTBEAT_TIMEOUT
+                if monotonic() - max(request_time, self._last_receive_time) > heartbeat_timeout:
+                    LOGGER.warning('DCC server did not reply to heartbeat in {} seconds'.format(heartbeat_timeout))
+                    self._on_connection_lost()
+                return
+            self._heartbeat_request = None
+
+        try:
+            self._heartbeat_request = (self.send_request({'cmd': 'ping'}), monotonic())
+        except socket.error:
+            self._on_connection_lost()
+
+    def _on_connection_lost(self):
+        """
+        Internal callback function that is called when the connection with the server is lost unexpectedly
+        """
+
+        if not self._connected:
+            return
+
+        LOGGER.warning('Connection with DCC server lost')
+        self._connected = False
+        self._heartbeat_request = None
+        if self._heartbeat_timer:
+            self._heartbeat_timer.stop()
+        self._stop_events_notifier()
+        try:
+            self._close_client_socket()
+        except Exception:
+            pass
+        self._recv_payload = None
+        self._recv_frame = None
+        self._recv_offset = 0
+        self._recv_chunks.clear()
+        self._pending_replies.clear()
+        self._abandoned_requests.clear()
+        self._request_commands.clear()
+        self._legacy_requests.clear()
+        self.signals.dccDisconnected.emit()
+
+        if self.RECONNECT:
+            self._schedule_reconnect()
+
+    def _on_reconnect_timeout(self):
+        """
+        Internal callback function that is called when next reconnection attempt must be done
+        """
+
+        if self._connected:
+            return
+
+        self._reconnect_attempts += 1
+        if not self._reconnect():
+            self._schedule_reconnect()
+            return
+
+        LOGGER.info('Reconnected to DCC server after {} attempts'.format(self._reconnect_attempts))
+        self._reconnect_attempts = 0
+        self.signals.dccReconnected.emit()
 
 
 class ExampleClient(DccClient, object):
@@ -20,6 +20,25 @@ class MoreThanOneObjectFoundError(DccError):
     pass
 
 
+class ProtocolError(DccError):
+    pass
+
+
+class RequestTimeoutError(DccError, RuntimeError):
+    def __init__(self, message, command=None, request_id=None):
+        super(RequestTimeoutError, self).__init__(message)
+        self._command = command
+        self._request_id = request_id
+
+    @property
+    def command(self):
+        return self._command
+
+    @property
+    def request_id(self):
+        return self._request_id
+
+
 class CommandCancel(DccError):
     def __init__(self, message, errors=None):
         super(CommandCancel, self).__init__(message)
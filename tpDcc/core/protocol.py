@@ -0,0 +1,680 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the wire protocol used by DCC client/server implementations
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import json
+import zlib
+import array
+import struct
+import logging
+import itertools
+from collections import OrderedDict, namedtuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from tpDcc.core import exceptions
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+PROTOCOL_VERSION = 2
+
+# Binary frames start with a magic value that can never be the first byte of a legacy ASCII header, so both framings
+# can be told apart by peeking the first bytes of the stream
+MAGIC = b'TP'
+HEADER_FORMAT = '!2sBBII'       # magic, codec id, flags, request id, payload length
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+LEGACY_HEADER_SIZE = 10
+MAX_REQUEST_ID = 0xFFFFFFFF
+EVENT_REQUEST_ID = 0            # Request ID used by frames pushed by the server that do not reply any request
+
+# Minimum number of items a numeric list must have to be sent as a raw typed buffer
+ARRAY_THRESHOLD = 64
+
+# Minimum size (in bytes) a payload must have to be compressed, smaller ones are not worth the CPU cost
+COMPRESSION_THRESHOLD = 64 * 1024
+COMPRESSION_LEVEL = 1
+COMPRESSION_ZLIB = 'zlib'
+
+# Key used to identify handles of DCC objects stored in the server handle table
+HANDLE_KEY = '__tpdcc_handle__'
+
+# Key of the requests that stores the scope of the tool that sent them, so tools sharing a connection do not share
+# their event subscriptions, cursors and handles in the server
+SCOPE_KEY = '__tpdcc_scope__'
+
+# Replies of bulk requests bigger than this size (in bytes) are sent in chunks, so other replies can be sent
+# between them
+CHUNK_SIZE = 256 * 1024
+
+# Position of the bits of the frame flags that store the priority of the request
+PRIORITY_SHIFT = 5
+
+
+# Information of a received frame needed to reply it
+FrameInfo = namedtuple('FrameInfo', ['codec_id', 'flags', 'request_id', 'binary'])
+
+
+class Flags(object):
+    COMPRESSED = 1 << 0
+    SHARED_MEMORY = 1 << 1      # Payload contains descriptors of shared memory segments
+    EVENT = 1 << 2              # Frame was pushed by the server and does not reply any request
+    HANDLES = 1 << 3            # Payload contains handles of DCC objects stored in the server
+    CANCEL = 1 << 4             # Frame cancels the request with the same request ID. Its payload is empty
+    PRIORITY = 3 << PRIORITY_SHIFT  # Bits that store the priority (Priorities) of the request
+    CHUNK = 1 << 7              # Frame is a chunk of a reply and more chunks of it follow
+
+
+class Priorities(object):
+    NORMAL = 0
+    INTERACTIVE = 1     # Short requests users wait for, such as selecting nodes. Never deferred by bulk requests
+    BULK = 2            # Long transfers, such as exports. Executed after queued requests and replied in chunks
+
+    # Normal and interactive requests are executed in the order they are received, so only bulk ones are reordered
+    ALL = (INTERACTIVE, NORMAL, BULK)
+
+
+class Events(object):
+    INVALIDATE_CACHE = 'invalidate_cache'
+    DCC_EVENT = 'dcc_event'             # DCC callback (tpDcc.core.dcc.DccCallbacks) triggered in the DCC
+
+
+class Handle(dict):
+    """
+    Reference to a DCC object stored in the handle table of the server connection. Handles are sent instead of long
+    node names and the server resolves them back into DCC objects. Handles are dictionaries, so all codecs can
+    encode them without conversion
+    """
+
+    def __init__(self, handle_id):
+        super(Handle, self).__init__({HANDLE_KEY: handle_id})
+
+    def __hash__(self):
+        return hash((HANDLE_KEY, self.id))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.id)
+
+    @property
+    def id(self):
+        return self[HANDLE_KEY]
+
+
+class Codecs(object):
+    JSON = 0
+    MSGPACK = 1
+    TYPED_ARRAY = 2
+
+
+class Codec(object):
+    """
+    Base class for payload codecs. Codecs convert Python data into bytes and back
+    """
+
+    id = None
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        """
+        Returns whether codec can be used in current environment or not
+        :return: bool
+        """
+
+        return True
+
+    def encode(self, data, array_exporter=None):
+        """
+        Encodes given data into bytes
+        :param data: object
+        :param array_exporter: callable or None, function that can store large numeric arrays outside the payload
+            (such as sharedmemory.SegmentExporter). Codecs that do not extract arrays ignore it
+        :return: bytes or None, None if the codec cannot encode the given data
+        """
+
+        raise NotImplementedError('Codec {} does not implement encode function'.format(self.__class__.__name__))
+
+    def decode(self, payload, ordered=False):
+        """
+        Decodes given bytes
+        :param payload: bytes
+        :param ordered: bool, whether mappings should be decoded as OrderedDict instances or not
+        :return: object
+        """
+
+        raise NotImplementedError('Codec {} does not implement decode function'.format(self.__class__.__name__))
+
+
+class JsonCodec(Codec):
+
+    id = Codecs.JSON
+    name = 'json'
+
+    def encode(self, data, array_exporter=None):
+        return json.dumps(data).encode('utf-8')
+
+    def decode(self, payload, ordered=False):
+        # Payload is decoded as a whole, so multibyte characters split between received chunks are not a problem
+        if isinstance(payload, memoryview):
+            payload = payload.tobytes()
+        return json.loads(payload.decode('utf-8'), object_pairs_hook=OrderedDict if ordered else None)
+
+
+class MsgPackCodec(Codec):
+
+    id = Codecs.MSGPACK
+    name = 'msgpack'
+
+    @classmethod
+    def is_available(cls):
+        return msgpack is not None
+
+    def encode(self, data, array_exporter=None):
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload, ordered=False):
+        return msgpack.unpackb(
+            payload, raw=False, strict_map_key=False, object_pairs_hook=OrderedDict if ordered else None)
+
+
+class TypedArrayCodec(Codec):
+    """
+    Codec that extracts homogeneous numeric data from the data and sends it as raw little-endian buffers appended
+    after a JSON envelope. Payload layout: envelope length (4 bytes) + JSON envelope + buffers
+    Large numeric lists (including nested ones with a rectangular shape, such as matrices or lists of positions),
+    array.array and NumPy arrays are supported. Decoded values have the same type they had when encoded. NumPy arrays
+    are decoded as nested lists if NumPy is not available
+    Data without numeric arrays (such as lists of node names) is detected without copying it (has_arrays), so other
+    codecs encode it
+    """
+
+    id = Codecs.TYPED_ARRAY
+    name = 'typed_array'
+
+    ARRAY_KEY = '__tpdcc_array__'
+    ENVELOPE_FORMAT = '!I'
+    NUMPY_TYPECODES = 'bBhHiIlLqQfd'
+
+    class Kinds(object):
+        LIST = 'list'
+        ARRAY = 'array'
+        NUMPY = 'numpy'
+
+    @classmethod
+    def is_available(cls):
+        return sys.version_info[0] > 2
+
+    def encode(self, data, array_exporter=None):
+        if not has_arrays(data):
+            return None
+
+        buffers = list()
+        exported = list()
+        envelope = self._extract_arrays(data, buffers, [0], array_exporter, exported)
+        if not buffers and not exported:
+            return None
+
+        envelope_data = json.dumps(envelope).encode('utf-8')
+
+        return b''.join([struct.pack(self.ENVELOPE_FORMAT, len(envelope_data)), envelope_data] + buffers)
+
+    def decode(self, payload, ordered=False):
+        payload = memoryview(payload)
+        envelope_size = struct.calcsize(self.ENVELOPE_FORMAT)
+        envelope_length = struct.unpack(self.ENVELOPE_FORMAT, payload[:envelope_size])[0]
+        buffers = payload[envelope_size + envelope_length:]
+
+        def _object_pairs_hook(pairs):
+            if len(pairs) == 1 and pairs[0][0] == self.ARRAY_KEY:
+                return self._load_array(buffers, *pairs[0][1])
+            return OrderedDict(pairs) if ordered else dict(pairs)
+
+        envelope_data = bytes(payload[envelope_size:envelope_size + envelope_length]).decode('utf-8')
+
+        return json.loads(envelope_data, object_pairs_hook=_object_pairs_hook)
+
+    def _extract_arrays(self, value, buffers, offset, array_exporter=None, exported=None):
+        """
+        Internal function that recursively replaces numeric lists and arrays with array references
+        :param value: object
+        :param buffers: list(bytes), list where extracted raw buffers are stored
+        :param offset: list(int), single item list that stores current buffer offset
+        :param array_exporter: callable or None, function that returns the reference of the arrays it stores outside
+            the payload, or None if the array must be stored in the payload
+        :param exported: list or None, list where references returned by the array exporter are stored
+        :return: object
+        """
+
+        if isinstance(value, dict):
+            return OrderedDict(
+                (k, self._extract_arrays(v, buffers, offset, array_exporter, exported)) for k, v in value.items())
+        elif isinstance(value, (list, tuple)):
+            if len(value) >= ARRAY_THRESHOLD or (value and isinstance(value[0], (list, tuple))):
+                shape, flat_value = self._flatten(value)
+                if flat_value is not None and len(flat_value) >= ARRAY_THRESHOLD:
+                    values = to_array(flat_value)
+                    if values is not None:
+                        return self._store_values(
+                            values, shape, self.Kinds.LIST, buffers, offset, array_exporter, exported)
+            return [self._extract_arrays(v, buffers, offset, array_exporter, exported) for v in value]
+        elif isinstance(value, array.array):
+            return self._store_values(value, None, self.Kinds.ARRAY, buffers, offset, array_exporter, exported)
+        elif numpy is not None and isinstance(value, numpy.ndarray):
+            if value.dtype.char in self.NUMPY_TYPECODES:
+                values = numpy.ascontiguousarray(value, dtype=value.dtype.newbyteorder('=')).reshape(-1)
+                return self._store_values(
+                    values, list(value.shape), self.Kinds.NUMPY, buffers, offset, array_exporter, exported)
+            return self._extract_arrays(value.tolist(), buffers, offset, array_exporter, exported)
+
+        return value
+
+    def _store_values(self, values, shape, kind, buffers, offset, array_exporter=None, exported=None):
+        """
+        Internal function that stores given array with the array exporter, if it accepts it, or in the buffers
+        :param values: array.array or numpy.ndarray, flat values in native byte order
+        :param shape: list(int) or None
+        :param kind: str
+        :param buffers: list(bytes)
+        :param offset: list(int)
+        :param array_exporter: callable or None
+        :param exported: list or None
+        :return: dict
+        """
+
+        if array_exporter is not None:
+            array_ref = array_exporter(values, shape)
+            if array_ref is not None:
+                exported.append(array_ref)
+                return array_ref
+
+        if kind == self.Kinds.NUMPY:
+            typecode = values.dtype.char
+            values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+            return self._store_array(values.tobytes(), typecode, values.size, shape, kind, buffers, offset)
+
+        if sys.byteorder == 'big':
+            values = array.array(values.typecode, values)
+            values.byteswap()
+
+        return self._store_array(values.tobytes(), values.typecode, len(values), shape, kind, buffers, offset)
+
+    def _store_array(self, array_data, typecode, count, shape, kind, buffers, offset):
+        """
+        Internal function that stores given raw array data in the buffers and returns a reference to it
+        :param array_data: bytes
+        :param typecode: str
+        :param count: int, number of items of the array
+        :param shape: list(int) or None, shape of the array if it has more than one dimension
+        :param kind: str, type of the original value (list, array or numpy)
+        :param buffers: list(bytes)
+        :param offset: list(int)
+        :return: dict
+        """
+
+        array_ref = {self.ARRAY_KEY: [offset[0], count, typecode, shape, kind]}
+        buffers.append(array_data)
+        offset[0] += len(array_data)
+
+        return array_ref
+
+    def _load_array(self, buffers, offset, count, typecode, shape=None, kind=None):
+        """
+        Internal function that returns the value of the array stored in given buffers
+        :param buffers: memoryview
+        :param offset: int
+        :param count: int
+        :param typecode: str
+        :param shape: list(int) or None
+        :param kind: str or None
+        :return: list or array.array or numpy.ndarray
+        """
+
+        kind = kind or self.Kinds.LIST
+        if kind == self.Kinds.NUMPY and numpy is not None:
+            values = numpy.frombuffer(buffers, dtype=numpy.dtype(str(typecode)).newbyteorder('<'), count=count,
+                                      offset=offset)
+            return values.reshape(shape) if shape is not None else values
+
+        values = array.array(str(typecode))
+        values.frombytes(buffers[offset:offset + count * values.itemsize])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        if kind == self.Kinds.ARRAY:
+            return values
+
+        return self._reshape(values.tolist(), shape)
+
+    def _flatten(self, value):
+        """
+        Internal function that flattens given nested lists if all of them have the same length
+        :param value: list
+        :return: tuple(list(int), list) or tuple(None, None), shape of the nested lists and flattened values.
+            Shape is None if given list is not nested
+        """
+
+        shape = list()
+        item = value
+        while isinstance(item, (list, tuple)):
+            if not item:
+                return None, None
+            shape.append(len(item))
+            item = item[0]
+        if type(item) not in (int, float):
+            return None, None
+        if len(shape) == 1:
+            return None, value
+
+        flat_value = value
+        for size in shape[1:]:
+            if not all(isinstance(item, (list, tuple)) and len(item) == size for item in flat_value):
+                return None, None
+            flat_value = list(itertools.chain.from_iterable(flat_value))
+
+        return shape, flat_value
+
+    def _reshape(self, values, shape):
+        """
+        Internal function that converts given flat values into nested lists with the given shape
+        :param values: list
+        :param shape: list(int) or None
+        :return: list
+        """
+
+        if not shape:
+            return values
+
+        for size in reversed(shape[1:]):
+            values = [values[i:i + size] for i in range(0, len(values), size)]
+
+        return values
+
+
+_CODECS = OrderedDict()
+
+
+def register_codec(codec_class):
+    """
+    Registers given codec class
+    :param codec_class: type, Codec subclass
+    """
+
+    if not codec_class.is_available():
+        LOGGER.debug('Codec "{}" is not available in current environment'.format(codec_class.name))
+        return
+
+    _CODECS[codec_class.id] = codec_class()
+
+
+def get_codec(codec_id):
+    """
+    Returns registered codec with given ID
+    :param codec_id: int
+    :return: Codec
+    """
+
+    codec = _CODECS.get(codec_id, None)
+    if not codec:
+        raise exceptions.ProtocolError('Codec with ID {} is not available'.format(codec_id))
+
+    return codec
+
+
+def available_codecs():
+    """
+    Returns IDs of all available codecs sorted by preference
+    :return: list(int)
+    """
+
+    return list(_CODECS.keys())
+
+
+def negotiate_codecs(requested_codecs):
+    """
+    Returns the IDs of the codecs that are available both locally and in the given list
+    JSON codec is always available, so it can be used as fallback
+    :param requested_codecs: list(int)
+    :return: list(int)
+    """
+
+    negotiated_codecs = [codec_id for codec_id in available_codecs() if codec_id in (requested_codecs or list())]
+    if Codecs.JSON not in negotiated_codecs:
+        negotiated_codecs.append(Codecs.JSON)
+
+    return negotiated_codecs
+
+
+def encode_payload(data, codecs=None, array_exporter=None):
+    """
+    Encodes given data with the most efficient codec of the given ones
+    :param data: object
+    :param codecs: list(int) or None, codecs that can be used. If not given, only JSON codec is used
+    :param array_exporter: callable or None, function that stores large numeric arrays outside the payload. Only used
+        by codecs that extract arrays
+    :return: tuple(int, bytes), ID of the used codec and encoded data
+    """
+
+    for codec_id in codecs or list():
+        if codec_id == Codecs.JSON or codec_id not in _CODECS:
+            continue
+        payload = _CODECS[codec_id].encode(data, array_exporter=array_exporter)
+        if payload is not None:
+            return codec_id, payload
+
+    return Codecs.JSON, _CODECS[Codecs.JSON].encode(data)
+
+
+def decode_payload(payload, codec_id=Codecs.JSON, ordered=False, flags=0):
+    """
+    Decodes given bytes using the codec with given ID
+    :param payload: bytes
+    :param codec_id: int
+    :param ordered: bool
+    :param flags: int, frame flags. Used to know whether payload is compressed or not
+    :return: object
+    """
+
+    if flags & Flags.COMPRESSED:
+        payload = zlib.decompress(payload)
+
+    return get_codec(codec_id).decode(payload, ordered=ordered)
+
+
+def to_array(value):
+    """
+    Converts given list into an array if all its items share the same numeric type
+    :param value: list
+    :return: array.array or None, array in native byte order
+    """
+
+    value_types = set(map(type, value))
+    if value_types == {float}:
+        typecode = 'd'
+    elif value_types == {int}:
+        typecode = 'q'
+    else:
+        return None
+
+    try:
+        return array.array(typecode, value)
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def has_arrays(value):
+    """
+    Returns whether given data may contain numeric arrays that can be sent as raw buffers
+    Data is never copied and lists are expected to be homogeneous, so only the first item of lists of scalars is
+    checked. This way, lists of node names are discarded without iterating them
+    :param value: object
+    :return: bool
+    """
+
+    if isinstance(value, dict):
+        return any(has_arrays(v) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            return False
+        count = len(value)
+        item = value[0]
+        while isinstance(item, (list, tuple)) and item:
+            count *= len(item)
+            item = item[0]
+        if type(item) in (int, float):
+            return count >= ARRAY_THRESHOLD
+        if isinstance(item, (dict, list, tuple, array.array)) or (
+                numpy is not None and isinstance(item, numpy.ndarray)):
+            return any(has_arrays(v) for v in value)
+        return False
+    elif isinstance(value, array.array):
+        return True
+    elif numpy is not None and isinstance(value, numpy.ndarray):
+        return True
+
+    return False
+
+
+def is_handle(value):
+    """
+    Returns whether given value is a DCC object handle or not
+    :param value: object
+    :return: bool
+    """
+
+    return isinstance(value, dict) and len(value) == 1 and HANDLE_KEY in value
+
+
+def import_handles(value):
+    """
+    Recursively replaces decoded handles of given data with Handle instances
+    :param value: object
+    :return: object
+    """
+
+    if isinstance(value, dict):
+        if is_handle(value):
+            return Handle(value[HANDLE_KEY])
+        for k, v in value.items():
+            value[k] = import_handles(v)
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            value[i] = import_handles(v)
+
+    return value
+
+
+def compress_payload(payload, threshold=COMPRESSION_THRESHOLD):
+    """
+    Compresses given encoded payload if it is big enough and compression reduces its size
+    :param payload: bytes
+    :param threshold: int, minimum size (in bytes) payload must have to be compressed
+    :return: tuple(bytes, int), payload and flags that must be set in the frame header
+    """
+
+    if len(payload) < threshold:
+        return payload, 0
+
+    compressed_payload = zlib.compress(payload, COMPRESSION_LEVEL)
+    if len(compressed_payload) >= len(payload):
+        return payload, 0
+
+    return compressed_payload, Flags.COMPRESSED
+
+
+def priority_flags(priority):
+    """
+    Returns frame flags that store given request priority
+    :param priority: int, Priorities value
+    :return: int
+    """
+
+    return (priority << PRIORITY_SHIFT) & Flags.PRIORITY
+
+
+def get_priority(flags):
+    """
+    Returns request priority stored in given frame flags
+    :param flags: int
+    :return: int, Priorities value
+    """
+
+    priority = (flags & Flags.PRIORITY) >> PRIORITY_SHIFT
+
+    return priority if priority in Priorities.ALL else Priorities.NORMAL
+
+
+def pack_header(codec_id, payload_length, request_id=0, flags=0):
+    """
+    Returns binary frame header
+    :param codec_id: int
+    :param payload_length: int
+    :param request_id: int, ID used to match replies with their requests
+    :param flags: int
+    :return: bytes
+    """
+
+    return struct.pack(HEADER_FORMAT, MAGIC, codec_id, flags, request_id, payload_length)
+
+
+def unpack_header(header):
+    """
+    Parses given binary frame header
+    :param header: bytes
+    :return: tuple(int, int, int, int), codec id, flags, request id and payload length
+    """
+
+    magic, codec_id, flags, request_id, payload_length = struct.unpack(HEADER_FORMAT, bytes(header))
+    if magic != MAGIC:
+        raise exceptions.ProtocolError('Invalid frame header: {}'.format(header))
+
+    return codec_id, flags, request_id, payload_length
+
+
+def is_binary_header(header):
+    """
+    Returns whether given header bytes belong to a binary frame or to a legacy one
+    :param header: bytes
+    :return: bool
+    """
+
+    return bytes(header[:len(MAGIC)]) == MAGIC
+
+
+def pack_legacy_header(payload_length):
+    """
+    Returns legacy ASCII frame header
+    :param payload_length: int
+    :return: bytes
+    """
+
+    return '{0}'.format(payload_length).zfill(LEGACY_HEADER_SIZE).encode()
+
+
+def unpack_legacy_header(header):
+    """
+    Parses given legacy ASCII frame header
+    :param header: bytes
+    :return: int, payload length
+    """
+
+    try:
+        return int(bytes(header).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise exceptions.ProtocolError('Invalid frame header: {}'.format(header))
+
+
+register_codec(TypedArrayCodec)
+register_codec(MsgPackCodec)
+register_codec(JsonCodec)
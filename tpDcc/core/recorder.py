@@ -0,0 +1,170 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the recorder of the requests DCC clients send to the server. Each request is stored with its
+encoded payload and its timing, so recorded sessions can be analyzed and replayed against a server
+(tpDcc.core.replay)
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import time
+import struct
+import logging
+from collections import namedtuple
+
+from tpDcc.core import exceptions
+
+if sys.version_info[0] == 2:
+    monotonic = time.time
+else:
+    monotonic = time.monotonic
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+RECORDING_MAGIC = b'TPREC'
+RECORDING_VERSION = 1
+RECORDING_HEADER_FORMAT = '!5sB'    # magic, version
+RECORD_FORMAT = '!dfIBBH'           # start time, latency, payload length, codec id, success, command name length
+RECORDING_HEADER_SIZE = struct.calcsize(RECORDING_HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Request stored in a recording. Time is relative to the start of the recording and latency is negative if the
+# request was not replied before the recording was stopped
+RecordedRequest = namedtuple('RecordedRequest', ['time', 'latency', 'cmd', 'codec_id', 'payload', 'success'])
+
+
+class DccRecorder(object):
+    """
+    Class that writes the requests sent by a client, with their timing, into a recording file:
+        client.start_recording('session.tprec')
+        ...
+        client.stop_recording()
+    """
+
+    def __init__(self, file_path):
+        super(DccRecorder, self).__init__()
+
+        self._file_path = file_path
+        self._file = open(file_path, 'wb')
+        self._file.write(struct.pack(RECORDING_HEADER_FORMAT, RECORDING_MAGIC, RECORDING_VERSION))
+        self._start_time = monotonic()
+        self._requests = dict()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def start_request(self, request_id, cmd, codec_id, payload):
+        """
+        Stores given request until its reply is received
+        :param request_id: int
+        :param cmd: str, name of the command
+        :param codec_id: int, codec used to encode the payload
+        :param payload: bytes, encoded request
+        """
+
+        if self._file is None:
+            return
+
+        self._requests[request_id] = (monotonic(), cmd, codec_id, bytes(payload))
+
+    def finish_request(self, request_id, success=True):
+        """
+        Writes the request with given ID into the recording, once its reply is received
+        :param request_id: int
+        :param success: bool, whether the command was executed successfully or not
+        """
+
+        request = self._requests.pop(request_id, None)
+        if not request or self._file is None:
+            return
+
+        start_time, cmd, codec_id, payload = request
+        self._write(start_time - self._start_time, monotonic() - start_time, cmd, codec_id, payload, success)
+
+    def close(self):
+        """
+        Writes the requests that were not replied yet and closes the recording file
+        """
+
+        if self._file is None:
+            return
+
+        for start_time, cmd, codec_id, payload in sorted(self._requests.values(), key=lambda request: request[0]):
+            self._write(start_time - self._start_time, -1.0, cmd, codec_id, payload, False)
+        self._requests.clear()
+        self._file.close()
+        self._file = None
+
+    # =================================================================================================================
+    # INTERNAL
+    # =================================================================================================================
+
+    def _write(self, request_time, latency, cmd, codec_id, payload, success):
+        """
+        Internal function that writes a request record into the recording file
+        :param request_time: float, time (in seconds) since the recording started
+        :param latency: float, time (in seconds) the client waited for the reply
+        :param cmd: str
+        :param codec_id: int
+        :param payload: bytes
+        :param success: bool
+        """
+
+        cmd_name = (cmd or '').encode('utf-8')
+        self._file.write(struct.pack(
+            RECORD_FORMAT, request_time, latency, len(payload), codec_id, bool(success), len(cmd_name)))
+        self._file.write(cmd_name)
+        self._file.write(payload)
+        self._count += 1
+
+
+def read_recording(file_path):
+    """
+    Returns the requests stored in given recording file sorted by the time they were sent
+    :param file_path: str
+    :return: list(RecordedRequest)
+    :raises exceptions.ProtocolError: if the file is not a valid recording
+    """
+
+    requests = list()
+    with open(file_path, 'rb') as recording_file:
+        header = recording_file.read(RECORDING_HEADER_SIZE)
+        if len(header) < RECORDING_HEADER_SIZE:
+            raise exceptions.ProtocolError('Invalid recording file: {}'.format(file_path))
+        magic, version = struct.unpack(RECORDING_HEADER_FORMAT, header)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise exceptions.ProtocolError('Invalid recording file: {}'.format(file_path))
+
+        while True:
+            record = recording_file.read(RECORD_SIZE)
+            if len(record) < RECORD_SIZE:
+                break
+            request_time, latency, payload_length, codec_id, success, cmd_length = struct.unpack(RECORD_FORMAT, record)
+            cmd = recording_file.read(cmd_length).decode('utf-8')
+            payload = recording_file.read(payload_length)
+            if len(payload) < payload_length:
+                LOGGER.warning('Recording file "{}" is truncated'.format(file_path))
+                break
+            requests.append(RecordedRequest(request_time, latency, cmd, codec_id, payload, bool(success)))
+
+    return sorted(requests, key=lambda request: request.time)
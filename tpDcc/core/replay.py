@@ -0,0 +1,217 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the load generator that replays recordings of DCC client requests (tpDcc.core.recorder)
+Recorded requests are sent again by concurrent virtual clients, keeping their recorded pace or accelerating it, and
+the latency of each command is reported. If no DCC is running, a stand-in server that replies to any command can be
+started, so recordings can be replayed without a DCC
+Usage: python -m tpDcc.core.replay session.tprec [--port 17344] [--speed 1.0] [--clients 1] [--server]
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import time
+import argparse
+import logging
+import threading
+from collections import OrderedDict
+
+from Qt.QtCore import QCoreApplication, QTimer
+
+from tpDcc.core import protocol, recorder, exceptions
+from tpDcc.core.server import DccServer
+from tpDcc.core.client import DccClient, monotonic
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+# Commands sent by clients while connecting. Virtual clients negotiate the protocol by themselves when they connect,
+# and DCC session is already initialized by the recorded client, so they are not replayed
+_CONNECTION_COMMANDS = ('negotiate_protocol', 'update_paths', 'update_dcc_paths', 'init_dcc')
+
+
+class StandInServer(DccServer):
+    """
+    DCC server that replies successfully to any command without executing it, so recordings can be replayed without
+    a running DCC. If command latencies are given, commands block the server the given time, as the DCC would do
+    Paths of the clients are not added to the server and DCC session is never initialized, so tools can connect to it
+    """
+
+    def __init__(self, parent=None, latencies=None):
+        self._latencies = latencies or dict()
+
+        super(StandInServer, self).__init__(parent, update_paths=False)
+
+    def _init_dcc(self, data, reply):
+        reply['success'] = True
+
+    def _process_command(self, command_name, data_dict, reply_dict):
+        latency = self._latencies.get(command_name, None)
+        if latency:
+            time.sleep(latency)
+
+        reply_dict['result'] = None
+        reply_dict['success'] = True
+
+
+def get_command_latencies(requests):
+    """
+    Returns the median latency of each command of the given recorded requests
+    :param requests: list(recorder.RecordedRequest)
+    :return: dict(str, float)
+    """
+
+    latencies = dict()
+    for request in requests:
+        if request.latency >= 0:
+            latencies.setdefault(request.cmd, list()).append(request.latency)
+
+    return dict((cmd, sorted(values)[len(values) // 2]) for cmd, values in latencies.items())
+
+
+def replay_session(requests, port, speed=1.0, timeout=20):
+    """
+    Sends given recorded requests, one after another, to the server listening in given port
+    Time between requests is divided by given speed. Requests are never sent before the previous one is replied
+    :param requests: list(recorder.RecordedRequest)
+    :param port: int
+    :param speed: float, replay speed. 0 sends the requests as fast as possible
+    :param timeout: float, maximum time (in seconds) to wait for each reply
+    :return: list(tuple(str, float, bool)), command, latency (in seconds) and success of each request. Latency is
+        negative if the request timed out
+    """
+
+    results = list()
+    client = DccClient(timeout=timeout)
+    if not client.connect(port=port):
+        LOGGER.error('Impossible to connect virtual client to port {}'.format(port))
+        return results
+
+    start_time = monotonic()
+    try:
+        for request in requests:
+            if request.cmd in _CONNECTION_COMMANDS:
+                continue
+            if speed > 0:
+                wait_time = start_time + request.time / speed - monotonic()
+                if wait_time > 0:
+                    time.sleep(wait_time)
+            cmd_dict = protocol.decode_payload(request.payload, request.codec_id)
+            request_time = monotonic()
+            try:
+                reply = client.recv(client.send_request(cmd_dict))
+            except exceptions.RequestTimeoutError:
+                results.append((request.cmd, -1.0, False))
+                continue
+            results.append((request.cmd, monotonic() - request_time, bool(reply.get('success', False))))
+    except Exception as exc:
+        LOGGER.error('Virtual client stopped: {}'.format(exc))
+    finally:
+        client.disconnect()
+
+    return results
+
+
+def replay(requests, port, speed=1.0, clients=1, timeout=20):
+    """
+    Replays given recorded requests with the given number of concurrent virtual clients
+    :param requests: list(recorder.RecordedRequest)
+    :param port: int
+    :param speed: float, replay speed. 0 sends the requests as fast as possible
+    :param clients: int, number of virtual clients
+    :param timeout: float, maximum time (in seconds) to wait for each reply
+    :return: list(tuple(str, float, bool)), results of all virtual clients
+    """
+
+    results = list()
+
+    def _run():
+        results.extend(replay_session(requests, port, speed=speed, timeout=timeout))
+
+    threads = [threading.Thread(target=_run) for _ in range(max(clients, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def summarize(requests, results):
+    """
+    Returns the report of the latencies of each command in the recording and in the replay
+    :param requests: list(recorder.RecordedRequest)
+    :param results: list(tuple(str, float, bool)), replay results
+    :return: str
+    """
+
+    recorded = get_command_latencies(requests)
+    commands = OrderedDict()
+    for cmd, latency, success in sorted(results, key=lambda result: result[0]):
+        command = commands.setdefault(cmd, {'calls': 0, 'latencies': list(), 'errors': 0})
+        command['calls'] += 1
+        if latency >= 0:
+            command['latencies'].append(latency)
+        if not success:
+            command['errors'] += 1
+
+    def _format(latency):
+        return '{:>7.2f} ms'.format(latency * 1e3) if latency >= 0 else '{:>10}'.format('-')
+
+    lines = ['{:<32} | {:>6} | {:>6} | {:>10} | {:>10} | {:>10} | {:>10}'.format(
+        'command', 'calls', 'errors', 'recorded', 'p50', 'p95', 'max')]
+    for cmd, command in commands.items():
+        latencies = sorted(command['latencies']) or [-1.0]
+        lines.append('{:<32} | {:>6} | {:>6} | {} | {} | {} | {}'.format(
+            cmd[:32], command['calls'], command['errors'], _format(recorded.get(cmd, -1.0)),
+            _format(latencies[len(latencies) // 2]),
+            _format(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]), _format(latencies[-1])))
+
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays recorded DCC client requests against a DCC server')
+    parser.add_argument('recording', help='recording file created with DccClient.start_recording')
+    parser.add_argument('--port', type=int, default=DccServer.PORT, help='port the DCC server listens in')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed. 0 replays as fast as possible')
+    parser.add_argument('--clients', type=int, default=1, help='number of concurrent virtual clients')
+    parser.add_argument('--timeout', type=float, default=20, help='maximum time (in seconds) to wait for replies')
+    parser.add_argument('--server', action='store_true', help='starts a stand-in server instead of using a DCC')
+    parser.add_argument(
+        '--simulate-latency', action='store_true', help='stand-in server takes the recorded time of each command')
+    args = parser.parse_args()
+
+    requests = recorder.read_recording(args.recording)
+    print('Replaying {} requests with {} virtual clients at {} speed'.format(
+        len(requests), args.clients, '{}x'.format(args.speed) if args.speed > 0 else 'max'))
+
+    if not args.server:
+        results = replay(requests, args.port, speed=args.speed, clients=args.clients, timeout=args.timeout)
+        print(summarize(requests, results))
+        return
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    StandInServer.PORT = args.port
+    server = StandInServer(latencies=get_command_latencies(requests) if args.simulate_latency else None)
+    results = list()
+
+    def run():
+        results.extend(replay(requests, server._port, speed=args.speed, clients=args.clients, timeout=args.timeout))
+
+    replay_thread = threading.Thread(target=run)
+    replay_thread.start()
+
+    # Server must process requests in main thread, so we wait for the replay processing Qt events
+    timer = QTimer()
+    timer.timeout.connect(lambda: replay_thread.is_alive() or app.quit())
+    timer.start(50)
+    app.exec_()
+    server.close_connection()
+
+    print(summarize(requests, results))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
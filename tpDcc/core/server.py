@@ -13,43 +13,650 @@ import time
 import json
 import logging
 import inspect
+import itertools
+import threading
 import traceback
 import importlib
-from collections import OrderedDict
+from functools import partial
+from collections import deque
 
 try:
     import __builtin__      # Do not remove
 except ImportError:
     import builtins as __builtin__
 
-from Qt.QtCore import QObject, QByteArray
-from Qt.QtNetwork import QTcpServer, QHostAddress, QTcpSocket
+from Qt.QtCore import Qt, Signal, QObject, QThread, QTimer, QByteArray, QRunnable, QThreadPool
+from Qt.QtNetwork import QTcpServer, QHostAddress, QTcpSocket, QLocalServer, QLocalSocket
 
 from tpDcc import dcc
-from tpDcc.core import dcc as core_dcc
+from tpDcc.core import dcc as core_dcc, protocol, transport, sharedmemory, exceptions
+
+if sys.version_info[0] == 2:
+    from inspect import getargspec
+else:
+    from inspect import getfullargspec as getargspec
 
 LOGGER = logging.getLogger('tpDcc-core')
 
+# Connected state of all the socket types server connections can use
+CONNECTED_STATES = (QTcpSocket.ConnectedState, QLocalSocket.ConnectedState)
+
+
+def thread_safe(fn):
+    """
+    Decorator that marks a server command as thread safe. Thread safe commands are executed in the server worker
+    pool, so the DCC UI is not blocked while they run. Only pure Python commands that do not call DCC API should
+    be marked as thread safe
+    :param fn: fn
+    :return: fn
+    """
+
+    fn.thread_safe = True
+
+    return fn
+
+
+class DccServerSignals(QObject, object):
+    commandFinished = Signal(object, object, object)
+
+
+class DccServerCommandRunnable(QRunnable, object):
+    """
+    Runnable that executes a thread safe command in DccServer worker pool. Reply is posted back to the main thread
+    through a queued signal, because sockets can only be written from the thread they live in
+    """
+
+    def __init__(self, server, cmd, data_dict, reply, connection, frame, token=None, scope=None):
+        super(DccServerCommandRunnable, self).__init__()
+
+        self._server = server
+        self._cmd = cmd
+        self._data_dict = data_dict
+        self._reply = reply
+        self._connection = connection
+        self._frame = frame
+        self._token = token
+        self._scope = scope
+
+    def run(self):
+        self._server._run_command(
+            self._cmd, self._data_dict, self._reply, self._connection, self._token, self._scope)
+        self._server.signals.commandFinished.emit(self._reply, self._connection, self._frame)
+
+
+class DccServerCancellationToken(object):
+    """
+    Token that long running server functions can poll to know whether the client cancelled the command:
+        token = self._get_cancellation_token()
+        for node in nodes:
+            token.check()
+            ...
+    Server event loop does not run while commands are executed in main thread, so polling the token from them
+    checks whether the connection received cancel frames
+    """
+
+    POLL_INTERVAL = 0.05    # Minimum time (in seconds) between checks of the connection socket
+
+    def __init__(self, connection=None, request_id=None):
+        super(DccServerCancellationToken, self).__init__()
+
+        self._connection = connection
+        self._request_id = request_id
+        self._cancelled = threading.Event()
+        self._last_poll_time = 0.0
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def request_id(self):
+        return self._request_id
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def cancel(self):
+        """
+        Marks the command as cancelled
+        """
+
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        """
+        Returns whether client cancelled the command or not
+        :return: bool
+        """
+
+        if not self._cancelled.is_set() and self._connection and \
+                time.time() - self._last_poll_time >= self.POLL_INTERVAL:
+            self._last_poll_time = time.time()
+            self._connection.poll_cancel_requests()
+
+        return self._cancelled.is_set()
+
+    def check(self):
+        """
+        Raises CommandCancel exception if client cancelled the command
+        :raises exceptions.CommandCancel:
+        """
+
+        if self.is_cancelled():
+            raise exceptions.CommandCancel('Command cancelled by client')
+
+
+class DccServerScope(object):
+    """
+    Class that stores the state of the requests of one tool of a client connected to a DccServer. Tools that share
+    a connection send their requests with their own scope, so the event subscriptions, cursors and handles of a tool
+    are not modified by the requests of other tools
+    """
+
+    def __init__(self, scope_id, handle_counter):
+        super(DccServerScope, self).__init__()
+
+        self._id = scope_id
+        self._subscriptions = set()
+        self._cursors = dict()
+        self._handles = dict()
+        self._handle_ids = dict()
+        self._handle_counter = handle_counter
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def subscriptions(self):
+        return self._subscriptions
+
+    @property
+    def cursors(self):
+        return self._cursors
+
+    @property
+    def handles(self):
+        return self._handles
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def create_handle(self, dcc_object):
+        """
+        Stores given DCC object in the scope handle table and returns its handle
+        The same handle is returned every time the same (hashable) object is stored
+        :param dcc_object: object
+        :return: protocol.Handle
+        """
+
+        try:
+            handle_id = self._handle_ids.get(dcc_object, None)
+        except TypeError:
+            handle_id = None
+        if handle_id is None:
+            handle_id = next(self._handle_counter)
+            self._handles[handle_id] = dcc_object
+            try:
+                self._handle_ids[dcc_object] = handle_id
+            except TypeError:
+                pass
+
+        return protocol.Handle(handle_id)
+
+    def resolve_handles(self, value):
+        """
+        Recursively replaces handles of given data with the DCC objects they reference
+        :param value: object
+        :return: object
+        """
+
+        if isinstance(value, dict):
+            if protocol.is_handle(value):
+                handle_id = value[protocol.HANDLE_KEY]
+                if handle_id not in self._handles:
+                    raise ValueError('Invalid handle: {}'.format(handle_id))
+                return self._handles[handle_id]
+            for k, v in value.items():
+                value[k] = self.resolve_handles(v)
+        elif isinstance(value, (list, tuple)):
+            return [self.resolve_handles(v) for v in value]
+
+        return value
+
+    def release_handles(self, handle_ids=None):
+        """
+        Removes given handles from the scope handle table
+        :param handle_ids: list(int) or None, handles to remove. If not given, all handles are removed
+        """
+
+        if handle_ids is None:
+            self._handles.clear()
+            self._handle_ids.clear()
+            return
+
+        for handle_id in handle_ids:
+            dcc_object = self._handles.pop(handle_id, None)
+            try:
+                self._handle_ids.pop(dcc_object, None)
+            except TypeError:
+                pass
+
+    def clear(self):
+        """
+        Removes all the subscriptions, cursors and handles of the scope
+        """
+
+        self._subscriptions.clear()
+        self._cursors.clear()
+        self.release_handles()
+
+
+class DccServerConnection(object):
+    """
+    Class that stores the state of a client connected to a DccServer. Each connection has its own read buffer and
+    parser state, so multiple clients can share the same server
+    """
+
+    WRITE_BUFFER_SIZE = 512 * 1024  # Maximum size (in bytes) of reply chunks pending to be written into the socket
+
+    def __init__(self, socket):
+        super(DccServerConnection, self).__init__()
+
+        self._socket = socket
+        self._bytes_remaining = -1
+        self._frame = None
+        self._binary = False
+        self._client_codecs = [protocol.Codecs.JSON]
+        self._compression = False
+        self._shared_memory = False
+        self._shared_segments = set()
+        self._scopes = dict()
+        self._handle_counter = itertools.count(1)
+        self._tokens = dict()
+        self._cancelled_requests = set()
+        self._queued_requests = set()
+        self._last_request_id = 0
+        self._chunks = deque()
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def socket(self):
+        return self._socket
+
+    @property
+    def binary(self):
+        return self._binary
+
+    @property
+    def compression(self):
+        return self._compression
+
+    @compression.setter
+    def compression(self, flag):
+        self._compression = flag
+
+    @property
+    def shared_memory(self):
+        return self._shared_memory
+
+    @shared_memory.setter
+    def shared_memory(self, flag):
+        self._shared_memory = flag
+
+    @property
+    def shared_segments(self):
+        return self._shared_segments
+
+    @property
+    def scopes(self):
+        return list(self._scopes.values())
+
+    @property
+    def subscriptions(self):
+        """
+        Returns the events any of the scopes of the connection is subscribed to
+        :return: set(str)
+        """
+
+        return set().union(*[scope.subscriptions for scope in self._scopes.values()])
+
+    @property
+    def client_codecs(self):
+        return self._client_codecs
+
+    @client_codecs.setter
+    def client_codecs(self, value):
+        self._client_codecs = value
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def is_connected(self):
+        """
+        Returns whether connection socket is still connected or not
+        :return: bool
+        """
+
+        return self._socket and self._socket.state() in CONNECTED_STATES
+
+    def read_frames(self):
+        """
+        Reads all the complete frames available in the socket
+        :return: list(tuple(dict, protocol.FrameInfo)), decoded data and info of each frame
+        """
+
+        frames = list()
+        while self._socket.bytesAvailable():
+
+            # When no bytes are remaining, we read header from socket, so we can store the total
+            # amount of data (in bytes) we expect to retrieve
+            if self._bytes_remaining <= 0:
+                self._frame = None
+                if not self._read_header():
+                    break
+                if self._frame.flags & protocol.Flags.CANCEL:
+                    self._bytes_remaining = -1
+                    self.cancel_request(self._frame.request_id)
+                    continue
+                if self._frame.binary:
+                    self._queued_requests.add(self._frame.request_id)
+                    self._last_request_id = self._frame.request_id
+
+            # body (payload)
+            # socket already buffers all received data, so we wait until all expected bytes are available and we
+            # read them at once. This way, payload is copied and decoded only once, no matter how many chunks it
+            # arrives in
+            if self._bytes_remaining > 0:
+                if self._socket.bytesAvailable() < self._bytes_remaining:
+                    break
+                payload = self._socket.read(self._bytes_remaining).data()
+                self._bytes_remaining = -1
+                data = protocol.decode_payload(payload, self._frame.codec_id, ordered=True, flags=self._frame.flags)
+                frames.append((data, self._frame))
+
+        return frames
+
+    def write(self, payload, codec_id, frame=None, flags=0):
+        """
+        Writes given encoded reply into the socket using the framing of the given request frame
+        :param payload: bytes
+        :param codec_id: int, codec used to encode the payload
+        :param frame: protocol.FrameInfo or None, info of the frame we are replying to
+        :param flags: int, frame flags. Only used by binary frames
+        :return: bool
+        """
+
+        if not self.is_connected():
+            return False
+
+        if frame and frame.binary:
+            if self._compression:
+                payload, compression_flags = protocol.compress_payload(payload)
+                flags |= compression_flags
+            if protocol.get_priority(frame.flags) == protocol.Priorities.BULK and len(payload) > protocol.CHUNK_SIZE:
+                self._write_chunks(payload, codec_id, frame.request_id, flags)
+                return True
+            header = protocol.pack_header(codec_id, len(payload), request_id=frame.request_id, flags=flags)
+        else:
+            header = protocol.pack_legacy_header(len(payload))
+        self._socket.write(QByteArray(header + payload))
+
+        return True
+
+    def flush(self):
+        """
+        Writes pending reply chunks into the socket while its write buffer is not full. Replies written in the
+        meantime are sent before the remaining chunks, so small replies do not wait for bulk ones
+        """
+
+        while self._chunks and self.is_connected() and self._socket.bytesToWrite() < self.WRITE_BUFFER_SIZE:
+            self._socket.write(QByteArray(self._chunks.popleft()))
+
+    def purge(self):
+        """
+        Discards all the data received by the connection that has not been processed yet
+        """
+
+        self._bytes_remaining = -1
+        self._socket.readAll()
+
+    def get_error_frame(self):
+        """
+        Returns the info of the frame that protocol errors must be replied to, so client receives them with the
+        framing it uses
+        :return: protocol.FrameInfo or None, None if client uses legacy framing
+        :raises ValueError: if client uses binary framing but the frame that could not be read is unknown
+        """
+
+        if not self._binary:
+            return None
+        if not self._frame or not self._frame.binary:
+            raise ValueError('Frame that could not be read is unknown')
+
+        return protocol.FrameInfo(protocol.Codecs.JSON, 0, self._frame.request_id, True)
+
+    def start_request(self, request_id):
+        """
+        Returns the cancellation token of the request with given ID, which is going to be executed
+        :param request_id: int
+        :return: DccServerCancellationToken
+        """
+
+        token = DccServerCancellationToken(self, request_id)
+        self._queued_requests.discard(request_id)
+        if request_id in self._cancelled_requests:
+            self._cancelled_requests.discard(request_id)
+            token.cancel()
+        self._tokens[request_id] = token
+
+        return token
+
+    def finish_request(self, request_id):
+        """
+        Forgets the cancellation token of the request with given ID
+        :param request_id: int
+        """
+
+        self._tokens.pop(request_id, None)
+
+    def cancel_request(self, request_id):
+        """
+        Cancels the request with given ID. Requests that did not start yet are cancelled once they start
+        :param request_id: int
+        """
+
+        token = self._tokens.get(request_id, None)
+        if token:
+            token.cancel()
+        elif request_id in self._queued_requests or request_id > self._last_request_id:
+            self._cancelled_requests.add(request_id)
+
+    def cancel_requests(self):
+        """
+        Cancels all the requests of the connection
+        """
+
+        for token in self._tokens.values():
+            token.cancel()
+        self._cancelled_requests.clear()
+        self._queued_requests.clear()
+        self._chunks.clear()
+
+    def poll_cancel_requests(self):
+        """
+        Reads pending data of the socket looking for cancel frames, without processing the rest of frames
+        Only used while a command is being executed in the thread the socket lives in
+        """
+
+        if QThread.currentThread() != self._socket.thread():
+            return
+
+        # Data is read into socket buffer without notifying it. Server reads it once current command finishes
+        self._socket.blockSignals(True)
+        try:
+            self._socket.waitForReadyRead(0)
+        finally:
+            self._socket.blockSignals(False)
+
+        data = self._socket.peek(self._socket.bytesAvailable()).data()
+        offset = max(self._bytes_remaining, 0)
+        while offset + protocol.HEADER_SIZE <= len(data) and protocol.is_binary_header(
+                data[offset:offset + len(protocol.MAGIC)]):
+            _, flags, request_id, payload_length = protocol.unpack_header(data[offset:offset + protocol.HEADER_SIZE])
+            if flags & protocol.Flags.CANCEL:
+                self.cancel_request(request_id)
+            offset += protocol.HEADER_SIZE + payload_length
+
+    def get_scope(self, scope_id=None):
+        """
+        Returns the scope of the connection with given ID. Scope is created if it does not exist yet
+        :param scope_id: str or int or None, ID of the scope. Requests of clients that do not share their connection
+            do not have a scope ID, so they use the default scope
+        :return: DccServerScope
+        """
+
+        scope = self._scopes.get(scope_id, None)
+        if scope is None:
+            scope = self._scopes[scope_id] = DccServerScope(scope_id, self._handle_counter)
+
+        return scope
+
+    def release_scope(self, scope_id=None):
+        """
+        Removes the scope with given ID with all its subscriptions, cursors and handles
+        :param scope_id: str or int or None
+        """
+
+        scope = self._scopes.pop(scope_id, None)
+        if scope:
+            scope.clear()
+
+    def release_scopes(self):
+        """
+        Removes all the scopes of the connection
+        """
+
+        for scope in self._scopes.values():
+            scope.clear()
+        self._scopes.clear()
+
+    def release_handles(self):
+        """
+        Removes the handles of all the scopes of the connection
+        """
+
+        for scope in self._scopes.values():
+            scope.release_handles()
+
+    def release_shared_segments(self):
+        """
+        Removes all the shared memory segments created for the connection that client did not release
+        """
+
+        for segment_name in self._shared_segments:
+            sharedmemory.remove_segment(segment_name)
+        self._shared_segments.clear()
+
+    # =================================================================================================================
+    # INTERNAL
+    # =================================================================================================================
+
+    def _read_header(self):
+        """
+        Internal function that reads the header of the next frame from the socket
+        Both binary and legacy ASCII headers are supported. Replies always use the framing of the request
+        :return: bool, True if the header was read; False if not enough data is available yet
+        """
+
+        bytes_available = self._socket.bytesAvailable()
+        if bytes_available < len(protocol.MAGIC):
+            return False
+
+        if protocol.is_binary_header(self._socket.peek(len(protocol.MAGIC)).data()):
+            if bytes_available < protocol.HEADER_SIZE:
+                return False
+            header = self._socket.read(protocol.HEADER_SIZE).data()
+            codec_id, flags, request_id, self._bytes_remaining = protocol.unpack_header(header)
+            self._frame = protocol.FrameInfo(codec_id, flags, request_id, True)
+            self._binary = True
+        else:
+            if bytes_available < protocol.LEGACY_HEADER_SIZE:
+                return False
+            header = self._socket.read(protocol.LEGACY_HEADER_SIZE).data()
+            self._bytes_remaining = protocol.unpack_legacy_header(header)
+            self._frame = protocol.FrameInfo(protocol.Codecs.JSON, 0, 0, False)
+
+        return True
+
+    def _write_chunks(self, payload, codec_id, request_id, flags=0):
+        """
+        Internal function that splits given encoded reply into chunk frames and queues them to be written
+        All chunks but the last one are flagged, so the client joins them before decoding the reply
+        :param payload: bytes
+        :param codec_id: int
+        :param request_id: int
+        :param flags: int, flags of the reply
+        """
+
+        payload_view = memoryview(payload)
+        for offset in range(0, len(payload), protocol.CHUNK_SIZE):
+            chunk = payload_view[offset:offset + protocol.CHUNK_SIZE]
+            chunk_flags = flags if offset + protocol.CHUNK_SIZE >= len(payload) else flags | protocol.Flags.CHUNK
+            header = protocol.pack_header(codec_id, len(chunk), request_id=request_id, flags=chunk_flags)
+            self._chunks.append(header + chunk.tobytes())
+
+        self.flush()
+
 
 class DccServer(QObject, object):
 
     PORT = 17344           # Base port value, final one will depend on DCC
-    HEADER_SIZE = 10
+    HEADER_SIZE = protocol.LEGACY_HEADER_SIZE
+    COMPRESSION = True     # Whether server compresses large replies if clients request it
+    MAX_THREADS = 4        # Maximum number of thread safe commands that can be executed at the same time
+    TRANSPORTS = [transport.Transports.LOCAL, transport.Transports.TCP]     # Transports offered to clients
+    SHARED_MEMORY = True   # Whether large numeric arrays are sent through shared memory to clients that enable it
+    PAGE_SIZE = 1000       # Default number of items sent per page by cursors
 
     def __init__(self, parent=None, client=None, update_paths=True):
         super(DccServer, self).__init__(parent)
 
-        self._socket = None
+        self._signals = DccServerSignals()
+        self._signals.commandFinished.connect(self._on_command_finished, Qt.QueuedConnection)
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(self.MAX_THREADS)
+        self._connections = dict()
+        self._server = None
+        self._local_server = None
         self._port = core_dcc.dcc_port(self.__class__.PORT)
         self._do_update_paths = update_paths
         self._modules_to_import = list()
         self._client = client
         self._server_functions = dict()
+        self._dispatch_table = dict()
+        self._event_callbacks = dict()
+        self._cursor_ids = itertools.count(1)
+        self._context = threading.local()
+        self._requests = deque()
+        self._bulk_requests = deque()
+        self._processing_requests = False
         self._dcc = dcc
 
-        self._retrieved_data = ''
-        self._bytes_remaining = -1
-
         server_functions = inspect.getmembers(self, predicate=inspect.ismethod) or list()
         for server_function_list in server_functions:
             server_function_name = server_function_list[0]
@@ -57,6 +664,7 @@ class DccServer(QObject, object):
                 continue
             self._server_functions[server_function_name] = server_function_list[1]
 
+        self._build_dispatch_table()
         self._init()
 
     # =================================================================================================================
@@ -67,11 +675,22 @@ class DccServer(QObject, object):
     def dcc(self):
         return self._dcc
 
+    @property
+    def signals(self):
+        return self._signals
+
+    @property
+    def connections(self):
+        return list(self._connections.values())
+
     # =================================================================================================================
     # BASE
     # =================================================================================================================
 
     def close_connection(self):
+        self._unregister_callbacks()
+        if self._local_server:
+            self._local_server.close()
         if not self._server:
             return
 
@@ -87,6 +706,8 @@ class DccServer(QObject, object):
     def selected_nodes(self, data, reply):
         full_path = data.get('full_path', True)
         selected_nodes = self._dcc.selected_nodes(full_path=full_path)
+        if data.get('as_handles', False):
+            selected_nodes = [self._create_handle(node) for node in selected_nodes or list()]
         reply['success'] = True
         reply['result'] = selected_nodes
 
@@ -121,12 +742,25 @@ class DccServer(QObject, object):
             return
 
         self._server = QTcpServer(self)
-        self._server.newConnection.connect(self._on_established_connection)
+        self._server.newConnection.connect(partial(self._on_established_connection, self._server))
 
         if self._listen():
             print('[LOG] Server listening on port: {}'.format(self._port))
         else:
             print('[ERROR] Server initialization failed')
+            return
+
+        self._register_callbacks()
+
+        # TCP server is always available. Clients that support local transport switch to it during negotiation
+        if transport.Transports.LOCAL in self.TRANSPORTS:
+            self._local_server = QLocalServer(self)
+            self._local_server.newConnection.connect(partial(self._on_established_connection, self._local_server))
+            if self._listen_local():
+                print('[LOG] Server listening on local server: {}'.format(self._local_server.fullServerName()))
+            else:
+                LOGGER.warning('Local server initialization failed: {}'.format(self._local_server.errorString()))
+                self._local_server = None
 
     def _listen(self):
         if not self._server.isListening():
@@ -134,70 +768,233 @@ class DccServer(QObject, object):
 
         return False
 
-    def _read(self):
-        json_data = self._retrieved_data or ''
+    def _listen_local(self):
+        if self._local_server.isListening():
+            return False
 
-        while self._socket.bytesAvailable():
+        # Removes local servers left by DCC sessions that were not closed properly
+        server_name = transport.local_server_name(self._port)
+        QLocalServer.removeServer(server_name)
 
-            # When no bytes are remaining, we read header from socket, so we can store the total
-            # amount of data (in bytes) we expect to retrieve
-            if self._bytes_remaining <= 0:
-                byte_array = self._socket.read(DccServer.HEADER_SIZE)   # header (10 bytes)
-                self._bytes_remaining, valid = byte_array.toInt()
-                if not valid:
-                    self._bytes_remaining = -1
-                    self._write_error('Invalid header')
-                    # purge unknown data
-                    self._retrieved_data = ''
-                    self._socket.readAll()
-                    return
+        return self._local_server.listen(server_name)
 
-            # body (payload)
-            # we read data until all expected bytes are read
-            if self._bytes_remaining > 0:
-                byte_array = self._socket.read(self._bytes_remaining)
-                self._bytes_remaining -= len(byte_array)
-                json_data += byte_array.data().decode()
+    def _register_callbacks(self):
+        """
+        Internal function that registers the DCC callbacks used to notify clients about DCC session changes
+        """
 
-                if self._bytes_remaining == 0:
-                    self._bytes_remaining = -1
-                    data = json.loads(json_data, object_pairs_hook=OrderedDict)
-                    self._process_data(data)
+        # Clients cache the results of some commands until the scene changes, so if these callbacks are not available
+        # cached results are only invalidated when they expire
+        try:
+            from tpDcc.managers import callbacks
+            for callback_type in (core_dcc.DccCallbacks.SceneOpenFinished, core_dcc.DccCallbacks.SceneNewFinished):
+                if not callbacks.CallbacksManager.register(callback_type, self._on_scene_changed, owner=self):
+                    LOGGER.warning('DCC {} does not provide "{}" callback. Clients cached results are not '
+                                   'invalidated when scene changes'.format(core_dcc.current_dcc(), callback_type[0]))
+        except Exception as exc:
+            LOGGER.warning('Impossible to register DCC callbacks: {}'.format(exc))
+
+    def _unregister_callbacks(self):
+        """
+        Internal function that unregisters the DCC callbacks registered by the server
+        """
+
+        try:
+            from tpDcc.managers import callbacks
+            callbacks.CallbacksManager.unregister_owner_callbacks(owner=self)
+        except Exception as exc:
+            LOGGER.warning('Impossible to unregister DCC callbacks: {}'.format(exc))
+
+    def _push_event(self, event_name, connections=None, **kwargs):
+        """
+        Internal function that pushes given event to the connected clients. Legacy clients do not receive events
+        :param event_name: str
+        :param connections: list(DccServerConnection) or None, connections to push event to. If not given, event is
+            pushed to all connections
+        :param kwargs: dict, event data
+        """
+
+        event = {'event': event_name}
+        event.update(kwargs)
+        frame = protocol.FrameInfo(protocol.Codecs.JSON, protocol.Flags.EVENT, protocol.EVENT_REQUEST_ID, True)
+        for connection in self.connections if connections is None else connections:
+            if not connection.binary:
+                continue
+            codec_id, event_data = protocol.encode_payload(event, connection.client_codecs)
+            connection.write(event_data, codec_id, frame, flags=protocol.Flags.EVENT)
+
+    def _invalidate_client_caches(self, commands=None):
+        """
+        Internal function that notifies connected clients that their cached command results are not valid anymore
+        :param commands: list(str) or None, commands to invalidate. If not given, all cached results are invalidated
+        """
+
+        self._push_event(protocol.Events.INVALIDATE_CACHE, commands=commands)
+
+    def _update_event_callbacks(self):
+        """
+        Internal function that makes sure that only DCC events with subscribed clients have a callback registered
+        :return: dict(str, str), error message of each DCC event whose callback could not be registered
+        """
+
+        from tpDcc.managers import callbacks
+
+        subscribed_events = set()
+        for connection in self.connections:
+            subscribed_events.update(connection.subscriptions)
 
-                    json_data = ''
+        for event_name in list(self._event_callbacks.keys()):
+            if event_name in subscribed_events:
+                continue
+            try:
+                callbacks.CallbacksManager.unregister(event_name, self._event_callbacks.pop(event_name))
+            except Exception as exc:
+                LOGGER.warning('Impossible to unregister DCC event "{}" callback: {}'.format(event_name, exc))
 
-        self._retrieved_data = json_data
+        errors = dict()
+        for event_name in subscribed_events:
+            if event_name in self._event_callbacks:
+                continue
+            event_callback = partial(self._on_dcc_event, event_name)
+            try:
+                if not callbacks.CallbacksManager.register(event_name, event_callback, owner=self):
+                    errors[event_name] = 'DCC {} does not provide this callback'.format(core_dcc.current_dcc())
+                    continue
+            except Exception as exc:
+                errors[event_name] = str(exc)
+                continue
+            self._event_callbacks[event_name] = event_callback
 
+        return errors
 
-    def _write(self, reply_dict):
+    def _read(self, connection):
+        # Data can be read into the socket buffer while a command is executed (to look for cancel frames), so we
+        # keep reading until no more frames are available
+        while True:
+            try:
+                frames = connection.read_frames()
+            except exceptions.ProtocolError as exc:
+                LOGGER.error('Invalid data received from client: {}'.format(exc))
+                connection.purge()
+                # Binary clients can only receive the error if we know the request it belongs to, otherwise the
+                # stream cannot be synchronized anymore and the connection is closed
+                try:
+                    self._write_error(str(exc), connection, frame=connection.get_error_frame())
+                except ValueError:
+                    connection.socket.close()
+                return
+            if not frames:
+                break
+
+            for data, frame in frames:
+                if frame.binary and protocol.get_priority(frame.flags) == protocol.Priorities.BULK:
+                    self._bulk_requests.append((data, connection, frame))
+                else:
+                    self._requests.append((data, connection, frame))
+            if not connection.is_connected():
+                break
+
+        self._process_requests()
+
+    def _process_requests(self):
+        """
+        Internal function that executes queued requests in the order they were received. Bulk requests are deferred
+        until no other request is queued and, after executing one, the rest are executed in the next event loop
+        iteration, so requests received in the meantime are executed before them
+        """
+
+        # Commands can process events (and read sockets) while they are executed. Requests are queued meanwhile
+        if self._processing_requests:
+            return
 
+        self._processing_requests = True
+        try:
+            while True:
+                requests = self._requests or self._bulk_requests
+                if not requests:
+                    break
+                data, connection, frame = requests.popleft()
+                if connection not in self.connections or not connection.is_connected():
+                    continue
+                self._process_data(data, connection=connection, frame=frame)
+                # Commands that poll cancel requests read data into the socket buffer without notifying it, so frames
+                # received while the command was executed are read now
+                if connection.is_connected() and connection.socket.bytesAvailable():
+                    self._read(connection)
+                if requests is self._bulk_requests and (self._requests or self._bulk_requests):
+                    QTimer.singleShot(0, self._process_requests)
+                    break
+        finally:
+            self._processing_requests = False
+
+    def _get_cancellation_token(self):
+        """
+        Internal function that returns the cancellation token of the command being executed. Long running server
+        functions can poll it to stop as soon as the client cancels the command:
+            token = self._get_cancellation_token()
+            for node in nodes:
+                token.check()
+        :return: DccServerCancellationToken
+        """
+
+        return getattr(self._context, 'token', None) or DccServerCancellationToken()
+
+    def _create_handle(self, dcc_object):
+        """
+        Internal function that returns the handle that references given DCC object for the client that sent the
+        command being executed. Server functions can return handles instead of long node names:
+            reply['result'] = [self._create_handle(node) for node in nodes]
+        Handles are only used by clients connected using binary protocol, other clients receive the object itself
+        :param dcc_object: object
+        :return: protocol.Handle or object
+        """
+
+        connection = getattr(self._context, 'connection', None)
+        scope = getattr(self._context, 'scope', None)
+        if not connection or not connection.binary or not scope:
+            return dcc_object
+
+        self._context.handles = True
+
+        return scope.create_handle(dcc_object)
+
+    def _write(self, reply_dict, connection=None, frame=None):
+
+        binary = bool(connection and frame and frame.binary)
+        codecs = connection.client_codecs if binary else None
+        flags = 0
+        if reply_dict.pop('handles', False) and binary:
+            flags |= protocol.Flags.HANDLES
+        # Large arrays are exported to shared memory while the typed array codec encodes the reply, so the reply is
+        # only scanned once, and only if it contains numeric arrays
+        array_exporter = sharedmemory.SegmentExporter() if binary and connection.shared_memory else None
         try:
-            json_reply = json.dumps(reply_dict)
+            codec_id, reply_data = protocol.encode_payload(reply_dict, codecs, array_exporter=array_exporter)
+            if array_exporter and array_exporter.segment_names:
+                connection.shared_segments.update(array_exporter.segment_names)
+                flags |= protocol.Flags.SHARED_MEMORY
         except Exception:
             msg = 'Error while serializing data: "{}"'.format(traceback.format_exc())
             LOGGER.error(msg)
             json_dict = {'result': None, 'success': False, 'msg': msg, 'cmd': reply_dict.get('cmd', 'unknown')}
-            json_reply = json.dumps(json_dict)
+            codec_id, reply_data = protocol.encode_payload(json_dict)
+            flags = 0
 
-        if self._socket and self._socket.state() == QTcpSocket.ConnectedState:
-            header = '{0}'.format(len(json_reply.encode())).zfill(DccServer.HEADER_SIZE)
-            data = QByteArray('{}{}'.format(header, json_reply).encode())
-            self._socket.write(data)
+        if connection:
+            connection.write(reply_data, codec_id, frame, flags=flags)
 
-        return json_reply
+        return reply_data
 
-    def _write_error(self, error_msg):
+    def _write_error(self, error_msg, connection=None, frame=None):
         reply = {
             'success': False,
             'msg': error_msg,
             'cmd': 'unknown'
         }
 
-        self._write(reply)
-
-    def _process_data(self, data_dict):
+        self._write(reply, connection, frame)
 
-        self._retrieved_data = ''
+    def _process_data(self, data_dict, connection=None, frame=None):
 
         reply = {
             'success': False,
@@ -207,8 +1004,19 @@ class DccServer(QObject, object):
 
         do_write = True
         cmd = data_dict['cmd']
+        scope = connection.get_scope(data_dict.pop(protocol.SCOPE_KEY, None)) if connection else None
+        if scope and scope.handles:
+            try:
+                data_dict = scope.resolve_handles(data_dict)
+            except ValueError as exc:
+                reply['cmd'] = cmd
+                reply['msg'] = str(exc)
+                return self._write(reply, connection, frame)
+
         if cmd == 'ping':
             reply['success'] = True
+        elif cmd == 'negotiate_protocol':
+            self._negotiate_protocol(data_dict, reply, connection)
         elif cmd == 'update_paths':
             self._update_paths(data_dict, reply)
         elif cmd == 'update_dcc_paths':
@@ -216,23 +1024,353 @@ class DccServer(QObject, object):
         elif cmd == 'init_dcc':
             self._init_dcc(data_dict, reply)
         elif cmd == 'get_dcc_info':
-            self._get_dcc_info(data_dict, reply)
+            self._get_dcc_info(data_dict, reply, connection)
+        elif cmd == 'batch':
+            self._batch(data_dict, reply)
+        elif cmd == 'release_shared_memory':
+            self._release_shared_memory(data_dict, reply, connection)
+        elif cmd == 'open_cursor':
+            self._open_cursor(data_dict, reply, connection, scope)
+        elif cmd == 'fetch_cursor':
+            self._fetch_cursor(data_dict, reply, connection, scope)
+        elif cmd == 'close_cursor':
+            self._close_cursor(data_dict, reply, connection, scope)
+        elif cmd == 'release_handles':
+            self._release_handles(data_dict, reply, connection, scope)
+        elif cmd == 'subscribe_events':
+            self._subscribe_events(data_dict, reply, connection, scope)
+        elif cmd == 'unsubscribe_events':
+            self._unsubscribe_events(data_dict, reply, connection, scope)
+        elif cmd == 'release_scope':
+            self._release_scope(data_dict, reply, connection, scope)
+        elif connection and frame and frame.binary and self._is_thread_safe(cmd):
+            # Reply will be written once the command finishes. Legacy frames are not dispatched to the worker pool
+            # because legacy clients expect replies in the same order requests were sent
+            token = connection.start_request(frame.request_id)
+            self._thread_pool.start(
+                DccServerCommandRunnable(self, cmd, data_dict, reply, connection, frame, token, scope))
+            return reply
+        elif connection and frame and frame.binary:
+            token = connection.start_request(frame.request_id)
+            self._run_command(cmd, data_dict, reply, connection, token, scope)
+            connection.finish_request(frame.request_id)
         else:
-            try:
-                self._process_command(cmd, data_dict, reply)
-            except Exception:
-                reply['success'] = False
-                reply['msg'] = traceback.format_exc()
-            if not reply['success']:
-                reply['cmd'] = cmd
-                if 'msg' not in reply.keys():
-                    reply['msg'] = 'Unknown Error'
+            self._run_command(cmd, data_dict, reply, connection, scope=scope)
 
         if do_write:
-            return self._write(reply)
+            return self._write(reply, connection, frame)
         else:
             return reply
 
+    def _run_command(self, cmd, data_dict, reply, connection=None, token=None, scope=None):
+        """
+        Internal function that executes given command storing its result or its error in the given reply
+        :param cmd: str
+        :param data_dict: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None, connection of the client that sent the command
+        :param token: DccServerCancellationToken or None, token used to know whether client cancelled the command
+        :param scope: DccServerScope or None, scope of the tool that sent the command. Stores the handles it creates
+        """
+
+        # Commands can be executed in worker threads, so each thread stores its own context
+        self._context.connection = connection
+        self._context.scope = scope
+        self._context.token = token
+        self._context.handles = False
+        try:
+            if token and token.cancelled:
+                raise exceptions.CommandCancel('Command cancelled by client')
+            self._process_command(cmd, data_dict, reply)
+        except exceptions.CommandCancel as exc:
+            reply['success'] = False
+            reply['cancelled'] = True
+            reply['msg'] = str(exc) or 'Command cancelled'
+        except Exception:
+            reply['success'] = False
+            reply['msg'] = traceback.format_exc()
+        finally:
+            self._context.connection = None
+            self._context.scope = None
+            self._context.token = None
+        if self._context.handles:
+            reply['handles'] = True
+        if not reply['success']:
+            reply['cmd'] = cmd
+            if 'msg' not in reply.keys():
+                reply['msg'] = 'Unknown Error'
+
+    def _is_thread_safe(self, cmd):
+        """
+        Internal function that returns whether given command can be executed outside main thread or not
+        DCC API commands are never thread safe, so they are always executed in main thread
+        :param cmd: str
+        :return: bool
+        """
+
+        server_function = self._server_functions.get(cmd, None)
+
+        return bool(server_function and getattr(server_function, 'thread_safe', False))
+
+    def _batch(self, data, reply):
+        """
+        Internal function that executes a list of commands within a single request
+        Each command is defined as a dictionary with cmd, args and kwargs keys. An error in one command does not
+        stop the execution of the others
+        :param data: dict
+        :param reply: dict
+        """
+
+        results = list()
+        for command in data.get('commands', list()):
+            cmd = command.get('cmd', None)
+            command_data = dict(command.get('kwargs', None) or dict())
+            command_data['cmd'] = cmd
+            command_data['args'] = command.get('args', None) or list()
+            command_reply = {
+                'success': False,
+                'msg': '',
+                'result': None
+            }
+            self._run_command(cmd, command_data, command_reply)
+            results.append(command_reply)
+
+        reply['success'] = True
+        reply['result'] = results
+
+    def _negotiate_protocol(self, data, reply, connection=None):
+        if data.get('version', None) != protocol.PROTOCOL_VERSION:
+            reply['success'] = False
+            reply['msg'] = 'Protocol version {} is not supported'.format(data.get('version', None))
+            return
+
+        client_codecs = protocol.negotiate_codecs(data.get('codecs', list()))
+        if connection:
+            connection.client_codecs = client_codecs
+
+        reply['success'] = True
+        reply['version'] = protocol.PROTOCOL_VERSION
+        reply['codecs'] = client_codecs
+
+        # Client stubs only convert the arguments of the commands the server executes with a DCC function
+        reply['dcc_functions'] = sorted(self._get_dcc_functions())
+
+        # Clients connected through TCP are offered the transports they support, so they can switch to them
+        client_transports = data.get('transports', None) or list()
+        if self._local_server and transport.Transports.LOCAL in client_transports:
+            reply['transports'] = {transport.Transports.LOCAL: self._local_server.fullServerName()}
+
+        # Arrays are exported to shared memory by the typed array codec, so client must support it
+        shared_memory = all((
+            self.SHARED_MEMORY, data.get('shared_memory', False), sharedmemory.is_available(),
+            protocol.Codecs.TYPED_ARRAY in client_codecs))
+        reply['shared_memory'] = shared_memory
+        if connection:
+            connection.shared_memory = shared_memory
+
+    def _release_shared_memory(self, data, reply, connection=None):
+        """
+        Internal function that removes the shared memory segments released by the client
+        Clients remove segments by themselves, so here we only make sure they do not exist anymore and we stop
+        tracking them
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        """
+
+        # Only segments created for the connection can be removed
+        if connection:
+            for segment_name in data.get('names', None) or list():
+                if segment_name not in connection.shared_segments:
+                    continue
+                sharedmemory.remove_segment(segment_name)
+                connection.shared_segments.discard(segment_name)
+
+        reply['success'] = True
+
+    def _open_cursor(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that executes a command and replies with the first page of its result and a cursor that
+        can be used to fetch the rest of pages. Result is serialized page by page and, if command returns a
+        generator, it is consumed lazily
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the cursor
+        """
+
+        cmd = data.pop('command', None)
+        page_size = data.pop('page_size', None) or self.PAGE_SIZE
+        data['cmd'] = cmd
+        command_reply = {'success': False, 'msg': '', 'result': None}
+        self._run_command(cmd, data, command_reply, connection, scope=scope)
+        if not command_reply['success']:
+            reply.update(command_reply)
+            return
+
+        result = command_reply['result']
+        if result is None:
+            result = list()
+        elif not isinstance(result, (list, tuple)) and not inspect.isgenerator(result):
+            reply['cmd'] = cmd
+            reply['msg'] = 'Result of command "{}" cannot be paged'.format(cmd)
+            return
+
+        # Without connection cursor cannot be stored, so all items are sent in the first page
+        if not connection or not scope:
+            reply['success'] = True
+            reply['result'] = list(result)
+            reply['cursor'] = None
+            return
+
+        cursor_id = next(self._cursor_ids)
+        scope.cursors[cursor_id] = (iter(result), page_size, command_reply.get('handles', False))
+        self._fetch_cursor({'cursor': cursor_id}, reply, connection, scope)
+
+    def _fetch_cursor(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that replies with the next page of the given cursor. Once all pages are sent, cursor is
+        closed and reply cursor is None
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the cursor
+        """
+
+        cursor_id = data.get('cursor', None)
+        cursors = scope.cursors if scope else dict()
+        if cursor_id not in cursors:
+            reply['cmd'] = 'fetch_cursor'
+            reply['msg'] = 'Invalid cursor: {}'.format(cursor_id)
+            return
+
+        iterator, page_size, handles = cursors[cursor_id]
+        try:
+            self._context.connection = connection
+            self._context.scope = scope
+            self._context.handles = handles
+            page = list(itertools.islice(iterator, page_size))
+        except Exception:
+            cursors.pop(cursor_id, None)
+            reply['cmd'] = 'fetch_cursor'
+            reply['msg'] = traceback.format_exc()
+            return
+        finally:
+            self._context.connection = None
+            self._context.scope = None
+
+        if len(page) < page_size:
+            cursors.pop(cursor_id, None)
+            cursor_id = None
+
+        reply['success'] = True
+        reply['result'] = page
+        reply['cursor'] = cursor_id
+        reply['handles'] = self._context.handles
+
+    def _close_cursor(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that closes the given cursor, discarding its pending pages
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the cursor
+        """
+
+        if scope:
+            scope.cursors.pop(data.get('cursor', None), None)
+
+        reply['success'] = True
+
+    def _release_handles(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that removes the handles released by the client from its handle table
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the handles
+        """
+
+        if scope:
+            scope.release_handles(data.get('ids', None))
+
+        reply['success'] = True
+
+    def _subscribe_events(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that subscribes the client to the given DCC events (tpDcc.core.dcc.DccCallbacks)
+        Events are pushed asynchronously, so only clients using binary protocol can subscribe to them
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the subscriptions
+        """
+
+        if not connection or not scope or not connection.binary:
+            reply['cmd'] = 'subscribe_events'
+            reply['msg'] = 'DCC events are only available for clients connected using binary protocol'
+            return
+
+        event_names = data.get('events', None) or list()
+        invalid_events = [event_name for event_name in event_names if event_name not in core_dcc.callbacks()]
+        if invalid_events:
+            reply['cmd'] = 'subscribe_events'
+            reply['msg'] = 'Invalid DCC events: {}'.format(', '.join(map(str, invalid_events)))
+            return
+
+        # If the callback of any event cannot be registered, client is not subscribed to any of the given events
+        new_events = set(event_names).difference(scope.subscriptions)
+        scope.subscriptions.update(new_events)
+        errors = self._update_event_callbacks()
+        if errors:
+            scope.subscriptions.difference_update(new_events)
+            self._update_event_callbacks()
+            reply['cmd'] = 'subscribe_events'
+            reply['msg'] = 'Impossible to register DCC events callbacks: {}'.format(
+                ', '.join('{} ({})'.format(event_name, errors[event_name]) for event_name in sorted(errors)))
+            return
+
+        reply['success'] = True
+        reply['result'] = sorted(scope.subscriptions)
+
+    def _unsubscribe_events(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that unsubscribes the client from the given DCC events
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None, scope that stores the subscriptions
+        """
+
+        if scope:
+            event_names = data.get('events', None)
+            if event_names is None:
+                scope.subscriptions.clear()
+            else:
+                scope.subscriptions.difference_update(event_names)
+            self._update_event_callbacks()
+
+        reply['success'] = True
+        reply['result'] = sorted(scope.subscriptions) if scope else list()
+
+    def _release_scope(self, data, reply, connection=None, scope=None):
+        """
+        Internal function that removes the scope of a tool that stops using the connection, with all its event
+        subscriptions, cursors and handles
+        :param data: dict
+        :param reply: dict
+        :param connection: DccServerConnection or None
+        :param scope: DccServerScope or None
+        """
+
+        if connection and scope:
+            subscriptions = set(scope.subscriptions)
+            connection.release_scope(scope.id)
+            if subscriptions:
+                self._update_event_callbacks()
+
+        reply['success'] = True
+
     def _update_paths(self, data, reply):
 
         if not self._do_update_paths:
@@ -245,7 +1383,7 @@ class DccServer(QObject, object):
             reply['success'] = False
             return
 
-        paths = paths_data.values()
+        paths = list(paths_data.values())
 
         # TODO: Remove this ASAP
         # NOTE: For now, we add the dependencies manually
@@ -284,7 +1422,7 @@ class DccServer(QObject, object):
             reply['success'] = False
             return
 
-        paths = paths_data.values()
+        paths = list(paths_data.values())
 
         for path in paths:
             if path not in sys.path:
@@ -331,10 +1469,11 @@ class DccServer(QObject, object):
 
         from tpDcc import dcc
         self._dcc = dcc
+        self._build_dispatch_table()
 
         reply['success'] = True
 
-    def _get_dcc_info(self, data, reply):
+    def _get_dcc_info(self, data, reply, connection=None):
 
         import tpDcc
 
@@ -356,49 +1495,146 @@ class DccServer(QObject, object):
         reply['version'] = dcc_version
         reply['pid'] = os.getpid()
 
+        # Compression is enabled after this reply is sent, so client receives the negotiation reply uncompressed
+        compression = self.COMPRESSION and protocol.COMPRESSION_ZLIB in (data.get('compression', None) or list())
+        reply['compression'] = protocol.COMPRESSION_ZLIB if compression else None
+        if connection and compression:
+            connection.compression = True
+
     def _process_command(self, command_name, data_dict, reply_dict):
-        if command_name in self._server_functions:
-            self._server_functions[command_name](data_dict, reply_dict)
-        elif self._dcc and hasattr(self._dcc, command_name):
-            reply_dict['success'] = True
-            dcc_fn = getattr(self._dcc, command_name)
-            args, varargs, varkw, defaults = inspect.getargspec(dcc_fn)
+        command = self._dispatch_table.get(command_name, None)
+        if not command:
+            # DCC functions can be added to DCC module after the dispatch table is built
+            dcc_fn = getattr(self._dcc, command_name, None) if self._dcc and not command_name.startswith('_') else None
+            if not callable(dcc_fn):
+                reply_dict['msg'] = 'Invalid command ({})'.format(command_name)
+                return
+            command = self._dispatch_table[command_name] = self._create_dcc_command(dcc_fn)
+
+        command(data_dict, reply_dict)
+
+    def _build_dispatch_table(self):
+        """
+        Internal function that builds the table that maps each command name with the callable that executes it
+        DCC function signatures are inspected only once, when the table is built, so executing a command only needs
+        a dictionary lookup. Server functions have priority over DCC functions with the same name
+        """
+
+        dispatch_table = dict()
+        if self._dcc:
+            for dcc_fn_name, dcc_fn in inspect.getmembers(self._dcc, inspect.isfunction):
+                if dcc_fn_name.startswith('_'):
+                    continue
+                dispatch_table[dcc_fn_name] = self._create_dcc_command(dcc_fn)
+        dispatch_table.update(self._server_functions)
+
+        self._dispatch_table = dispatch_table
+
+    def _get_dcc_functions(self):
+        """
+        Internal function that returns the names of the commands that are executed by a DCC function
+        Server functions with the same name as a DCC function are executed instead of it, so they are not included
+        :return: set(str)
+        """
+
+        return set(self._dispatch_table.keys()) - set(self._server_functions.keys())
+
+    def _create_dcc_command(self, dcc_fn):
+        """
+        Internal function that returns a callable that executes given DCC function with the arguments of a command
+        If the function does not accept extra keyword arguments, only the ones that are part of its signature are
+        passed to it
+        :param dcc_fn: fn
+        :return: fn
+        """
+
+        try:
+            arg_spec = getargspec(dcc_fn)
+            arg_names = frozenset(arg_spec.args)
+            varkw = getattr(arg_spec, 'varkw', None) or getattr(arg_spec, 'keywords', None)
+        except TypeError:
+            # Built-in functions cannot be inspected, so we pass all the arguments to them
+            arg_names, varkw = frozenset(), True
+
+        def _command(data_dict, reply_dict):
+            kwargs = dict(data_dict)
+            kwargs.pop('cmd', None)
+            args = kwargs.pop('args', None) or list()
             if not varkw:
-                reply_dict['result'] = getattr(self._dcc, command_name)()
-            else:
-                data_dict.pop('cmd', None)
-                args = data_dict.pop('args', list())
-                try:
-                    reply_dict['result'] = getattr(self._dcc, command_name)(*args, **data_dict)
-                except Exception as exc:
-                    print(exc)
-                except TypeError:
-                    try:
-                        reply_dict['result'] = getattr(self._dcc, command_name)(**data_dict)
-                    except TypeError:
-                        try:
-                            reply_dict['result'] = getattr(self._dcc, command_name)(*args)
-                        except TypeError:
-                            reply_dict['result'] = getattr(self._dcc, command_name)()
-        else:
-            reply_dict['msg'] = 'Invalid command ({})'.format(command_name)
+                kwargs = {arg_name: arg_value for arg_name, arg_value in kwargs.items() if arg_name in arg_names}
+            reply_dict['result'] = dcc_fn(*args, **kwargs)
+            reply_dict['success'] = True
+
+        return _command
 
     # =================================================================================================================
     # CALLBACKS
     # =================================================================================================================
 
-    def _on_established_connection(self):
-        self._socket = self._server.nextPendingConnection()
-        if self._socket.state() == QTcpSocket.ConnectedState:
-            self._socket.disconnected.connect(self._on_disconnected)
-            self._socket.readyRead.connect(self._read)
-            print('[LOG] Connection established')
+    def _on_established_connection(self, server):
+        while server.hasPendingConnections():
+            socket = server.nextPendingConnection()
+            if socket.state() not in CONNECTED_STATES:
+                continue
+            connection = DccServerConnection(socket)
+            self._connections[socket] = connection
+            socket.disconnected.connect(partial(self._on_disconnected, connection))
+            socket.readyRead.connect(partial(self._read, connection))
+            socket.bytesWritten.connect(partial(self._on_bytes_written, connection))
+            print('[LOG] Connection established ({} connections)'.format(len(self._connections)))
+
+    def _on_scene_changed(self, *args, **kwargs):
+        # Objects referenced by handles do not belong to current scene anymore
+        for connection in self.connections:
+            connection.release_handles()
+        self._invalidate_client_caches()
+
+    def _on_dcc_event(self, event_name, *args):
+        connections = [connection for connection in self.connections if event_name in connection.subscriptions]
+        if not connections:
+            return
+
+        # Event arguments usually are DCC nodes or API objects, so we send their string representation
+        event_args = list()
+        for arg in args:
+            try:
+                json.dumps(arg)
+            except (TypeError, ValueError):
+                arg = str(arg)
+            event_args.append(arg)
 
-    def _on_disconnected(self):
-        self._socket.disconnected.disconnect()
-        self._socket.readyRead.disconnect()
-        self._socket.deleteLater()
-        print('[LOG] Connection disconnected')
+        self._push_event(protocol.Events.DCC_EVENT, connections=connections, name=event_name, args=event_args)
+
+    def _on_command_finished(self, reply, connection, frame):
+        connection.finish_request(frame.request_id)
+
+        # Client can be disconnected while the command was running
+        if connection not in self.connections or not connection.is_connected():
+            return
+
+        self._write(reply, connection, frame)
+
+    def _on_bytes_written(self, connection, *args):
+        connection.flush()
+
+    def _on_disconnected(self, connection):
+        socket = connection.socket
+        self._connections.pop(socket, None)
+        connection.release_shared_segments()
+        connection.cancel_requests()
+        subscriptions = connection.subscriptions
+        connection.release_scopes()
+        if subscriptions:
+            self._update_event_callbacks()
+        try:
+            socket.disconnected.disconnect()
+            socket.readyRead.disconnect()
+            socket.bytesWritten.disconnect()
+            socket.deleteLater()
+        except RuntimeError:
+            # Local sockets notify disconnection while they are destroyed with their server
+            pass
+        print('[LOG] Connection disconnected ({} connections)'.format(len(self._connections)))
 
 
 class ExampleServer(DccServer, object):
@@ -429,6 +1665,7 @@ class ExampleServer(DccServer, object):
         reply_dict['result'] = True
         reply_dict['success'] = True
 
+    @thread_safe
     def sleep(self, data_dict, reply_dict):
         for i in range(6):
             print('Sleeping {}'.format(i))
@@ -0,0 +1,253 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the shared memory side channel used by DCC client/server implementations to send large numeric
+arrays. Server writes arrays into memory mapped temporary files and the reply only stores their descriptors, so the
+client can map them without copying or decoding them
+Arrays are exported while the typed array codec (protocol.TypedArrayCodec) encodes the reply, so replies are only
+scanned once
+NOTE: Shared memory is only available in Python 3
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import sys
+import mmap
+import logging
+import weakref
+import tempfile
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+SHARED_MEMORY_KEY = '__tpdcc_shm__'
+SEGMENT_PREFIX = 'tpDcc-shm-'
+
+# Minimum size (in bytes) a numeric array must have to be sent through shared memory
+SHARED_MEMORY_THRESHOLD = 1024 * 1024
+
+
+def is_available():
+    """
+    Returns whether shared memory can be used in current environment
+    :return: bool
+    """
+
+    return sys.version_info[0] > 2
+
+
+def segments_folder():
+    """
+    Returns folder where shared memory segments are created. RAM backed folder is used if available
+    :return: str
+    """
+
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def create_segment(values):
+    """
+    Creates a new shared memory segment that contains given array data
+    :param values: array.array or numpy.ndarray, flat values in native byte order
+    :return: str, name of the segment
+    """
+
+    segment_handle, segment_name = tempfile.mkstemp(prefix=SEGMENT_PREFIX, dir=segments_folder())
+    with os.fdopen(segment_handle, 'wb') as segment_file:
+        segment_file.write(memoryview(values).cast('B'))
+
+    return segment_name
+
+
+def remove_segment(segment_name):
+    """
+    Removes shared memory segment with given name, if it exists
+    :param segment_name: str
+    """
+
+    try:
+        os.remove(segment_name)
+    except OSError:
+        pass
+
+
+class SegmentExporter(object):
+    """
+    Array exporter used by the typed array codec to store large numeric arrays in shared memory segments:
+        exporter = SegmentExporter()
+        codec_id, payload = protocol.encode_payload(reply, codecs, array_exporter=exporter)
+        created_segments = exporter.segment_names
+    """
+
+    def __init__(self, threshold=SHARED_MEMORY_THRESHOLD):
+        super(SegmentExporter, self).__init__()
+
+        self._threshold = threshold
+        self._segment_names = list()
+
+    def __call__(self, values, shape=None):
+        """
+        Stores given array in a new shared memory segment if it is big enough
+        :param values: array.array or numpy.ndarray, flat values in native byte order
+        :param shape: list(int) or None, shape of the array if it has more than one dimension
+        :return: dict or None, descriptor of the segment or None if the array is not exported
+        """
+
+        values_view = memoryview(values)
+        if values_view.nbytes < self._threshold:
+            return None
+
+        segment_name = create_segment(values)
+        self._segment_names.append(segment_name)
+
+        return {SHARED_MEMORY_KEY: [segment_name, values_view.format, len(values_view), shape]}
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def segment_names(self):
+        return self._segment_names
+
+
+def import_arrays(value, release_callback=None):
+    """
+    Recursively replaces shared memory descriptors of given data with SharedArray instances
+    :param value: object
+    :param release_callback: callable or None, function called with the segment name when an array is released
+    :return: object
+    """
+
+    if isinstance(value, dict):
+        if len(value) == 1 and SHARED_MEMORY_KEY in value:
+            return SharedArray(*value[SHARED_MEMORY_KEY], release_callback=release_callback)
+        for k, v in value.items():
+            value[k] = import_arrays(v, release_callback=release_callback)
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            value[i] = import_arrays(v, release_callback=release_callback)
+
+    return value
+
+
+class SharedArray(object):
+    """
+    Read only numeric array mapped from a shared memory segment. Segment should be released once the array is not
+    needed anymore, otherwise it is removed when the array is garbage collected:
+        with client.get_skin_weights(mesh) as weights:
+            weights_array = weights.to_numpy()
+    Nested lists (such as lists of positions) are stored flattened: indexing uses flattened values, while tolist
+    and to_numpy functions return values with their original shape
+    """
+
+    def __init__(self, name, typecode, count, shape=None, release_callback=None):
+        super(SharedArray, self).__init__()
+
+        self._name = name
+        self._typecode = str(typecode)
+        self._count = count
+        self._shape = list(shape) if shape else None
+        self._release_callback = release_callback
+        with open(name, 'rb') as segment_file:
+            self._map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map).cast(self._typecode)
+        self._finalizer = weakref.finalize(self, remove_segment, name)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        return self._view[index]
+
+    def __iter__(self):
+        return iter(self._view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def __repr__(self):
+        return '{}(name={}, typecode={}, count={})'.format(
+            self.__class__.__name__, self._name, self._typecode, self._count)
+
+    # =================================================================================================================
+    # PROPERTIES
+    # =================================================================================================================
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def typecode(self):
+        return self._typecode
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def view(self):
+        return self._view
+
+    @property
+    def released(self):
+        return self._map is None
+
+    # =================================================================================================================
+    # BASE
+    # =================================================================================================================
+
+    def tolist(self):
+        """
+        Returns a copy of the array values as a list. Nested lists are returned if the array has a shape
+        :return: list
+        """
+
+        values = self._view.tolist()
+        if self._shape:
+            for size in reversed(self._shape[1:]):
+                values = [values[i:i + size] for i in range(0, len(values), size)]
+
+        return values
+
+    def to_numpy(self):
+        """
+        Returns a read only NumPy array that uses segment memory, without copying it
+        Returned array must be deleted before releasing the segment
+        :return: numpy.ndarray
+        """
+
+        import numpy
+
+        values = numpy.frombuffer(self._map, dtype=numpy.dtype(self._typecode), count=self._count)
+
+        return values.reshape(self._shape) if self._shape else values
+
+    def release(self, notify=True):
+        """
+        Unmaps and removes the shared memory segment. Views of the array (such as NumPy arrays returned by to_numpy)
+        must be deleted before, otherwise BufferError is raised
+        :param notify: bool, whether the release callback is called, so the server stops tracking the segment
+        """
+
+        if self._map is None:
+            return
+
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            self._view = memoryview(self._map).cast(self._typecode)
+            raise
+        self._map = None
+        self._finalizer.detach()
+        remove_segment(self._name)
+
+        release_callback, self._release_callback = self._release_callback, None
+        if notify and release_callback:
+            release_callback(self._name)
@@ -0,0 +1,186 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the generator of DCC client stubs. Stubs are classes with one method per public DCC function
+(tpDcc.dcc) that keep the name, signature, defaults and documentation of the function, so invalid calls fail
+before any data is sent to the server
+Usage: python -m tpDcc.core.stubs [--output dcc_client_stub.py]
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import ast
+import inspect
+import logging
+import argparse
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+STUB_CLASS_NAME = 'DccClientStub'
+SEND_FUNCTION_NAME = '_send_command'
+
+if sys.version_info[0] == 2:
+    from inspect import getargspec
+else:
+    from inspect import getfullargspec as getargspec
+
+
+def get_stub_functions(dcc_module, exclude=None):
+    """
+    Returns all public functions defined in the given DCC module sorted by name
+    :param dcc_module: module
+    :param exclude: list(str) or None, names of the functions that must not be stubbed, such as the ones that are
+        executed by the client itself
+    :return: list(tuple(str, function))
+    """
+
+    exclude = exclude or list()
+
+    return [(name, fn) for name, fn in inspect.getmembers(dcc_module, inspect.isfunction)
+            if not name.startswith('_') and fn.__module__ == dcc_module.__name__ and name not in exclude]
+
+
+def generate_stub_method(name, fn):
+    """
+    Returns the source code of the stub method of the given function
+    Functions whose defaults cannot be written as literals are stubbed with a generic signature
+    :param name: str
+    :param fn: function
+    :return: str
+    """
+
+    # DCC functions are decorated, so we look for the original function
+    while hasattr(fn, '__wrapped__'):
+        fn = fn.__wrapped__
+
+    arg_spec = getargspec(fn)
+    arg_names = list(arg_spec.args)
+    var_args = arg_spec.varargs
+    var_kwargs = arg_spec[2]
+    defaults = list(arg_spec.defaults or list())
+    kwonly_names = list(getattr(arg_spec, 'kwonlyargs', None) or list())
+    kwonly_defaults = getattr(arg_spec, 'kwonlydefaults', None) or dict()
+
+    try:
+        for default in defaults + list(kwonly_defaults.values()):
+            ast.literal_eval(repr(default))
+    except (ValueError, SyntaxError):
+        arg_names, var_args, var_kwargs, defaults, kwonly_names = list(), 'args', 'kwargs', list(), list()
+
+    self_name = 'self' if 'self' not in arg_names + kwonly_names else '_client'
+    first_default = len(arg_names) - len(defaults)
+    signature = [self_name]
+    for i, arg_name in enumerate(arg_names):
+        signature.append(arg_name if i < first_default else '{}={!r}'.format(arg_name, defaults[i - first_default]))
+    if var_args:
+        signature.append('*{}'.format(var_args))
+    elif kwonly_names:
+        signature.append('*')
+    for kwonly_name in kwonly_names:
+        signature.append(
+            '{}={!r}'.format(kwonly_name, kwonly_defaults[kwonly_name]) if kwonly_name in kwonly_defaults else
+            kwonly_name)
+    if var_kwargs:
+        signature.append('**{}'.format(var_kwargs))
+
+    # Arguments are sent positionally, so server calls the function exactly as the client did
+    call_args = '[{}]'.format(', '.join(arg_names))
+    if var_args:
+        call_args = '{} + list({})'.format(call_args, var_args) if arg_names else 'list({})'.format(var_args)
+    call_kwargs = '{{{}}}'.format(', '.join('{0!r}: {0}'.format(kwonly_name) for kwonly_name in kwonly_names))
+    if var_kwargs and kwonly_names:
+        call_kwargs = 'dict({}, {})'.format(var_kwargs, ', '.join('{0}={0}'.format(n) for n in kwonly_names))
+    elif var_kwargs:
+        call_kwargs = var_kwargs
+
+    lines = ['    def {}({}):'.format(name, ', '.join(signature))]
+    doc = inspect.getdoc(fn)
+    if doc and '"""' not in doc and '\\' not in doc:
+        lines.append('        """')
+        lines.extend(('        ' + line).rstrip() for line in doc.splitlines())
+        lines.append('        """')
+        lines.append('')
+    lines.append('        return {}.{}({!r}, {}, {})'.format(
+        self_name, SEND_FUNCTION_NAME, name, call_args, call_kwargs))
+
+    return '\n'.join(lines)
+
+
+def generate_stub(dcc_module, class_name=STUB_CLASS_NAME, exclude=None):
+    """
+    Returns the source code of the stub class of the given DCC module
+    Stub methods send the command through the send function (_send_command) that the class using the stub
+    must implement
+    :param dcc_module: module
+    :param class_name: str
+    :param exclude: list(str) or None, names of the functions that must not be stubbed
+    :return: str
+    """
+
+    lines = [
+        '# Generated from {} by tpDcc.core.stubs, do not edit it manually'.format(dcc_module.__name__),
+        '',
+        '',
+        'class {}(object):'.format(class_name),
+        '    """',
+        '    Stub class with one method per {} function. Generated by tpDcc.core.stubs'.format(dcc_module.__name__),
+        '    """',
+    ]
+    for name, fn in get_stub_functions(dcc_module, exclude=exclude):
+        try:
+            method_source = generate_stub_method(name, fn)
+        except Exception as exc:
+            LOGGER.debug('Impossible to generate stub of function "{}": {}'.format(name, exc))
+            continue
+        lines.extend(['', method_source])
+
+    return '\n'.join(lines) + '\n'
+
+
+def load_stub(dcc_module, class_name=STUB_CLASS_NAME, exclude=None):
+    """
+    Generates the stub class of the given DCC module and returns it
+    :param dcc_module: module
+    :param class_name: str
+    :param exclude: list(str) or None, names of the functions that must not be stubbed
+    :return: type
+    """
+
+    namespace = {'__name__': '{}_{}'.format(__name__, class_name)}
+    exec(compile(generate_stub(dcc_module, class_name, exclude), '<{}>'.format(class_name), 'exec'), namespace)
+
+    return namespace[class_name]
+
+
+def write_stub(file_path, dcc_module, class_name=STUB_CLASS_NAME, exclude=None):
+    """
+    Writes the stub class of the given DCC module into the given file
+    :param file_path: str
+    :param dcc_module: module
+    :param class_name: str
+    :param exclude: list(str) or None, names of the functions that must not be stubbed
+    """
+
+    with open(file_path, 'w') as stub_file:
+        stub_file.write(generate_stub(dcc_module, class_name, exclude))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates DCC client stub from tpDcc.dcc functions')
+    parser.add_argument('--output', default=None, help='file the stub is written into. Printed if not given')
+    parser.add_argument('--class-name', default=STUB_CLASS_NAME, help='name of the stub class')
+    args = parser.parse_args()
+
+    from tpDcc import dcc
+    from tpDcc.core.client import CLIENT_FUNCTIONS
+
+    if args.output:
+        write_stub(args.output, dcc, args.class_name, CLIENT_FUNCTIONS)
+    else:
+        print(generate_stub(dcc, args.class_name, CLIENT_FUNCTIONS))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
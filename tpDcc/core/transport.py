@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains the transports that can be used by DCC client/server implementations
+DCC clients and servers always run in the same machine, so when it is possible, local sockets (Unix domain sockets)
+are used instead of TCP loopback ones. TCP is always available and is used as fallback
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import socket
+import logging
+
+LOGGER = logging.getLogger('tpDcc-core')
+
+LOCAL_SERVER_PREFIX = 'tpDcc'
+
+
+class Transports(object):
+    TCP = 'tcp'
+    LOCAL = 'local'
+
+
+def local_server_name(port):
+    """
+    Returns name of the local server associated to the TCP server listening in given port
+    :param port: int
+    :return: str
+    """
+
+    return '{}-{}'.format(LOCAL_SERVER_PREFIX, port)
+
+
+def available_transports(transports=None):
+    """
+    Returns transports that can be used by clients running in current Python interpreter
+    Local transport is only available in platforms that support Unix domain sockets. In Windows, QLocalServer uses
+    named pipes, so clients fallback to TCP
+    :param transports: list(str) or None, transports to check sorted by preference. If not given, all are checked
+    :return: list(str)
+    """
+
+    transports = transports or [Transports.LOCAL, Transports.TCP]
+
+    return [transport for transport in transports if transport != Transports.LOCAL or hasattr(socket, 'AF_UNIX')]
+
+
+def connect_local_socket(address, timeout=None):
+    """
+    Returns a blocking socket connected to the local server with given address
+    :param address: str, full name of the local server (path to its socket file)
+    :param timeout: float or None, maximum time (in seconds) to wait for the connection
+    :return: socket.socket
+    """
+
+    local_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        local_socket.settimeout(timeout)
+        local_socket.connect(address)
+        local_socket.settimeout(None)
+    except Exception:
+        local_socket.close()
+        raise
+
+    return local_socket
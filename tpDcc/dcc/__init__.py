@@ -48,9 +48,29 @@ def clients():
     """
 
     if not _CLIENTS:
-        return client()
+        return [client()]
 
-    return [found_client() for found_client in _CLIENTS]
+    # Clients are stored as weakrefs
+    found_clients = [found_client() for found_client in _CLIENTS.values()]
+
+    return [found_client for found_client in found_clients if found_client is not None]
+
+
+def broadcast(cmd, *args, **kwargs):
+    """
+    Executes given command in the DCC sessions of all active clients at the same time and returns their results
+    The call takes as long as the slowest session and each session waits up to the timeout of its client
+        results = dcc.broadcast('node_exists', 'asset_GRP')
+        found_clients = [found_client for found_client, found in results.items() if found]
+    :param cmd: str, name of the command to execute
+    :param args: list, command arguments
+    :param kwargs: dict, command keyword arguments
+    :return: OrderedDict(DccClient, object), result of the command in each session. False if it failed or timed out
+    """
+
+    from tpDcc.core import client as core_client
+
+    return core_client.broadcast(clients(), cmd, *args, **kwargs)
 
 
 def is_standalone():
@@ -7,10 +7,10 @@ Module that contains base callbackManager class
 
 from __future__ import print_function, division, absolute_import
 
-import sys
 import logging
+import importlib
 
-from tpDcc import dcc
+from tpDcc.core import consts, dcc as core_dcc
 from tpDcc.abstract import callback
 
 LOGGER = logging.getLogger('tpDcc-core')
@@ -19,14 +19,19 @@ LOGGER = logging.getLogger('tpDcc-core')
 class CallbacksManager(object):
     """
     Static class used to manage all callbacks instances
+    DCC notifiers ({CallbackName}Callback classes) are retrieved from the callback module of current DCC
+    (tpDcc.dccs.{dcc_name}.callback)
     """
 
     _initialized = False
+    _callbacks = dict()
 
     @classmethod
-    def initialize(cls):
+    def initialize(cls, notifiers_module=None):
         """
         Initializes all module callbacks
+        :param notifiers_module: module or None, module that contains the DCC notifier classes. If not given, the
+            callback module of current DCC is used
         """
 
         if cls._initialized:
@@ -36,15 +41,17 @@ class CallbacksManager(object):
             'Tick': callback.PythonTickCallback
         }
 
-        try:
-            shutdown_type = getattr(tpDcc.Callbacks, 'ShutdownCallback')
-        except AttributeError:
-            shutdown_type = None
+        if notifiers_module is None:
+            notifiers_module = cls._get_dcc_notifiers_module()
+        if not notifiers_module:
+            LOGGER.warning('DCC {} has no callbacks registered!'.format(core_dcc.current_dcc()))
+
+        shutdown_type = getattr(notifiers_module, 'ShutdownCallback', None)
 
-        for callback_name in tpDcc.callbacks():
+        for callback_name in core_dcc.callbacks():
 
-            # Get callback type from tpDcc.DccCallbacks
-            n_type = getattr(tpDcc.DccCallbacks, callback_name)[1]['type']
+            # Get callback type from tpDcc.core.dcc.DccCallbacks
+            n_type = getattr(core_dcc.DccCallbacks, callback_name)[1]['type']
             if n_type == 'simple':
                 callback_type = callback.SimpleCallback
             elif n_type == 'filter':
@@ -53,27 +60,36 @@ class CallbacksManager(object):
                 LOGGER.warning('Callback Type "{}" is not valid! Using Simplecallback instead ...'.format(n_type))
                 callback_type = callback.SimpleCallback
 
-            # We extract callback types from the specific registered callbacks module
-            if not hasattr(tpDcc, 'Callbacks'):
-                LOGGER.warning('DCC {} has no callbacks registered!'.format(dcc.get_name()))
-                return
-
-            callback_class = getattr(tpDcc.Callbacks, '{}Callback'.format(callback_name), None)
+            callback_class = getattr(notifiers_module, '{}Callback'.format(callback_name), None)
+            if not callback_class:
+                callback_class = default_callbacks.get(callback_name, None)
             if not callback_class:
-                callback_class = default_callbacks.get(callback_name, callback.ICallback)
-                LOGGER.warning(
-                    'Dcc {} does not provides an ICallback for {}Callback. Using {} instead'.format(
-                        dcc.get_name(), callback_name, callback_class.__name__))
+                LOGGER.debug('Dcc {} does not provides an ICallback for {}Callback'.format(
+                    core_dcc.current_dcc(), callback_name))
+                continue
 
-            new_callback = getattr(tpDcc, callback_name, None)
+            new_callback = cls._callbacks.pop(callback_name, None)
             if new_callback:
                 new_callback.cleanup()
-            # register.register_class(callback_name, callback_type(callback_class, shutdown_type), skip_store=True)
+            cls._callbacks[callback_name] = callback_type(callback_class, shutdown_type)
 
             LOGGER.debug('Creating Callback "{}" of type "{}" ...'.format(callback_name, callback_class))
 
         cls._initialized = True
 
+    @classmethod
+    def get(cls, callback_type):
+        """
+        Returns the callback instance of the given type
+        :param callback_type: str, type of callback
+        :return: AbstractCallback or None, None if current DCC does not provide the callback
+        """
+
+        if type(callback_type) in [list, tuple]:
+            callback_type = callback_type[0]
+
+        return cls._callbacks.get(callback_type, None)
+
     @classmethod
     def register(cls, callback_type, fn, owner=None):
         """
@@ -81,13 +97,18 @@ class CallbacksManager(object):
         :param callback_type: str, type of callback
         :param fn: Python function to be called when callback is emitted
         :param owner, class
+        :return: bool, whether the callback was registered or not
         """
 
-        if type(callback_type) in [list, tuple]:
-            callback_type = callback_type[0]
+        cls.initialize()
+
+        callback_instance = cls.get(callback_type)
+        if not callback_instance:
+            return False
 
-        if callback_type in sys.modules[tpDcc.__name__].__dict__.keys():
-            sys.modules[tpDcc.__name__].__dict__[callback_type].register(fn, owner)
+        callback_instance.register(fn, owner)
+
+        return True
 
     @classmethod
     def unregister(cls, callback_type, fn):
@@ -97,11 +118,9 @@ class CallbacksManager(object):
         :param fn: Python function we want to unregister
         """
 
-        if type(callback_type) in [list, tuple]:
-            callback_type = callback_type[0]
-
-        if callback_type in sys.modules[tpDcc.__name__].__dict__.keys():
-            sys.modules[tpDcc.__name__].__dict__[callback_type].unregister(fn)
+        callback_instance = cls.get(callback_type)
+        if callback_instance:
+            callback_instance.unregister(fn)
 
     @classmethod
     def unregister_owner_callbacks(cls, owner):
@@ -113,10 +132,8 @@ class CallbacksManager(object):
         if not cls._initialized:
             return
 
-        for k, v in sys.modules[tpDcc.__name__].__dict__.items():
-            if isinstance(
-                    v, callback.AbstractCallback) or ('Callback' in v.__class__.__name__ and hasattr(v, 'cleanup')):
-                v.unregister_owner_callbacks(owner=owner)
+        for callback_instance in cls._callbacks.values():
+            callback_instance.unregister_owner_callbacks(owner=owner)
 
     @classmethod
     def cleanup(cls):
@@ -125,13 +142,22 @@ class CallbacksManager(object):
         :return:
         """
 
-        # if not cls._initialized:
-        #     return
-
-        for k, v in sys.modules[tpDcc.__name__].__dict__.items():
-            if isinstance(
-                    v, callback.AbstractCallback) or ('Callback' in v.__class__.__name__ and hasattr(v, 'cleanup')):
-                v.cleanup()
-                sys.modules[tpDcc.__name__].__dict__.pop(k)
+        for callback_instance in cls._callbacks.values():
+            callback_instance.cleanup()
+        cls._callbacks.clear()
 
         cls._initialized = False
+
+    @classmethod
+    def _get_dcc_notifiers_module(cls):
+        """
+        Internal function that returns the module that contains the notifiers of current DCC
+        :return: module or None
+        """
+
+        callback_module_path = '{}.{}.callback'.format(consts.TPDCC_DCCS_NAMESPACE, core_dcc.current_dcc())
+        try:
+            return importlib.import_module(callback_module_path)
+        except ImportError as exc:
+            LOGGER.debug('Impossible to import DCC callbacks module "{}": {}'.format(callback_module_path, exc))
+            return None